@@ -0,0 +1,197 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from urllib3.exceptions import DecodeError, ProtocolError, ReadTimeoutError
+
+from request_latency import get_endpoint_stats
+
+# 관측값이 이만큼 쌓이기 전에는 기본 타임아웃 사용 / 헤지하지 않음
+MIN_SAMPLES = 20
+# 적응형 타임아웃 = p99 × TIMEOUT_FACTOR (MIN_TIMEOUT ~ 기본 타임아웃 사이)
+TIMEOUT_FACTOR = 3.0
+MIN_TIMEOUT = 3.0
+# 본문을 읽을 때 전체 시간 제한을 검사하는 청크 크기
+DEADLINE_CHUNK_SIZE = 64 * 1024
+# 헤지 요청은 전체 요청의 HEDGE_MAX_RATIO 비율까지만 (HEDGE_BURST개까지 먼저 허용)
+HEDGE_MAX_RATIO = 0.05
+HEDGE_BURST = 2
+HEDGE_PERCENTILE = 95
+
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="hedge")
+_lock = threading.Lock()
+hedge_stats = {}
+
+
+def _percentile_seconds(endpoint, percentile):
+    stats = get_endpoint_stats(endpoint)
+    if stats is None:
+        return None
+    histogram = stats.histograms["total"]
+    if histogram.total_count < MIN_SAMPLES:
+        return None
+    return histogram.value_at_percentile(percentile) / 1_000_000
+
+
+def adaptive_timeout(endpoint, default=30):
+    """
+    엔드포인트별 적응형 타임아웃(초)
+
+    관측된 p99 지연 시간의 TIMEOUT_FACTOR배를 쓰되, 관측값이 부족하면 기존 고정값(default)을
+    그대로 쓴다. 결과는 MIN_TIMEOUT 이상, default 이하로 제한한다.
+
+    requests의 timeout 인자로만 넘기면 소켓 연결/읽기 한 번마다의 제한이라 조금씩 흘러오는
+    응답은 훨씬 오래 걸릴 수 있다. 요청 전체 시간 제한으로 쓰려면 request_with_deadline()이나
+    iter_with_deadline()으로 본문을 읽는다.
+    """
+    p99 = _percentile_seconds(endpoint, 99)
+    if p99 is None:
+        return default
+    return min(default, max(MIN_TIMEOUT, p99 * TIMEOUT_FACTOR))
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """요청 전체 시간 제한(연결부터 본문 수신까지) 초과"""
+
+
+def _iter_arrived(response, chunk_size):
+    """
+    소켓에 도착한 만큼씩 본문 청크 반환 (최대 chunk_size)
+
+    iter_content()는 chunk_size가 다 찰 때까지 기다리므로 조금씩 흘러오는 응답에서는 시간 제한을
+    검사할 기회가 없다. urllib3의 read1()을 쓸 수 없는 응답(아카이브 재생 등)은 iter_content()로 읽는다.
+    """
+    raw = response.raw
+    if response._content_consumed or not hasattr(raw, "read1") or not hasattr(raw, "release_conn"):
+        yield from response.iter_content(chunk_size)
+        return
+    try:
+        while True:
+            chunk = raw.read1(chunk_size, decode_content=True)
+            if not chunk:
+                break
+            yield chunk
+    # iter_content()와 같은 requests 예외로 변환
+    except ProtocolError as e:
+        raise requests.exceptions.ChunkedEncodingError(e)
+    except DecodeError as e:
+        raise requests.exceptions.ContentDecodingError(e)
+    except ReadTimeoutError as e:
+        raise requests.exceptions.ConnectionError(e)
+    response._content_consumed = True
+
+
+def iter_with_deadline(response, timeout, started, chunk_size=DEADLINE_CHUNK_SIZE):
+    """
+    본문을 도착하는 대로 읽으면서 started(time.monotonic() 값)부터의 수신 시간이 timeout(초)을
+    넘으면 DeadlineExceeded
+
+    호출한 쪽이 청크를 처리하는 시간은 빼고 청크를 기다린 시간만 센다 (스트리밍 파싱 중
+    소비자가 느려도 타임아웃으로 보지 않음). 검사는 소켓 읽기 사이에서 하므로 마지막 읽기
+    한 번(requests의 timeout)만큼은 넘칠 수 있다.
+    """
+    spent = time.monotonic() - started
+    chunks = _iter_arrived(response, chunk_size)
+    while True:
+        if spent > timeout:
+            _abandon(response, chunks, timeout)
+        waited_at = time.monotonic()
+        chunk = next(chunks, None)
+        if chunk is None:
+            return
+        spent += time.monotonic() - waited_at
+        if spent > timeout:
+            _abandon(response, chunks, timeout)
+        yield chunk
+
+
+def _abandon(response, chunks, timeout):
+    """읽기를 멈추고 DeadlineExceeded (기록 중인 page_archive 응답이면 받은 부분을 버림)"""
+    chunks.close()
+    discard = getattr(response.raw, "discard", None)
+    if discard is not None:
+        discard()
+    raise DeadlineExceeded(f"응답 수신이 {timeout:.1f}초를 넘음")
+
+
+def request_with_deadline(session, method, url, endpoint, default=30, **kwargs):
+    """
+    adaptive_timeout(endpoint)을 요청 전체 시간 제한으로 적용해 요청하고 본문까지 모두 읽음
+
+    반환된 응답은 연결이 닫혀 있고 .content/.text/.json()을 그대로 쓸 수 있다.
+
+    Raises:
+        DeadlineExceeded: 연결부터 본문 수신까지 제한 시간 초과 (requests.exceptions.Timeout)
+    """
+    timeout = adaptive_timeout(endpoint, default)
+    started = time.monotonic()
+    response = session.request(method, url, timeout=timeout, stream=True, **kwargs)
+    try:
+        body = b"".join(iter_with_deadline(response, timeout, started))
+    finally:
+        response.close()
+    response._content = body
+    return response
+
+
+def _endpoint_hedge_stats(endpoint):
+    return hedge_stats.setdefault(endpoint, {"요청": 0, "헤지": 0, "헤지승리": 0})
+
+
+def _try_acquire_hedge(endpoint):
+    with _lock:
+        stats = _endpoint_hedge_stats(endpoint)
+        if stats["헤지"] + 1 > stats["요청"] * HEDGE_MAX_RATIO + HEDGE_BURST:
+            return False
+        stats["헤지"] += 1
+        return True
+
+
+def hedged_call(endpoint, send, enabled=True):
+    """
+    멱등 요청 send()를 실행하고, 엔드포인트 p95 안에 끝나지 않으면 같은 요청을 한 번 더 보내
+    먼저 성공한 결과를 반환
+
+    헤지 요청 수는 HEDGE_MAX_RATIO로 제한되어 서버 부하 증가는 작다. 관측값이 부족하거나
+    enabled=False이면 그냥 send()를 호출한다. send는 다른 스레드에서 실행될 수 있으므로
+    스레드 로컬 상태에 의존하지 않아야 한다.
+    """
+    with _lock:
+        _endpoint_hedge_stats(endpoint)["요청"] += 1
+    delay = _percentile_seconds(endpoint, HEDGE_PERCENTILE) if enabled else None
+    if delay is None:
+        return send()
+
+    primary = _executor.submit(send)
+    done, _ = wait([primary], timeout=delay)
+    if done or not _try_acquire_hedge(endpoint):
+        return primary.result()
+
+    hedge = _executor.submit(send)
+    pending = {primary, hedge}
+    first_error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                if future is hedge:
+                    with _lock:
+                        _endpoint_hedge_stats(endpoint)["헤지승리"] += 1
+                return future.result()
+            first_error = first_error or future.exception()
+    raise first_error
+
+
+def print_hedge_stats():
+    """엔드포인트별 헤지 요청 통계 출력"""
+    with _lock:
+        items = sorted((endpoint, dict(stats)) for endpoint, stats in hedge_stats.items())
+    items = [(endpoint, stats) for endpoint, stats in items if stats["요청"]]
+    if not items:
+        return
+    print("\n🪃 헤지 요청 통계")
+    for endpoint, stats in items:
+        ratio = stats["헤지"] / stats["요청"] * 100
+        print(f"- {endpoint}: 요청 {stats['요청']}건, 헤지 {stats['헤지']}건 ({ratio:.1f}%), "
+              f"헤지가 먼저 응답 {stats['헤지승리']}건, 현재 타임아웃 {adaptive_timeout(endpoint):.1f}초")
@@ -0,0 +1,96 @@
+import argparse
+import json
+import time
+import tracemalloc
+from xml.sax.saxutils import escape
+
+from omega3_api import COLUMN_MAPPING
+from omega3_complate import XML_CHUNK_SIZE, iter_api_rows_xml
+
+# 실제 I0030 행과 비슷한 길이의 필드 값 (기준규격/섭취시주의사항이 긴 편)
+SAMPLE_VALUES = {
+    "STDR_STND": "1. 성상 : 고유의 색택과 향미를 가지고 이미, 이취가 없는 연질캡슐 "
+                 "2. EPA와 DHA의 합 : 표시량(600 mg/2 g)의 80~150% 3. 산가 : 3.0 이하 "
+                 "4. 과산화물가 : 5.0 meq/kg 이하 5. 아니시딘가 : 20.0 이하 6. 총산화가 : 26.0 이하 " * 2,
+    "IFTKN_ATNT_MATR_CN": "의약품(항응고제, 항혈소판제, 혈압약 등) 복용 시 섭취에 주의 " * 3,
+    "PRIMARY_FNCLTY": "[EPA 및 DHA 함유 유지] ①혈중 중성지질 개선 ②혈행 개선에 도움을 줄 수 있음",
+}
+
+
+def make_rows(count):
+    rows = []
+    for i in range(count):
+        row = {field: SAMPLE_VALUES.get(field, f"{field}-{i}") for field in COLUMN_MAPPING}
+        row["PRDLST_REPORT_NO"] = f"2004001{i:07d}"
+        rows.append(row)
+    return rows
+
+
+def make_json(rows, service_id="I0030"):
+    return json.dumps({service_id: {
+        "total_count": str(len(rows)),
+        "row": rows,
+        "RESULT": {"MSG": "정상처리되었습니다.", "CODE": "INFO-000"},
+    }}, ensure_ascii=False).encode("utf-8")
+
+
+def make_xml(rows, service_id="I0030"):
+    parts = [f'<?xml version="1.0" encoding="UTF-8"?><{service_id}><total_count>{len(rows)}</total_count>']
+    for i, row in enumerate(rows):
+        parts.append(f'<row id="{i}">' + "".join(f"<{k}>{escape(v)}</{k}>" for k, v in row.items()) + "</row>")
+    parts.append(f"<RESULT><MSG>정상처리되었습니다.</MSG><CODE>INFO-000</CODE></RESULT></{service_id}>")
+    return "".join(parts).encode("utf-8")
+
+
+def chunked(data, size=XML_CHUNK_SIZE):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def consume_json(data):
+    # JSON 경로: 응답 전체를 받은 뒤 한 번에 파싱 (parse_api_response와 같은 구조 접근)
+    count = 0
+    for row in json.loads(data)["I0030"]["row"]:
+        count += bool(row["PRDLST_NM"])
+    return count
+
+
+def consume_xml(data):
+    # XML 경로: 받은 조각을 바로 파싱하며 행 단위로 처리
+    count = 0
+    for row in iter_api_rows_xml(chunked(data)):
+        count += bool(row["PRDLST_NM"])
+    return count
+
+
+def measure(func, data, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        count = func(data)
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    func(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAPI JSON 일괄 파싱 vs XML 스트리밍 파싱 벤치마크")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 10000], help="구간 크기(행 수)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'행 수':>8}{'형식':>6}{'크기(KB)':>11}{'시간(ms)':>10}{'행/초':>11}{'최대 메모리(KB)':>17}")
+    for count in args.rows:
+        rows = make_rows(count)
+        for name, data, func in (("json", make_json(rows), consume_json), ("xml", make_xml(rows), consume_xml)):
+            parsed, seconds, peak = measure(func, data, args.repeat)
+            assert parsed == count
+            print(f"{count:>8}{name:>6}{len(data) / 1024:>11.0f}{seconds * 1000:>10.1f}"
+                  f"{count / seconds:>11.0f}{peak / 1024:>17.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import math
+import os
+from datetime import datetime
+
+
+def _clean(value):
+    """NaN/numpy 값을 JSON으로 비교/저장 가능한 값으로 변환"""
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def row_hash(row):
+    """행(dict)의 내용 해시 (컬럼 순서 무관)"""
+    encoded = json.dumps(row, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha1(encoded).hexdigest()
+
+
+def build_snapshot(df, key_func, ignore_columns=(), passed=None):
+    """
+    DataFrame을 키별 스냅샷으로 변환
+
+    Args:
+        df (DataFrame): 이번 실행 결과
+        key_func (callable): 행(dict) -> 키 (예: 정규화한 신고번호)
+        ignore_columns (iterable): 해시/비교에서 제외할 컬럼 (검색 순번처럼 실행마다 바뀌는 값)
+        passed (iterable): 행별 기준 통과 여부 (df와 같은 순서, 없으면 None)
+
+    Returns:
+        dict: 키 -> {"hash", "passed", "row"} (같은 키는 마지막 행)
+    """
+    ignore_columns = set(ignore_columns)
+    columns = [column for column in df.columns if column not in ignore_columns]
+    passed = list(passed) if passed is not None else [None] * len(df)
+    snapshot = {}
+    for values, row_passed in zip(df[columns].itertuples(index=False, name=None), passed):
+        row = {column: _clean(value) for column, value in zip(columns, values)}
+        key = key_func(row)
+        if not key:
+            continue
+        snapshot[key] = {"hash": row_hash(row), "passed": _clean(row_passed), "row": row}
+    return snapshot
+
+
+def load_snapshot(path):
+    """이전 실행 스냅샷 (없으면 None)"""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)["rows"]
+    except (OSError, ValueError, KeyError) as e:
+        print(f"⚠️ 이전 스냅샷을 읽을 수 없음 ({path}): {e}")
+        return None
+
+
+def save_snapshot(snapshot, path, run_at):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"saved_at": run_at, "rows": snapshot}, f, ensure_ascii=False, separators=(",", ":"))
+
+
+def diff_snapshots(previous, current):
+    """
+    두 스냅샷 비교
+
+    Returns:
+        list: 변경 목록 {"change": added|removed|modified, "key", "fields", "pass"}
+              fields는 바뀐 컬럼 -> [이전값,현재값], pass는 통과 여부가 바뀐 경우 [이전, 현재]
+    """
+    changes = []
+    for key in sorted(current.keys() - previous.keys()):
+        changes.append({"change": "added", "key": key, "pass": [None, current[key]["passed"]]})
+    for key in sorted(previous.keys() - current.keys()):
+        changes.append({"change": "removed", "key": key, "pass": [previous[key]["passed"], None]})
+    for key in sorted(current.keys() & previous.keys()):
+        old, new = previous[key], current[key]
+        if old["hash"] == new["hash"] and old["passed"] == new["passed"]:
+            continue
+        fields = {
+            column: [old["row"].get(column), new["row"].get(column)]
+            for column in sorted(old["row"].keys() | new["row"].keys())
+            if old["row"].get(column) != new["row"].get(column)
+        }
+        change = {"change": "modified", "key": key, "fields": fields}
+        if old["passed"] != new["passed"]:
+            change["pass"] = [old["passed"], new["passed"]]
+        changes.append(change)
+    return changes
+
+
+def record_run(df, snapshot_path, feed_path, key_func, ignore_columns=(), passed=None, label_column=None):
+    """
+    이번 실행 결과를 이전 스냅샷과 비교해 변경 피드(JSON Lines)에 추가하고 스냅샷 갱신
+
+    첫 실행(이전 스냅샷 없음)에는 스냅샷만 저장한다. 변경이 없으면 파일을 다시 쓰지 않는다.
+
+    Args:
+        df (DataFrame): 이번 실행 결과
+        snapshot_path (str): 스냅샷 파일 경로
+        feed_path (str): 변경 피드 파일 경로 (실행마다 변경 줄 추가)
+        key_func (callable): 행(dict) -> 키
+        ignore_columns (iterable): 비교에서 제외할 컬럼
+        passed (iterable): 행별 기준 통과 여부
+        label_column (str): 피드에 함께 적을 이름 컬럼 (예: 제품명)
+
+    Returns:
+        list: 변경 목록 (첫 실행이면 None)
+    """
+    run_at = datetime.now().isoformat(timespec="seconds")
+    current = build_snapshot(df, key_func, ignore_columns, passed)
+    previous = load_snapshot(snapshot_path)
+    if previous is None:
+        save_snapshot(current, snapshot_path, run_at)
+        print(f"🗂️ 첫 스냅샷 저장: {snapshot_path} ({len(current)}개 제품)")
+        return None
+
+    changes = diff_snapshots(previous, current)
+    if changes:
+        with open(feed_path, "a", encoding="utf-8") as f:
+            for change in changes:
+                if label_column:
+                    source = current.get(change["key"]) or previous[change["key"]]
+                    change = {**change, "label": source["row"].get(label_column)}
+                f.write(json.dumps({"run_at": run_at, **change}, ensure_ascii=False, default=str) + "\n")
+        save_snapshot(current, snapshot_path, run_at)
+    print_change_summary(changes, feed_path)
+    return changes
+
+
+def print_change_summary(changes, feed_path):
+    """변경 피드 요약 출력"""
+    if not changes:
+        print("🗂️ 이전 실행 대비 변경 없음")
+        return
+    counts = {kind: sum(change["change"] == kind for change in changes) for kind in ("added", "removed", "modified")}
+    flips = [change["pass"] for change in changes if change["change"] == "modified" and "pass" in change]
+    to_pass = sum(1 for old, new in flips if new)
+    to_fail = len(flips) - to_pass
+    print(f"🗂️ 이전 실행 대비 변경: 추가 {counts['added']}개, 삭제 {counts['removed']}개, 수정 {counts['modified']}개 "
+          f"(통과로 전환 {to_pass}개, 탈락으로 전환 {to_fail}개) → {feed_path}")
+
+
+def write_csv_if_changed(df, filename):
+    """
+    CSV(UTF-8 BOM)로 저장하되 기존 파일과 내용이 같으면 다시 쓰지 않음
+
+    Returns:
+        bool: 파일을 새로 썼으면 True
+    """
+    data = df.to_csv(index=False).encode("utf-8-sig")
+    if os.path.exists(filename) and os.path.getsize(filename) == len(data):
+        with open(filename, "rb") as f:
+            if f.read() == data:
+                return False
+    with open(filename, "wb") as f:
+        f.write(data)
+    return True
@@ -0,0 +1,322 @@
+import queue
+import threading
+import time
+
+from main import (
+    SEARCH_INTERVAL,
+    search_omega3_products,
+    build_product_info,
+    submit_product_detail,
+    check_rancidity_standards,
+    save_results,
+    print_detail_fetch_stats,
+    session,
+)
+from request_latency import install as install_latency_probes, print_latency_report
+from adaptive_requests import print_hedge_stats
+from page_archive import attach_from_env
+from rate_limiter import RateLimiter
+
+# 단계 종료 신호
+_STOP = object()
+
+
+class Stage:
+    """
+    파이프라인 단계
+
+    Args:
+        name (str): 단계 이름 (리포트 표시용)
+        func (callable): 입력 항목 하나를 받아 다음 단계로 보낼 항목들(iterable)을 반환.
+            None을 반환하면 아무것도 보내지 않는다.
+        workers (int): 이 단계를 처리할 워커 스레드 수
+        queue_size (int): 이 단계 입력 큐의 최대 크기 (가득 차면 앞 단계가 대기)
+    """
+
+    def __init__(self, name, func, workers=1, queue_size=16):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.queue_size = queue_size
+        self.input_queue = None
+
+        self._lock = threading.Lock()
+        self.processed = 0
+        self.emitted = 0
+        self.errors = 0
+        self.busy_time = 0.0
+        self.blocked_time = 0.0  # 앞 단계가 이 단계 큐에 넣으려다 막힌 시간 (backpressure)
+        self.max_depth = 0
+        self._depth_sum = 0
+        self._depth_samples = 0
+
+    def queue_depth(self):
+        return self.input_queue.qsize() if self.input_queue is not None else 0
+
+    def sample_depth(self):
+        depth = self.queue_depth()
+        with self._lock:
+            self.max_depth = max(self.max_depth, depth)
+            self._depth_sum += depth
+            self._depth_samples += 1
+
+    def avg_depth(self):
+        return self._depth_sum / self._depth_samples if self._depth_samples else 0.0
+
+
+class Pipeline:
+    """
+    크기가 제한된 큐로 연결된 생산자/소비자 파이프라인
+
+    뒷단계(저장, 요청 간격 제한 등)가 밀리면 입력 큐가 가득 차고,
+    앞 단계의 put()이 막히면서 자연스럽게 속도가 줄어든다(backpressure).
+    각 단계의 큐 깊이와 처리(busy) 시간을 기록해 병목 단계를 보여준다.
+    """
+
+    def __init__(self, stages, sample_interval=0.5, report_interval=None):
+        self.stages = stages
+        self.sample_interval = sample_interval
+        self.report_interval = report_interval
+        self.wall_time = 0.0
+
+    def run(self, inputs):
+        """inputs의 항목들을 첫 단계에 넣고 모든 단계가 끝날 때까지 실행"""
+        for stage in self.stages:
+            stage.input_queue = queue.Queue(maxsize=stage.queue_size)
+
+        threads = []
+        for index, stage in enumerate(self.stages):
+            next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+            remaining = [stage.workers]
+            for worker_no in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._worker,
+                    args=(stage, next_stage, remaining),
+                    name=f"{stage.name}-{worker_no + 1}",
+                    daemon=True,
+                )
+                thread.start()
+                threads.append(thread)
+
+        done = threading.Event()
+        monitor = threading.Thread(target=self._monitor, args=(done,), daemon=True)
+        monitor.start()
+
+        started = time.monotonic()
+        first = self.stages[0]
+        for item in inputs:
+            self._put(first, item)
+        for _ in range(first.workers):
+            first.input_queue.put(_STOP)
+
+        for thread in threads:
+            thread.join()
+        self.wall_time = time.monotonic() - started
+        done.set()
+        monitor.join()
+
+    def _put(self, stage, item):
+        blocked_at = time.monotonic()
+        stage.input_queue.put(item)
+        blocked = time.monotonic() - blocked_at
+        if blocked > 0.001:
+            with stage._lock:
+                stage.blocked_time += blocked
+
+    def _worker(self, stage, next_stage, remaining):
+        while True:
+            item = stage.input_queue.get()
+            if item is _STOP:
+                break
+
+            started = time.monotonic()
+            try:
+                outputs = stage.func(item)
+                outputs = list(outputs) if outputs is not None else []
+            except Exception as e:
+                print(f"❌ [{stage.name}] 처리 중 오류: {e}")
+                outputs = []
+                with stage._lock:
+                    stage.errors += 1
+            elapsed = time.monotonic() - started
+
+            with stage._lock:
+                stage.processed += 1
+                stage.busy_time += elapsed
+                stage.emitted += len(outputs)
+
+            if next_stage is not None:
+                for output in outputs:
+                    self._put(next_stage, output)
+
+        # 이 단계의 마지막 워커가 다음 단계에 종료 신호 전달
+        with stage._lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last and next_stage is not None:
+            for _ in range(next_stage.workers):
+                next_stage.input_queue.put(_STOP)
+
+    def _monitor(self, done):
+        last_report = time.monotonic()
+        while not done.wait(self.sample_interval):
+            for stage in self.stages:
+                stage.sample_depth()
+            if self.report_interval and time.monotonic() - last_report >= self.report_interval:
+                print("⏱️ 큐 깊이: " + ", ".join(f"{s.name}={s.queue_depth()}" for s in self.stages))
+                last_report = time.monotonic()
+
+    def stats(self):
+        """단계별 통계 리스트 반환"""
+        rows = []
+        for stage in self.stages:
+            capacity = self.wall_time * stage.workers
+            rows.append({
+                "단계": stage.name,
+                "워커": stage.workers,
+                "입력": stage.processed,
+                "출력": stage.emitted,
+                "오류": stage.errors,
+                "처리시간(s)": round(stage.busy_time, 2),
+                "가동률(%)": round(stage.busy_time / capacity * 100, 1) if capacity else 0.0,
+                "대기(put 차단,s)": round(stage.blocked_time, 2),
+                "평균큐": round(stage.avg_depth(), 1),
+                "최대큐": stage.max_depth,
+            })
+        return rows
+
+    def print_report(self):
+        """단계별 큐 깊이/처리시간 리포트 출력 - 가동률이 가장 높은 단계가 병목"""
+        rows = self.stats()
+        print("\n📊 파이프라인 단계별 통계 (총 {:.1f}초)".format(self.wall_time))
+        print(f"{'단계':<10}{'워커':>4}{'입력':>7}{'출력':>7}{'오류':>5}{'처리(s)':>10}{'가동률%':>9}{'차단(s)':>9}{'평균큐':>7}{'최대큐':>7}")
+        for row in rows:
+            print(f"{row['단계']:<10}{row['워커']:>4}{row['입력']:>7}{row['출력']:>7}{row['오류']:>5}"
+                  f"{row['처리시간(s)']:>10}{row['가동률(%)']:>9}{row['대기(put 차단,s)']:>9}"
+                  f"{row['평균큐']:>7}{row['최대큐']:>7}")
+        if rows:
+            bottleneck = max(rows, key=lambda row: row["가동률(%)"])
+            print(f"🐢 병목 단계: {bottleneck['단계']} (가동률 {bottleneck['가동률(%)']}%)")
+
+
+def build_omega3_pipeline(search_term="셀로닉스", show_cnt=10, first_page_data=None,
+                          detail_workers=2, parse_workers=2, queue_size=16,
+                          rate_limiter=None, search_limiter=None, keep=None, sink=None):
+    """
+    오메가3 제품 수집 파이프라인 구성
+
+    Args:
+        search_term (str): 검색어
+        show_cnt (int): 검색 페이지당 제품 수
+        first_page_data (list): 이미 받아 둔 1페이지 검색 결과 (있으면 재요청하지 않음)
+        detail_workers (int): 상세 페이지 요청 워커 수
+        parse_workers (int): 파싱 결과를 기다려 병합하는 워커 수 (실제 파싱은 파서 프로세스 풀에서 실행)
+        queue_size (int): 단계 사이 큐의 최대 크기
+        rate_limiter (RateLimiter): 상세 페이지 요청 간격 제한기 (기본값: 2초 간격)
+        search_limiter (RateLimiter): 검색 페이지 요청 간격 제한기 (기본값: SEARCH_INTERVAL 간격)
+        keep (callable): 필터 단계 조건 (제품 정보 -> bool, 기본값: 모두 통과)
+        sink (callable): 최종 제품 정보를 받는 함수
+
+    Returns:
+        Pipeline: 실행 전 파이프라인
+    """
+    if rate_limiter is None:
+        rate_limiter = RateLimiter(2.0)
+    if search_limiter is None:
+        search_limiter = RateLimiter(SEARCH_INTERVAL)
+
+    def search_stage(page_no):
+        if page_no == 1 and first_page_data is not None:
+            return first_page_data
+        search_limiter.wait()
+        return search_omega3_products(page_no, search_term, show_cnt) or []
+
+    def detail_stage(item):
+        product_info = build_product_info(item)
+        if not product_info["prdlstReportNo"]:
+            return [(product_info, None)]
+        # 같은 신고번호는 한 번만 요청/파싱 (요청 간격 제한도 실제 요청에만 적용)
+        future = submit_product_detail(product_info["prdlstReportNo"], search_term, before_fetch=rate_limiter.wait)
+        return [(product_info, future)]
+
+    def parse_stage(job):
+        product_info, future = job
+        if future is not None:
+            # 파싱 실패해도 제품은 산패도 정보 없이 유지 (collect_all_omega3_products와 같음)
+            try:
+                _, rancidity_info = future.result()
+            except Exception as e:
+                print(f"  상세 페이지 파싱 오류 ({product_info['prdlstReportNo']}): {e}")
+                rancidity_info = None
+            if rancidity_info:
+                product_info.update(rancidity_info)
+                product_info.update(check_rancidity_standards(rancidity_info))
+        return [product_info]
+
+    def filter_stage(product_info):
+        if keep is None or keep(product_info):
+            return [product_info]
+        return None
+
+    def sink_stage(product_info):
+        if sink is not None:
+            sink(product_info)
+        return None
+
+    return Pipeline([
+        Stage("search", search_stage, workers=1, queue_size=queue_size),
+        Stage("detail", detail_stage, workers=detail_workers, queue_size=queue_size),
+        Stage("parse", parse_stage, workers=parse_workers, queue_size=queue_size),
+        Stage("filter", filter_stage, workers=1, queue_size=queue_size),
+        Stage("sink", sink_stage, workers=1, queue_size=queue_size),
+    ], report_interval=30)
+
+
+def run_omega3_pipeline(search_term="셀로닉스", show_cnt=10, **pipeline_options):
+    """
+    파이프라인 방식으로 모든 오메가3 제품 수집
+
+    Returns:
+        tuple: (수집된 제품 리스트, 실행된 Pipeline)
+    """
+    print(f"'{search_term}' 검색어로 파이프라인 수집을 시작합니다...")
+    print("=" * 80)
+
+    # 첫 번째 페이지로 전체 개수 확인 (세션 초기화 포함) - 이후 검색 페이지와 같은 간격 제한기 사용
+    search_limiter = pipeline_options.pop("search_limiter", None) or RateLimiter(SEARCH_INTERVAL)
+    search_limiter.wait()
+    first_page_data = search_omega3_products(1, search_term, show_cnt)
+    if not first_page_data:
+        print("검색 결과가 없습니다.")
+        return [], None
+
+    total_count = int(first_page_data[0].get("total_count", 0))
+    total_pages = (total_count + show_cnt - 1) // show_cnt
+    print(f"총 {total_count}개 제품, {total_pages}페이지")
+
+    products = []
+    pipeline = build_omega3_pipeline(
+        search_term, show_cnt, first_page_data=first_page_data,
+        search_limiter=search_limiter, sink=products.append, **pipeline_options
+    )
+    pipeline.run(range(1, total_pages + 1))
+    pipeline.print_report()
+    print_detail_fetch_stats()
+    print_latency_report()
+    print_hedge_stats()
+
+    print(f"\n🎉 총 {len(products)}개 제품 수집 완료!")
+    return products, pipeline
+
+
+def main():
+    """파이프라인 수집 실행"""
+    products, _ = run_omega3_pipeline(search_term="셀로닉스", show_cnt=10)
+    if products:
+        save_results(products)
+
+
+if __name__ == "__main__":
+    attach_from_env(session)
+    install_latency_probes()
+    main()
@@ -0,0 +1,248 @@
+import json
+import os
+import time
+
+# 기본 규칙 파일 (이 모듈과 같은 폴더)
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "filter_rules.json")
+# 규칙 통계 파일 폴더를 바꾸는 환경 변수 (기본값: 현재 작업 폴더, 결과 CSV와 같은 곳)
+STATS_DIR_ENV = "FILTER_RULE_STATS_DIR"
+
+# 관측 통계가 없을 때 쓰는 기본값
+DEFAULT_RULE_COST = 1e-6        # 규칙 1회 평가 시간(초)
+DEFAULT_EXTRACT_COST = 1e-4     # 추출 1회 시간(초)
+DEFAULT_REJECT_RATE = 0.1       # 탈락 비율
+
+
+def load_rules(path=DEFAULT_RULES_PATH):
+    """규칙 설정 파일(JSON) 읽기"""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def rancidity_thresholds(config=None):
+    """설정의 max 규칙에서 산패도 항목별 기준값 추출 ({"산가": 3.0, ...})"""
+    if config is None:
+        config = load_rules()
+    return {rule["metric"]: rule["limit"] for rule in config["rules"] if rule["type"] == "max"}
+
+
+def _text(value):
+    return value if isinstance(value, str) else ""
+
+
+class Rule:
+    """
+    컴파일된 필터 규칙 하나
+
+    test(row, derived)는 통과하면 None, 탈락하면 사유 문자열을 반환한다.
+    needs가 있는 규칙은 derived[needs](추출 결과)를 사용한다.
+    """
+
+    def __init__(self, spec):
+        self.name = spec["name"]
+        self.type = spec["type"]
+        self.needs = spec.get("needs")
+        self.spec = spec
+        self.evaluated = 0
+        self.rejected = 0
+        self.elapsed = 0.0
+        self.prior = {}
+
+        if self.type == "empty":
+            field, reason = spec["field"], spec["reason"]
+            self._test = lambda row, value: reason if _text(row.get(field)).strip() else None
+        elif self.type == "not_contains_all":
+            field, values, reason = spec["field"], spec["values"], spec["reason"]
+            self._test = lambda row, value: reason if all(v in _text(row.get(field)) for v in values) else None
+        elif self.type == "present":
+            reason = spec["reason"]
+            self._test = lambda row, value: reason if not value else None
+        elif self.type == "max":
+            metric, limit = spec["metric"], spec["limit"]
+
+            def test_max(row, value):
+                measured = value.get(metric) if value else None
+                if measured is not None and measured > limit:
+                    return f"{metric} 기준 초과 ({measured} > {limit})"
+                return None
+            self._test = test_max
+        else:
+            raise ValueError(f"알 수 없는 규칙 종류: {self.type} ({self.name})")
+
+    def mean_cost(self):
+        """관측된 평균 평가 시간 (이전 실행 통계 포함)"""
+        evaluated = self.evaluated + self.prior.get("evaluated", 0)
+        elapsed = self.elapsed + self.prior.get("elapsed", 0.0)
+        return elapsed / evaluated if evaluated else DEFAULT_RULE_COST
+
+    def reject_rate(self):
+        """관측된 탈락 비율 (라플라스 보정, 이전 실행 통계 포함)"""
+        evaluated = self.evaluated + self.prior.get("evaluated", 0)
+        rejected = self.rejected + self.prior.get("rejected", 0)
+        if not evaluated:
+            return DEFAULT_REJECT_RATE
+        return (rejected + 1) / (evaluated + 2)
+
+
+class FilterPlan:
+    """
+    규칙들을 평가 순서가 정해진 조건 계획으로 컴파일한 것
+
+    모든 규칙은 AND로 묶이므로 순서와 관계없이 통과 여부는 같다. 탈락 확률이 높고
+    싼 규칙부터 평가하고, 정규식 추출처럼 비싼 작업은 그것이 필요한 규칙에
+    도달한 행에서만 한 번 실행한다. 탈락 사유는 평가 순서와 관계없이 설정 파일
+    순서에서 처음 걸리는 규칙의 것이다 (실행마다 같은 사유).
+    """
+
+    def __init__(self, rules, extractors, stats_path=None):
+        self.rules = rules
+        self.extractors = extractors
+        self.stats_path = stats_path
+        self.extract_count = {name: 0 for name in extractors}
+        self.extract_elapsed = {name: 0.0 for name in extractors}
+        self.extract_prior = {}
+        self.rows = 0
+        self.passed = 0
+        self._load_stats()
+        self.order = self._plan_order()
+
+    def _load_stats(self):
+        if not self.stats_path or not os.path.exists(self.stats_path):
+            return
+        try:
+            with open(self.stats_path, encoding="utf-8") as f:
+                stats = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 규칙 통계 파일을 읽을 수 없음 ({self.stats_path}): {e}")
+            return
+        for rule in self.rules:
+            rule.prior = stats.get("rules", {}).get(rule.name, {})
+        self.extract_prior = stats.get("extractors", {})
+
+    def _extract_cost(self, name):
+        prior = self.extract_prior.get(name, {})
+        count = self.extract_count[name] + prior.get("count", 0)
+        elapsed = self.extract_elapsed[name] + prior.get("elapsed", 0.0)
+        return elapsed / count if count else DEFAULT_EXTRACT_COST
+
+    def _plan_order(self):
+        """기대 비용 / 탈락 비율이 가장 작은 규칙부터 고르는 탐욕적 순서 (이미 추출된 값은 비용 0)"""
+        remaining = list(self.rules)
+        available = set()
+        order = []
+        while remaining:
+            def score(rule):
+                cost = rule.mean_cost()
+                if rule.needs and rule.needs not in available:
+                    cost += self._extract_cost(rule.needs)
+                return cost / rule.reject_rate()
+            best = min(remaining, key=score)
+            order.append(best)
+            remaining.remove(best)
+            if best.needs:
+                available.add(best.needs)
+        return order
+
+    def evaluate(self, row):
+        """
+        행 하나에 규칙 적용
+
+        Returns:
+            tuple: (통과여부, 사유)
+        """
+        self.rows += 1
+        derived = {}
+        passed_rules = set()
+        for rule in self.order:
+            value, _ = self._derive(rule, row, derived)
+            started = time.perf_counter()
+            reason = rule._test(row, value)
+            rule.elapsed += time.perf_counter() - started
+            rule.evaluated += 1
+            if reason is not None:
+                rule.rejected += 1
+                return False, self._canonical_reason(row, derived, rule, reason, passed_rules)
+            passed_rules.add(rule)
+        self.passed += 1
+        return True, "모든 기준 통과"
+
+    def _derive(self, rule, row, derived):
+        """
+        규칙에 필요한 추출 값 (행마다 한 번만 추출)
+
+        Returns:
+            tuple: (추출 값, 이번에 추출하느라 걸린 시간)
+        """
+        if not rule.needs:
+            return None, 0.0
+        elapsed = 0.0
+        if rule.needs not in derived:
+            started = time.perf_counter()
+            derived[rule.needs] = self.extractors[rule.needs](row)
+            elapsed = time.perf_counter() - started
+            self.extract_count[rule.needs] += 1
+            self.extract_elapsed[rule.needs] += elapsed
+        return derived[rule.needs], elapsed
+
+    def _canonical_reason(self, row, derived, failed_rule, reason, passed_rules):
+        """설정 순서에서 failed_rule보다 앞선 규칙 중 아직 평가하지 않은 것을 확인해 가장 앞의 탈락 사유 반환"""
+        for rule in self.rules:
+            if rule is failed_rule:
+                break
+            if rule in passed_rules:
+                continue
+            earlier = rule._test(row, self._derive(rule, row, derived)[0])
+            if earlier is not None:
+                return earlier
+        return reason
+
+    def print_report(self):
+        """규칙별 평가 횟수/탈락 수/소요 시간 출력"""
+        print(f"\n📊 필터 규칙별 통계 ({self.passed}/{self.rows}개 통과)")
+        print(f"{'순서':>4}  {'규칙':<12}{'평가':>8}{'탈락':>8}{'탈락률%':>9}{'시간(ms)':>11}")
+        for index, rule in enumerate(self.order, 1):
+            rate = rule.rejected / rule.evaluated * 100 if rule.evaluated else 0.0
+            print(f"{index:>4}  {rule.name:<12}{rule.evaluated:>8}{rule.rejected:>8}{rate:>9.1f}{rule.elapsed * 1000:>11.2f}")
+        for name, count in self.extract_count.items():
+            print(f"      추출:{name:<8}{count:>8}{'':>8}{'':>9}{self.extract_elapsed[name] * 1000:>11.2f}")
+
+    def save_stats(self):
+        """이번 실행 통계를 이전 통계에 누적해 저장 (다음 실행의 평가 순서에 사용)"""
+        if not self.stats_path:
+            return
+        stats = {"rules": {}, "extractors": {}}
+        for rule in self.rules:
+            stats["rules"][rule.name] = {
+                "evaluated": rule.evaluated + rule.prior.get("evaluated", 0),
+                "rejected": rule.rejected + rule.prior.get("rejected", 0),
+                "elapsed": rule.elapsed + rule.prior.get("elapsed", 0.0),
+            }
+        for name in self.extractors:
+            prior = self.extract_prior.get(name, {})
+            stats["extractors"][name] = {
+                "count": self.extract_count[name] + prior.get("count", 0),
+                "elapsed": self.extract_elapsed[name] + prior.get("elapsed", 0.0),
+            }
+        with open(self.stats_path, "w", encoding="utf-8") as f:
+            json.dump(stats, f, ensure_ascii=False, indent=2)
+
+
+def compile_rules(config, extractors, stats_path=None):
+    """
+    규칙 설정을 평가 계획으로 컴파일
+
+    Args:
+        config (dict): load_rules()로 읽은 설정
+        extractors (dict): needs 이름 -> 행에서 값을 추출하는 함수
+        stats_path (str): 규칙 통계 파일 (기본값: 설정의 stats_file, FILTER_RULE_STATS_DIR 또는 현재 작업 폴더 기준)
+
+    Returns:
+        FilterPlan: 컴파일된 계획
+    """
+    rules = [Rule(spec) for spec in config["rules"]]
+    for rule in rules:
+        if rule.needs and rule.needs not in extractors:
+            raise ValueError(f"규칙 {rule.name}에 필요한 추출기 없음: {rule.needs}")
+    if stats_path is None and config.get("stats_file"):
+        stats_path = os.path.join(os.environ.get(STATS_DIR_ENV) or os.getcwd(), config["stats_file"])
+    return FilterPlan(rules, extractors, stats_path)
@@ -1,9 +1,28 @@
 import requests
 from bs4 import BeautifulSoup
 import time
+import argparse
+import atexit
+import builtins
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 import pandas as pd
 import re
 from urllib.parse import urljoin, parse_qs, urlparse
+from single_flight import SingleFlight
+from filter_rules import rancidity_thresholds
+from request_latency import install as install_latency_probes, measure, print_latency_report
+from adaptive_requests import adaptive_timeout, hedged_call, iter_with_deadline, print_hedge_stats, request_with_deadline
+from page_archive import attach_from_env
+from change_feed import record_run, write_csv_if_changed
+from rate_limiter import RateLimiter
+
+# 디버그 샘플 출력은 DEBUG 레벨에서만 (비활성 시 디코딩/슬라이싱 비용 없음)
+logger = logging.getLogger(__name__)
 
 # 세션 생성 (쿠키 및 상태 유지)
 session = requests.Session()
@@ -50,6 +69,16 @@ BASE_URL = "https://www.foodsafetykorea.go.kr"
 AJAX_SEARCH_URL = f"{BASE_URL}/portal/healthyfoodlife/searchHomeHFProc.do"
 DETAIL_URL = f"{BASE_URL}/portal/healthyfoodlife/searchHomeHFDetail.do"
 
+def warm_up_session():
+    """메인 페이지와 검색 페이지를 방문해 세션 쿠키 설정 (브라우저 동작 시뮬레이션)"""
+    with measure("portal_page") as timing:
+        timing.response = session.get(BASE_URL, headers=get_headers(), timeout=30)
+    time.sleep(0.5)
+    search_page_url = f"{BASE_URL}/portal/healthyfoodlife/searchHomeHF.do"
+    with measure("portal_page") as timing:
+        timing.response = session.get(search_page_url, headers=get_headers(), timeout=30)
+    time.sleep(1)
+
 def search_omega3_products(page_no=1, search_term="셀로닉스", show_cnt=10):
     """오메가3 건강기능식품 검색"""
     # 페이지 인덱스 계산 (1부터 시작)
@@ -74,14 +103,13 @@ def search_omega3_products(page_no=1, search_term="셀로닉스", show_cnt=10):
         
         # 1단계: 메인 페이지 방문 (쿠키 및 세션 설정)
         if page_no == 1:  # 첫 페이지에서만 초기화
-            session.get(BASE_URL, headers=get_headers(), timeout=30)
-            time.sleep(0.5)
-            search_page_url = f"{BASE_URL}/portal/healthyfoodlife/searchHomeHF.do"
-            session.get(search_page_url, headers=get_headers(), timeout=30)
-            time.sleep(1)
+            warm_up_session()
         
         # AJAX 검색 요청
-        response = session.post(AJAX_SEARCH_URL, data=list_params, headers=get_ajax_headers(), timeout=30)
+        with measure("search_ajax") as timing:
+            response = request_with_deadline(session, "POST", AJAX_SEARCH_URL, "search_ajax", 30,
+                                             data=list_params, headers=get_ajax_headers())
+            timing.response = response
         response.encoding = "utf-8"
         
         print(f"[페이지 {page_no}] 응답 상태 코드: {response.status_code}")
@@ -100,14 +128,92 @@ def search_omega3_products(page_no=1, search_term="셀로닉스", show_cnt=10):
             return None
             
     except requests.exceptions.Timeout:
-        print(f"[페이지 {page_no}] 요청 시간 초과 (30초)")
+        print(f"[페이지 {page_no}] 요청 시간 초과 ({adaptive_timeout('search_ajax', 30):.0f}초)")
         return None
     except Exception as e:
         print(f"[페이지 {page_no}] 예상치 못한 오류: {e}")
         return None
 
-def get_product_detail_rancidity(prdlst_report_no, search_term="셀로닉스",show_cnt=10,start_idx=1):
-    """개별 제품의 상세 정보에서 산패도 정보 조회"""
+# 기준 및 규격 마커 (원본 bytes에서 바로 찾도록 UTF-8로 미리 인코딩)
+STANDARD_MARKER = "기준 및 규격".encode("utf-8")
+
+# 상세 페이지를 스트리밍으로 받다가 기준 및 규격 행이 끝나면 수신 중단
+STREAM_DETAIL_PAGES = True
+DETAIL_CHUNK_SIZE = 8192
+
+# 상세 페이지 요청이 p95 안에 끝나지 않으면 헤지 요청 (adaptive_requests.HEDGE_MAX_RATIO 이내)
+HEDGE_DETAIL_PAGES = True
+
+# 같은 제품의 상세 페이지 요청/파싱을 하나로 합침 (신고번호 -> 파싱 Future)
+detail_flight = SingleFlight()
+
+# 상세 페이지 수신 통계 (전송 바이트/소요 시간)
+detail_fetch_stats = {"요청": 0, "조기종료": 0, "전송바이트": 0, "소요시간": 0.0}
+_detail_fetch_stats_lock = threading.Lock()
+
+def _standard_row_end(buffer, search_from=0):
+    """
+    buffer에서 <th>기준 및 규격</th> 행의 닫는 </tr> 끝 위치 반환 (아직 없으면 -1)
+    
+    태그는 소문자로만 비교하므로 buffer는 .lower()한 본문을 넘긴다 (한글 마커는 그대로).
+    마커가 th가 아닌 곳(탭 이름 등)에 있거나 행 안에 중첩 테이블이 있으면 건너뛴다.
+    """
+    marker_pos = buffer.find(STANDARD_MARKER, search_from)
+    while marker_pos >= 0:
+        row_start = buffer.rfind(b"<tr", 0, marker_pos)
+        if row_start >= 0 and buffer.rfind(b"<th", row_start, marker_pos) >= 0:
+            row_end = buffer.find(b"</tr>", marker_pos)
+            if row_end < 0:
+                return -1
+            if buffer.find(b"<table", marker_pos, row_end) < 0:
+                return row_end + len(b"</tr>")
+        marker_pos = buffer.find(STANDARD_MARKER, marker_pos + len(STANDARD_MARKER))
+    return -1
+
+def _read_until_standard_row(response, timeout, started):
+    """
+    응답 본문을 조금씩 읽다가 기준 및 규격 행이 끝나면 중단 (started부터 timeout초 안에 못 받으면 DeadlineExceeded)
+    
+    Returns:
+        tuple: (읽은 bytes, 조기 종료 여부)
+    """
+    buffer = bytearray()
+    # 태그 대소문자 구분 없이 찾도록 소문자 사본을 함께 유지 (ASCII만 바뀌므로 위치가 같음)
+    lowered = bytearray()
+    search_from = 0
+    for chunk in iter_with_deadline(response, timeout, started, DETAIL_CHUNK_SIZE):
+        buffer += chunk
+        lowered += chunk.lower()
+        if _standard_row_end(lowered, search_from) >= 0:
+            return bytes(buffer), True
+        # 아직 마커가 없으면 다음에는 청크 경계(마커 길이만큼 겹침)부터 검색
+        if lowered.find(STANDARD_MARKER, search_from) < 0:
+            search_from = max(0, len(lowered) - len(STANDARD_MARKER) + 1)
+    return bytes(buffer), False
+
+def print_detail_fetch_stats():
+    """상세 페이지 수신 통계 출력"""
+    with _detail_fetch_stats_lock:
+        stats = dict(detail_fetch_stats)
+    if not stats["요청"]:
+        return
+    print(f"📦 상세 페이지 {stats['요청']}건: 총 {stats['전송바이트']:,} 바이트 수신 "
+          f"(평균 {stats['전송바이트'] // stats['요청']:,} 바이트, {stats['소요시간'] / stats['요청']:.2f}초), "
+          f"조기 종료 {stats['조기종료']}건")
+    flight = detail_flight.stats()
+    if flight["절약"]:
+        print(f"🔁 중복 상세 요청 {flight['절약']}건 절약 (요청 {flight['요청']}건 중 실제 요청 {flight['실행']}건)")
+
+def fetch_product_detail_page(prdlst_report_no, search_term="셀로닉스", show_cnt=10, start_idx=1, stream=None):
+    """
+    개별 제품의 상세 페이지 원본(bytes) 조회 (네트워크 I/O만 담당)
+    
+    stream=True(기본값: STREAM_DETAIL_PAGES)이면 본문을 스트리밍으로 읽다가 기준 및 규격
+    행이 끝나는 즉시 연결을 닫으므로 반환되는 bytes는 페이지 앞부분만 담고 있다.
+    """
+    if stream is None:
+        stream = STREAM_DETAIL_PAGES
+    
     detail_params = {
         "menu_no": "2672",
         "menu_grp": "MENU_NEW01", 
@@ -125,41 +231,115 @@ def get_product_detail_rancidity(prdlst_report_no, search_term="셀로닉스",sh
         "prdlst_report_no": prdlst_report_no
     }
     
-
+    def download():
+        # 헤지 요청 시 두 번 실행될 수 있으며 각각 실제 요청으로 집계된다
+        # 적응형 타임아웃은 연결부터 본문 수신까지 전체에 적용
+        timeout = adaptive_timeout("detail_page", 30)
+        started = time.monotonic()
+        with measure("detail_page") as timing:
+            response = session.get(DETAIL_URL, params=detail_params, headers=get_headers(),
+                                   timeout=timeout, stream=True)
+            timing.response = response
+            
+            stopped_early = False
+            try:
+                if stream:
+                    html_bytes, stopped_early = _read_until_standard_row(response, timeout, started)
+                else:
+                    html_bytes = b"".join(iter_with_deadline(response, timeout, started))
+                # 압축 해제 전 실제 수신 바이트 (urllib3 기준), 알 수 없으면 본문 길이
+                wire_bytes = response.raw.tell() if hasattr(response.raw, "tell") else len(html_bytes)
+                timing.bytes = wire_bytes
+            finally:
+                response.close()
+        elapsed = time.monotonic() - started
+        
+        with _detail_fetch_stats_lock:
+            detail_fetch_stats["요청"] += 1
+            detail_fetch_stats["조기종료"] += stopped_early
+            detail_fetch_stats["전송바이트"] += wire_bytes
+            detail_fetch_stats["소요시간"] += elapsed
+        return response.status_code, html_bytes, stopped_early, wire_bytes, elapsed
+    
     try:
         print(f"    상세 페이지 요청: {prdlst_report_no}")
         
-        # 상세 페이지 요청
-        response = session.get(DETAIL_URL, params=detail_params, headers=get_headers(), timeout=30)
-        response.encoding = "utf-8"
+        # 상세 페이지 요청 (p95 안에 응답이 없으면 한 번 더 보내서 먼저 온 응답 사용)
+        status_code, html_bytes, stopped_early, wire_bytes, elapsed = hedged_call(
+            "detail_page", download, enabled=HEDGE_DETAIL_PAGES)
         
-        print(f"    응답 상태: {response.status_code}")
-        print(f"    응답 길이: {len(response.text)} 문자")
+        print(f"    응답 상태: {status_code}")
+        print(f"    수신: {wire_bytes:,} 바이트, {elapsed:.2f}초" + (" (기준 및 규격 이후 수신 중단)" if stopped_early else ""))
+        
+        return html_bytes
+        
+    except Exception as e:
+        print(f"    ❌ 상세 페이지 요청 실패 ({prdlst_report_no}): {e}")
+        return None
+
+def _find_standard_cell(soup):
+    """<th>기준 및 규격</th> 와 같은 행의 td 찾기"""
+    for th in soup.find_all("th"):
+        th_text = th.get_text(strip=True)
+        if "기준" in th_text and "규격" in th_text:
+            logger.debug("    ✅ '기준 및 규격' th 태그 발견: %s", th_text)
+            # 같은 행의 td 찾기
+            tr = th.find_parent("tr")
+            if tr:
+                standard_cell = tr.find("td")
+                if standard_cell:
+                    logger.debug("    ✅ 기준 및 규격 td 태그 발견")
+                    return standard_cell
+    return None
+
+def _find_standard_row_cell(html_bytes):
+    """
+    원본 bytes에서 '기준 및 규격' 행(<tr>...</tr>)만 잘라 디코딩/파싱
+    
+    중첩 테이블이 있거나 행 경계를 찾지 못하면 None (전체 파싱으로 대체)
+    """
+    # 태그는 대소문자 구분 없이 찾고 자르는 것은 원본에서
+    lowered = html_bytes.lower()
+    marker_pos = lowered.find(STANDARD_MARKER)
+    while marker_pos >= 0:
+        row_start = lowered.rfind(b"<tr", 0, marker_pos)
+        row_end = lowered.find(b"</tr>", marker_pos)
+        if row_start >= 0 and row_end >= 0 and lowered.find(b"<table", marker_pos, row_end) < 0:
+            fragment = html_bytes[row_start:row_end + len(b"</tr>")].decode("utf-8", errors="replace")
+            standard_cell = _find_standard_cell(BeautifulSoup(fragment, "html.parser"))
+            if standard_cell:
+                return standard_cell
+        marker_pos = lowered.find(STANDARD_MARKER, marker_pos + len(STANDARD_MARKER))
+    return None
+
+def parse_product_detail_page(html_bytes):
+    """
+    상세 페이지 원본에서 기준 및 규격 텍스트와 산패도 정보 추출
+    
+    네트워크에 접근하지 않는 순수 CPU 작업이므로 프로세스 풀 워커에서 실행할 수 있다.
+    마커 확인은 bytes 그대로 하고, 기준 및 규격 행만 디코딩한다.
+    
+    Returns:
+        tuple: (기준 및 규격 텍스트, 산패도 정보) - 찾지 못한 항목은 None
+    """
+    try:
+        logger.debug("    응답 길이: %d 바이트", len(html_bytes))
         
         # 응답 내용 확인 (디버깅용)
-        if "기준 및 규격" not in response.text:
+        if STANDARD_MARKER not in html_bytes:
             print(f"    ❌ '기준 및 규격' 텍스트를 찾을 수 없음")
             # 응답 내용의 일부를 출력해서 확인
-            print(f"    응답 샘플: {response.text[:500]}...")
-            return None
-        
-        soup = BeautifulSoup(response.text, "html.parser")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("    응답 샘플: %s...", html_bytes[:1500].decode("utf-8", errors="replace")[:500])
+            return None, None
         
-        # 방법 1: 정확한 HTML 구조로 찾기
-        standard_cell = None
+        # 방법 1: 기준 및 규격 행만 잘라서 파싱
+        standard_cell = _find_standard_row_cell(html_bytes)
         
-        # <th>기준 및 규격</th> 찾기
-        for th in soup.find_all("th"):
-            th_text = th.get_text(strip=True)
-            if "기준" in th_text and "규격" in th_text:
-                print(f"    ✅ '기준 및 규격' th 태그 발견: {th_text}")
-                # 같은 행의 td 찾기
-                tr = th.find_parent("tr")
-                if tr:
-                    standard_cell = tr.find("td")
-                    if standard_cell:
-                        print(f"    ✅ 기준 및 규격 td 태그 발견")
-                        break
+        if not standard_cell:
+            # 행 단위로 찾지 못한 경우에만 전체 페이지 디코딩
+            soup = BeautifulSoup(html_bytes.decode("utf-8", errors="replace"), "html.parser")
+            standard_cell = _find_standard_cell(soup)
         
         if not standard_cell:
             print(f"    ❌ 기준 및 규격 셀을 찾을 수 없음")
@@ -176,12 +356,13 @@ def get_product_detail_rancidity(prdlst_report_no, search_term="셀로닉스",sh
         
         if not standard_cell:
             print(f"    ❌ 산패도 정보를 찾을 수 없음")
-            return None
+            return None, None
             
         # 기준 및 규격 텍스트 추출
         standard_text = standard_cell.get_text()
-        print(f"    📄 기준 및 규격 텍스트 길이: {len(standard_text)} 문자")
-        print(f"    📄 텍스트 샘플: {standard_text[:200]}...")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("    📄 기준 및 규격 텍스트 길이: %d 문자", len(standard_text))
+            logger.debug("    📄 텍스트 샘플: %s...", standard_text[:200])
         
         # 산패도 관련 정보 추출
         rancidity_info = extract_rancidity_info(standard_text)
@@ -191,18 +372,77 @@ def get_product_detail_rancidity(prdlst_report_no, search_term="셀로닉스",sh
         else:
             print(f"    ❌ 산패도 정보 추출 실패")
         
-        return rancidity_info
+        return standard_text, rancidity_info
             
     except Exception as e:
-        print(f"    ❌ 상세 정보 조회 실패 ({prdlst_report_no}): {e}")
+        print(f"    ❌ 상세 페이지 파싱 실패: {e}")
         import traceback
         traceback.print_exc()
-        return None
+        return None, None
 
-            
-    except Exception as e:
-        print(f"    상세 정보 조회 실패 ({prdlst_report_no}): {e}")
+def normalize_report_no(prdlst_report_no):
+    """신고번호 정규화 (공백/하이픈 제거) - 중복 요청 판별 키"""
+    return re.sub(r"[\s-]", "", str(prdlst_report_no))
+
+def submit_product_detail(prdlst_report_no, search_term="셀로닉스", show_cnt=10, start_idx=1, before_fetch=None):
+    """
+    상세 페이지를 받아 파서 프로세스 풀에 넘기고 파싱 Future 반환 (받지 못하면 None)
+    
+    같은 신고번호가 이미 요청 중이거나 처리된 적이 있으면 새로 요청하지 않고
+    그 Future(파싱 결과)를 함께 쓴다. 파싱 Future가 예외로 끝나면 다음 호출에서 다시 요청한다.
+    before_fetch는 실제 요청 직전에만 호출된다.
+    """
+    def fetch_and_submit():
+        if before_fetch is not None:
+            before_fetch()
+        html_bytes = fetch_product_detail_page(prdlst_report_no, search_term, show_cnt, start_idx)
+        if html_bytes is None:
+            return None
+        return get_parser_pool().submit(parse_product_detail_page, html_bytes)
+    
+    return detail_flight.do(normalize_report_no(prdlst_report_no), fetch_and_submit)
+
+def get_product_detail_rancidity(prdlst_report_no, search_term="셀로닉스",show_cnt=10,start_idx=1):
+    """개별 제품의 상세 정보에서 산패도 정보 조회"""
+    future = submit_product_detail(prdlst_report_no, search_term, show_cnt, start_idx)
+    if future is None:
         return None
+    
+    _, rancidity_info = future.result()
+    return rancidity_info
+
+# 상세 페이지 파서 프로세스 풀 (최초 사용 시 생성, 여러 상세 워커 스레드가 동시에 부를 수 있으므로 잠금)
+_parser_pool = None
+_parser_pool_lock = threading.Lock()
+
+# 워커 프로세스는 fork 대신 새 인터프리터로 시작 (출력 중인 스레드의 잠금을 물려받지 않도록)
+PARSER_POOL_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+# False이면 파싱을 프로세스 풀 대신 호출한 스레드에서 바로 실행 (프로파일링용)
+USE_PARSER_POOL = True
+
+class _InlineExecutor:
+    """submit() 즉시 현재 스레드에서 실행하고 완료된 Future를 돌려주는 실행기"""
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+def get_parser_pool(max_workers=None):
+    """상세 페이지 파싱용 프로세스 풀 반환 (기본 워커 수: CPU 코어 수)"""
+    global _parser_pool
+    if not USE_PARSER_POOL:
+        return _InlineExecutor()
+    with _parser_pool_lock:
+        if _parser_pool is None:
+            _parser_pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context(PARSER_POOL_START_METHOD))
+            atexit.register(_parser_pool.shutdown)
+        return _parser_pool
 
 def extract_rancidity_info(standard_text):
     """기준 및 규격 텍스트에서 산패도 정보 추출"""
@@ -280,17 +520,13 @@ def extract_rancidity_info(standard_text):
         return None
 
 
+# 산패도 기준값 (filter_rules.json의 max 규칙)
+RANCIDITY_STANDARDS = rancidity_thresholds()
+
 def check_rancidity_standards(rancidity_info):
-    """산패도 기준 통과 여부 확인"""
-    standards = {
-        "산가": 3.0,
-        "과산화물가": 5.0,
-        "아니시딘가": 20.0,
-        "총산화가": 26.0
-    }
-    
+    """산패도 기준 통과 여부 확인 (기준값은 filter_rules.json)"""
     results = {}
-    for key, standard in standards.items():
+    for key, standard in RANCIDITY_STANDARDS.items():
         if rancidity_info.get(key) is not None:
             value = rancidity_info[key]
             results[f"{key}_통과"] = value <= standard
@@ -303,6 +539,18 @@ def check_rancidity_standards(rancidity_info):
     
     return results
 
+def build_product_info(item):
+    """검색 결과 항목 하나를 기본 제품 정보 딕셔너리로 변환"""
+    return {
+        "번호": item.get("no", ""),
+        "제품명": item.get("prdlst_nm", ""),
+        "업소명": item.get("bssh_nm", ""),
+        "신고번호": item.get("prdlst_report_no", ""),
+        "등록일": item.get("prms_dt", ""),
+        "prdlstReportNo": item.get("prdlst_report_no", ""),
+        "총_개수": item.get("total_count", "")
+    }
+
 def extract_product_info(response_data, include_rancidity=False, search_term="셀로닉스", show_cnt=10, start_idx=1):
     """검색 결과에서 제품 정보 추출 (산패도 정보 포함)"""
     products = []
@@ -313,40 +561,32 @@ def extract_product_info(response_data, include_rancidity=False, search_term="
     
     print(f"JSON 리스트 응답 처리 중... ({len(response_data)}개)")
     
+    # 파서 프로세스 풀에 넘긴 상세 페이지: (제품 정보, 파싱 Future)
+    pending_parses = []
+    
     for i, item in enumerate(response_data, 1):
         try:
             # 기본 제품 정보
-            product_info = {
-                "번호": item.get("no", ""),
-                "제품명": item.get("prdlst_nm", ""),
-                "업소명": item.get("bssh_nm", ""),
-                "신고번호": item.get("prdlst_report_no", ""),
-                "등록일": item.get("prms_dt", ""),
-                "prdlstReportNo": item.get("prdlst_report_no", ""),
-                "총_개수": item.get("total_count", "")
-            }
+            product_info = build_product_info(item)
             
             # 산패도 정보 추출
             if include_rancidity and product_info["prdlstReportNo"]:
                 print(f"  ({i}/{len(response_data)}) {product_info['제품명']} 상세 정보 수집 중...")
                 
-                # search_term 제거하고 호출
-                rancidity_info = get_product_detail_rancidity(product_info["prdlstReportNo"], search_term, show_cnt, start_idx)
+                # 원본만 받아서 파싱은 프로세스 풀에 맡기고 바로 다음 제품으로 진행
+                # (이미 요청한 신고번호면 요청 없이 기존 결과 공유)
+                fetched = []
+                future = submit_product_detail(product_info["prdlstReportNo"], search_term, show_cnt, start_idx,
+                                               before_fetch=lambda: fetched.append(True))
                 
-                if rancidity_info:
-                    # 산패도 정보 추가
-                    product_info.update(rancidity_info)
-                    
-                    # 기준 통과 여부 확인
-                    standards_check = check_rancidity_standards(rancidity_info)
-                    product_info.update(standards_check)
-                    
-                    print(f"    → ✅ 산패도 정보 발견!")
+                if future is not None:
+                    pending_parses.append((product_info, future))
                 else:
                     print(f"    → ❌ 산패도 정보 없음")
                 
-                # 서버 부하 방지 (매우 중요!)
-                time.sleep(2)
+                # 서버 부하 방지 (매우 중요!) - 실제로 요청한 경우에만
+                if fetched:
+                    time.sleep(2)
             
             products.append(product_info)
             
@@ -355,17 +595,55 @@ def extract_product_info(response_data, include_rancidity=False, search_term="
             import traceback
             traceback.print_exc()
             continue
+    
+    # 파싱 결과 병합
+    for product_info, future in pending_parses:
+        try:
+            _, rancidity_info = future.result()
+        except Exception as e:
+            print(f"  상세 페이지 파싱 오류 ({product_info['prdlstReportNo']}): {e}")
+            rancidity_info = None
+        
+        if rancidity_info:
+            # 산패도 정보 추가
+            product_info.update(rancidity_info)
+            
+            # 기준 통과 여부 확인
+            standards_check = check_rancidity_standards(rancidity_info)
+            product_info.update(standards_check)
+            
+            print(f"  → ✅ {product_info['제품명']}: 산패도 정보 발견!")
+        else:
+            print(f"  → ❌ {product_info['제품명']}: 산패도 정보 없음")
 
     print(f"추출된 제품 수: {len(products)}")
     return products
 
-def collect_all_omega3_products(search_term="셀로닉스", show_cnt=10):
-    """모든 오메가3 제품 수집 (산패도 정보 포함)"""
+# 검색 페이지 미리 받기: 처리 중인 페이지 뒤로 최대 SEARCH_LOOKAHEAD 페이지까지 먼저 요청
+SEARCH_LOOKAHEAD = 2
+# 검색 요청 최소 간격(초) - 페이지 간 고정 3초 대기 대신 검색 요청끼리만 간격 유지
+SEARCH_INTERVAL = 3.0
+
+def collect_all_omega3_products(search_term="셀로닉스", show_cnt=10, lookahead=None):
+    """
+    모든 오메가3 제품 수집 (산패도 정보 포함)
+    
+    다음 검색 페이지들은 백그라운드 스레드가 SEARCH_INTERVAL 간격으로 미리 받아 두고,
+    현재 페이지의 상세 페이지 수집과 겹쳐서 진행한다. lookahead=0이면 미리 받지 않는다.
+    """
+    if lookahead is None:
+        lookahead = SEARCH_LOOKAHEAD
     print(f"'{search_term}' 검색어로 모든 제품 수집을 시작합니다...")
     print("=" * 80)
     
+    search_limiter = RateLimiter(SEARCH_INTERVAL)
+    
+    def fetch_page(page):
+        search_limiter.wait()
+        return search_omega3_products(page, search_term, show_cnt)
+    
     # 첫 번째 페이지로 전체 개수 확인
-    first_page_data = search_omega3_products(1, search_term, show_cnt)
+    first_page_data = fetch_page(1)
     if not first_page_data or len(first_page_data) == 0:
         print("검색 결과가 없습니다.")
         return []
@@ -375,47 +653,75 @@ def collect_all_omega3_products(search_term="셀로닉스", show_cnt=10):
     
     # 필요한 페이지 수 계산
     total_pages = (total_count + show_cnt - 1) // show_cnt
-    print(f"{show_cnt}개씩 {total_pages}페이지에 걸쳐 수집합니다.")
+    print(f"{show_cnt}개씩 {total_pages}페이지에 걸쳐 수집합니다. (검색 페이지 {lookahead}개 미리 받기)")
     print("=" * 80)
     
     all_products = []
+    # 요청해 둔 검색 페이지: 페이지 번호 -> Future
+    prefetched = {}
+    next_page = 2
     
-    for page in range(1, total_pages + 1):
-        print(f"\n🔍 [{page}/{total_pages}] 페이지 처리 중...")
-        
-        if page == 1:
-            # 첫 페이지는 이미 가져왔음
-            response_data = first_page_data
-        else:
-            response_data = search_omega3_products(page, search_term, show_cnt)
-            if not response_data:
-                print(f"❌ {page} 페이지 요청 실패")
-                break
-        
-        # 제품 정보 추출 (산패도 정보 포함)
-        products = extract_product_info(response_data, include_rancidity=True, search_term=search_term)
-        if not products:
-            print(f"❌ {page} 페이지에서 제품 정보 추출 실패")
-            break
-        
-        all_products.extend(products)
-        print(f"✅ {page} 페이지에서 {len(products)}개 제품 처리 완료 (누적: {len(all_products)}개)")
-        
-        # 페이지 간 서버 부하 방지 (중요!)
-        if page < total_pages:
-            print("⏱️ 다음 페이지 처리를 위해 3초 대기...")
-            time.sleep(3)
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="search-prefetch") as prefetcher:
+        try:
+            for page in range(1, total_pages + 1):
+                # 현재 페이지부터 lookahead 페이지 뒤까지 요청해 둠
+                while next_page <= min(total_pages, page + lookahead):
+                    prefetched[next_page] = prefetcher.submit(fetch_page, next_page)
+                    next_page += 1
+                
+                print(f"\n🔍 [{page}/{total_pages}] 페이지 처리 중...")
+                
+                if page == 1:
+                    # 첫 페이지는 이미 가져왔음
+                    response_data = first_page_data
+                else:
+                    response_data = prefetched.pop(page).result()
+                    if not response_data:
+                        print(f"❌ {page} 페이지 요청 실패")
+                        break
+                
+                # 제품 정보 추출 (산패도 정보 포함) - 그동안 다음 검색 페이지를 받아 둠
+                products = extract_product_info(response_data, include_rancidity=True, search_term=search_term)
+                if not products:
+                    print(f"❌ {page} 페이지에서 제품 정보 추출 실패")
+                    break
+                
+                all_products.extend(products)
+                print(f"✅ {page} 페이지에서 {len(products)}개 제품 처리 완료 (누적: {len(all_products)}개)")
+        finally:
+            # 중단한 경우 아직 시작하지 않은 검색 요청 취소
+            for future in prefetched.values():
+                future.cancel()
     
+    print(f"⏱️ 검색 요청 간격 대기: {search_limiter.wait_time:.1f}초")
     print("\n" + "=" * 80)
     print(f"🎉 총 {len(all_products)}개 제품 수집 완료!")
     return all_products
 
-def save_results(results, filename="omega3_rancidity_complete.csv"):
-    """결과를 CSV 파일로 저장"""
+# 실행마다 바뀌는 값이라 변경 비교에서 제외하는 컬럼
+CHANGE_FEED_IGNORED_COLUMNS = ("번호", "총_개수")
+
+def _save_csv(df, filename, description):
+    """내용이 바뀐 경우에만 CSV 저장"""
+    if write_csv_if_changed(df, filename):
+        print(f"📄 {description} {filename} 파일로 저장되었습니다.")
+    else:
+        print(f"📄 {filename}: 이전 실행과 같아 다시 쓰지 않음")
+
+def save_results(results, filename="omega3_rancidity_complete.csv", output_prefix="", record_changes=True):
+    """
+    결과를 CSV 파일로 저장하고 이전 실행 대비 변경 피드 기록
+    
+    내용이 같은 CSV는 다시 쓰지 않는다. 신고번호별 행 해시를 {filename}.snapshot.json과
+    비교해 추가/삭제/수정(바뀐 컬럼, 기준 통과↔탈락 전환) 제품을 {filename}.changes.jsonl에 추가한다.
+    output_prefix는 저장하는 모든 파일 이름 앞에 붙고, record_changes=False이면 변경 피드를 기록하지 않는다.
+    """
+    filename = output_prefix + filename
     if results:
         df = pd.DataFrame(results)
-        df.to_csv(filename, index=False, encoding="utf-8-sig")
-        print(f"\n📄 결과가 {filename} 파일로 저장되었습니다.")
+        print()
+        _save_csv(df, filename, "결과가")
+        passed_index = df.index[:0]
         
         # 산패도 정보가 있는 제품 개수 출력
         rancidity_columns = ['산가', '과산화물가', '아니시딘가', '총산화가']
@@ -424,9 +730,8 @@ def save_results(results, filename="omega3_rancidity_complete.csv"):
         
         if len(rancidity_products) > 0:
             # 산패도 정보가 있는 제품들만 별도 저장
-            rancidity_filename = "omega3_with_rancidity_complete.csv"
-            rancidity_products.to_csv(rancidity_filename, index=False, encoding="utf-8-sig")
-            print(f"📄 산패도 정보가 있는 제품이 {rancidity_filename}로 저장되었습니다.")
+            rancidity_filename = output_prefix + "omega3_with_rancidity_complete.csv"
+            _save_csv(rancidity_products, rancidity_filename, "산패도 정보가 있는 제품이")
             
             # 산패도 기준을 모두 통과한 제품 필터링
             rancidity_pass_cols = ['산가_통과', '과산화물가_통과', '아니시딘가_통과', '총산화가_통과']
@@ -434,12 +739,21 @@ def save_results(results, filename="omega3_rancidity_complete.csv"):
             
             if not passed_products.empty:
                 print(f"✅ 산패도 기준을 모두 통과한 제품: {len(passed_products)}개")
-                passed_filename = "omega3_passed_standards_complete.csv"
-                passed_products.to_csv(passed_filename, index=False, encoding="utf-8-sig")
-                print(f"📄 기준 통과 제품이 {passed_filename}로 저장되었습니다.")
+                passed_filename = output_prefix + "omega3_passed_standards_complete.csv"
+                _save_csv(passed_products, passed_filename, "기준 통과 제품이")
+                passed_index = passed_products.index
             else:
                 print("⚠️ 산패도 기준을 모두 통과한 제품이 없습니다.")
         
+        # 이전 실행 대비 변경 피드
+        if record_changes:
+            base = os.path.splitext(filename)[0]
+            record_run(df, f"{base}.snapshot.json", f"{base}.changes.jsonl",
+                       key_func=lambda row: normalize_report_no(row.get("신고번호") or ""),
+                       ignore_columns=CHANGE_FEED_IGNORED_COLUMNS,
+                       passed=df.index.isin(passed_index),
+                       label_column="제품명")
+        
         return df
     else:
         print("❌ 저장할 데이터가 없습니다.")
@@ -463,9 +777,54 @@ def main():
     # 결과 저장
     print("\n💾 2단계: 결과 저장")
     df = save_results(all_products)
+    print_detail_fetch_stats()
+    print_latency_report()
+    print_hedge_stats()
     
     print("\n🎉 모든 작업이 완료되었습니다!")
     print("=" * 80)
 
+# --profile 시 측정할 단계 -> 함수 이름
+PROFILE_STAGES = {
+    "search": "search_omega3_products",
+    "detail_fetch": "fetch_product_detail_page",
+    "parse": "parse_product_detail_page",
+    "extract": "extract_rancidity_info",
+    "filter": "check_rancidity_standards",
+    "save": "save_results",
+    "print": "print",
+}
+
+def run_with_profile(mode, output_dir="profile_output", interval=0.005):
+    """단계별 프로파일러를 붙여 main() 실행"""
+    global USE_PARSER_POOL, print
+    from stage_profiler import StageProfiler
+    
+    # 파싱/추출 CPU 시간이 이 프로세스에서 측정되도록 프로세스 풀 대신 바로 실행
+    USE_PARSER_POOL = False
+    # 모듈 전역 print를 두어 출력 I/O도 단계로 측정 (프로파일 종료 시 제거)
+    print = builtins.print
+    profiler = StageProfiler(mode, output_dir=output_dir, interval=interval)
+    profiler.instrument(sys.modules[__name__], PROFILE_STAGES)
+    try:
+        profiler.profile(main)
+    finally:
+        del print
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="오메가3 건강기능식품 산패도 수집")
+    parser.add_argument("--profile", nargs="?", const="sample", choices=["sample", "cprofile"],
+                        help="단계별 프로파일링 (sample: 샘플링, cprofile: 결정적)")
+    parser.add_argument("--profile-dir", default="profile_output", help="프로파일 결과 폴더")
+    parser.add_argument("--profile-interval", type=float, default=0.005, help="샘플링 간격(초)")
+    args = parser.parse_args()
+    
+    # CRAWL_LOG_LEVEL=DEBUG 로 실행하면 응답/텍스트 샘플 출력
+    logging.basicConfig(level=os.environ.get("CRAWL_LOG_LEVEL", "INFO"), format="%(message)s")
+    # CRAWL_ARCHIVE_DIR=폴더 로 원본 응답 기록, CRAWL_ARCHIVE_MODE=replay 로 오프라인 재생
+    attach_from_env(session)
+    install_latency_probes()
+    if args.profile:
+        run_with_profile(args.profile, args.profile_dir, args.profile_interval)
+    else:
+        main()
\ No newline at end of file
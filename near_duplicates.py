@@ -0,0 +1,205 @@
+import argparse
+import re
+import zlib
+
+import numpy as np
+import pandas as pd
+
+# 비교에 쓰는 필드 (OpenAPI 원본 이름, 한글 컬럼명, 포털 컬럼명 순으로 찾음)
+DEFAULT_FIELDS = (
+    ("PRDLST_NM", "품목명", "제품명"),
+    ("INDIV_RAWMTRL_NM", "기능성원재료"),
+    ("STDR_STND", "기준규격"),
+)
+
+# (a * h + b) mod P 해시 계열 (P = 2^31 - 1, a, b, h < P 이므로 uint64에서 넘치지 않음)
+_PRIME = np.uint64((1 << 31) - 1)
+_EMPTY = np.uint64((1 << 64) - 1)
+
+
+def _normalize(text):
+    """소문자화하고 공백/문장부호 제거 ("오메가-3 플러스" == "오메가3플러스")"""
+    return re.sub(r"[\W_]+", "", text.lower()) if isinstance(text, str) else ""
+
+
+def shingle_hashes(texts, k=3):
+    """
+    필드 텍스트들의 문자 k-gram 해시 집합 (필드 번호를 붙여 필드 간 충돌 방지)
+
+    Returns:
+        ndarray: 고유한 uint64 해시 배열
+    """
+    hashes = set()
+    for index, text in enumerate(texts):
+        text = _normalize(text)
+        if 0 < len(text) < k:
+            hashes.add(zlib.crc32(f"{index}:{text}".encode("utf-8")))
+        for start in range(len(text) - k + 1):
+            hashes.add(zlib.crc32(f"{index}:{text[start:start + k]}".encode("utf-8")))
+    return np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+
+
+class NearDuplicateIndex:
+    """
+    MinHash + LSH 밴딩으로 거의 같은 제품을 묶는 증분 색인
+
+    add()로 제품을 하나씩 넣으면 같은 밴드 버킷에 들어간 기존 제품 중 서명 유사도
+    (자카드 유사도 추정치)가 threshold 이상인 것과 union-find로 합친다. 제품당
+    비용은 서명 계산과 버킷 조회 몇 번이므로 전체가 제품 수에 선형이다.
+
+    Args:
+        threshold (float): 같은 묶음으로 볼 최소 자카드 유사도 추정치
+        num_perm (int): MinHash 해시 함수 수
+        bands (int): LSH 밴드 수 (num_perm의 약수, 후보 임계값 ≈ (1/bands)^(bands/num_perm))
+        k (int): 문자 k-gram 크기
+        seed (int): 해시 계수 시드 (같은 시드면 실행마다 같은 서명)
+    """
+
+    def __init__(self, threshold=0.8, num_perm=128, bands=16, k=3, seed=1):
+        if num_perm % bands:
+            raise ValueError(f"num_perm({num_perm})은 bands({bands})의 배수여야 함")
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, int(_PRIME), num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, int(_PRIME), num_perm, dtype=np.uint64)
+        self.threshold = threshold
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.k = k
+        self.signatures = []
+        self.parent = []
+        self.buckets = [{} for _ in range(bands)]
+        self.comparisons = 0
+
+    def signature(self, hashes):
+        """MinHash 서명 (해시 함수별 최솟값, 빈 집합이면 모두 최댓값)"""
+        if not len(hashes):
+            return np.full(len(self.a), _EMPTY, dtype=np.uint64)
+        return ((np.outer(self.a, hashes % _PRIME) + self.b[:, None]) % _PRIME).min(axis=1)
+
+    def find(self, item):
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def _union(self, left, right):
+        left, right = self.find(left), self.find(right)
+        if left != right:
+            # 먼저 들어온 항목을 대표로 유지
+            self.parent[max(left, right)] = min(left, right)
+
+    def add(self, texts):
+        """
+        제품 하나 추가
+
+        Args:
+            texts (iterable): 비교할 필드 텍스트들
+
+        Returns:
+            int: 현재 묶음 대표 번호 (이후 추가되는 제품이 묶음을 합치면 바뀔 수 있음)
+        """
+        item = len(self.parent)
+        self.parent.append(item)
+        hashes = shingle_hashes(texts, self.k)
+        signature = self.signature(hashes)
+        self.signatures.append(signature)
+        if not len(hashes):
+            return item
+
+        # 버킷마다 처음 들어온 항목만 보관하고 그것과만 비교 (묶음끼리는 union-find로 이어짐)
+        r = self.rows_per_band
+        checked = set()
+        for band in range(self.bands):
+            key = signature[band * r:(band + 1) * r].tobytes()
+            bucket = self.buckets[band]
+            other = bucket.get(key)
+            if other is None:
+                bucket[key] = item
+                continue
+            if other in checked:
+                continue
+            checked.add(other)
+            self.comparisons += 1
+            if np.count_nonzero(self.signatures[other] == signature) / len(signature) >= self.threshold:
+                self._union(item, other)
+        return self.find(item)
+
+    def cluster_ids(self):
+        """항목별 묶음 번호 (0부터, 처음 나타난 순서)"""
+        labels = {}
+        return [labels.setdefault(self.find(item), len(labels)) for item in range(len(self.parent))]
+
+
+def _resolve_fields(columns, fields):
+    resolved = []
+    for candidates in fields:
+        candidates = (candidates,) if isinstance(candidates, str) else candidates
+        resolved.append(next((column for column in candidates if column in columns), None))
+    return resolved
+
+
+def cluster_rows(rows, fields=DEFAULT_FIELDS, **index_options):
+    """
+    제품 행(dict) 리스트를 거의 같은 제품끼리 묶음
+
+    Args:
+        rows (list): 제품 행 리스트
+        fields (tuple): 비교할 필드 (필드명 또는 후보 필드명 튜플)
+        index_options: NearDuplicateIndex 옵션 (threshold, num_perm, bands, k)
+
+    Returns:
+        list: 행별 묶음 번호
+    """
+    index = NearDuplicateIndex(**index_options)
+    columns = set().union(*(row.keys() for row in rows)) if rows else set()
+    names = _resolve_fields(columns, fields)
+    for row in rows:
+        index.add([row.get(name, "") if name else "" for name in names])
+    return index.cluster_ids()
+
+
+def add_cluster_column(df, fields=DEFAULT_FIELDS, column="클러스터", **index_options):
+    """
+    DataFrame에 묶음 번호 컬럼 추가 (보고서에서 같은 배합 제품을 묶어 보여줄 때 사용)
+
+    산패도 값은 제품(신고번호)마다 따로 측정한 것이므로 묶음 대표의 값을 다른 제품에 복사하면 안 된다.
+    """
+    index = NearDuplicateIndex(**index_options)
+    names = _resolve_fields(df.columns, fields)
+    values = [df[name].fillna("").astype(str).tolist() if name else [""] * len(df) for name in names]
+    for texts in zip(*values):
+        index.add(texts)
+    df = df.copy()
+    df[column] = index.cluster_ids()
+    print(f"🧬 {len(df)}개 제품 → {df[column].nunique()}개 묶음 (LSH 후보 비교 {index.comparisons}회)")
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MinHash/LSH로 거의 같은 제품(같은 배합) 묶기")
+    parser.add_argument("csv", help="제품 CSV (OpenAPI 원본 또는 한글 컬럼)")
+    parser.add_argument("--output", help="묶음 번호를 추가해 저장할 CSV (기본값: 입력파일_clusters.csv)")
+    parser.add_argument("--threshold", type=float, default=0.8, help="자카드 유사도 임계값")
+    parser.add_argument("--num-perm", type=int, default=128)
+    parser.add_argument("--bands", type=int, default=16)
+    parser.add_argument("--top", type=int, default=10, help="출력할 큰 묶음 수")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv, dtype=str, encoding="utf-8-sig")
+    df = add_cluster_column(df, threshold=args.threshold, num_perm=args.num_perm, bands=args.bands)
+
+    name_column = _resolve_fields(df.columns, DEFAULT_FIELDS[:1])[0]
+    sizes = df["클러스터"].value_counts()
+    print(f"\n📦 제품이 2개 이상인 묶음 {int((sizes > 1).sum())}개 (중복 제품 {int(sizes[sizes > 1].sum() - (sizes > 1).sum())}개)")
+    for cluster, size in sizes[sizes > 1].head(args.top).items():
+        names = df.loc[df["클러스터"] == cluster, name_column].head(3).tolist() if name_column else []
+        print(f"- 묶음 {cluster}: {size}개 {names}")
+
+    output = args.output or args.csv.rsplit(".", 1)[0] + "_clusters.csv"
+    df.to_csv(output, index=False, encoding="utf-8-sig")
+    print(f"\n📄 묶음 번호가 추가된 결과가 {output} 파일로 저장되었습니다.")
+
+
+if __name__ == "__main__":
+    main()
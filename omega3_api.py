@@ -1,8 +1,94 @@
 import requests
 import json
+import math
 import pandas as pd
 import time
+import xml.etree.ElementTree as ET
+from itertools import chain
 from urllib.parse import quote
+from openpyxl import Workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from request_latency import install as install_latency_probes, measure, print_latency_report
+
+# 컬럼명 매핑 (영문 -> 한글)
+COLUMN_MAPPING = {
+    "LCNS_NO": "인허가번호",
+    "BSSH_NM": "업소명", 
+    "PRDLST_REPORT_NO": "품목제조번호",
+    "PRDLST_NM": "품목명",
+    "PRMS_DT": "허가일자",
+    "POG_DAYCNT": "소비기한일수",
+    "DISPOS": "제품형태",
+    "NTK_MTHD": "섭취방법",
+    "PRIMARY_FNCLTY": "주된기능성",
+    "IFTKN_ATNT_MATR_CN": "섭취시주의사항",
+    "CSTDY_MTHD": "보관방법",
+    "PRDLST_CDNM": "유형",
+    "STDR_STND": "기준규격",
+    "HIENG_LNTRT_DVS_NM": "고열량저영양여부",
+    "PRODUCTION": "생산종료여부",
+    "CHILD_CRTFC_YN": "어린이기호식품품질인증여부",
+    "PRDT_SHAP_CD_NM": "제품형태코드명",
+    "FRMLC_MTRQLT": "포장재질",
+    "RAWMTRL_NM": "품목유형",
+    "INDUTY_CD_NM": "업종",
+    "LAST_UPDT_DTM": "최종수정일자",
+    "INDIV_RAWMTRL_NM": "기능성원재료",
+    "ETC_RAWMTRL_NM": "기타원재료",
+    "CAP_RAWMTRL_NM": "캡슐원재료",
+    "FRMLC_MTHD": "포장방법"
+}
+
+# Excel 시트당 최대 행 수 (헤더 포함)
+EXCEL_MAX_ROWS = 1048576
+# Excel 셀당 최대 문자 수
+EXCEL_MAX_CELL_CHARS = 32767
+
+# XML 응답을 나눠 받을 때 한 번에 읽는 크기
+XML_CHUNK_SIZE = 64 * 1024
+# 데이터가 없다는 결과 코드 (오류가 아니라 빈 결과)
+API_NO_DATA_CODE = "INFO-200"
+
+def iter_api_rows_xml(chunks, info=None):
+    """
+    XML 응답을 받는 대로 파싱하여 row 레코드를 하나씩 반환 (제너레이터)
+    
+    <row>가 닫힐 때마다 {태그: 텍스트} 딕셔너리를 내보내고 요소를 비워서, 구간이 커도
+    메모리 사용량이 행 하나 크기로 유지된다. RESULT 코드가 INFO-000이 아니면
+    RuntimeError를 발생시킨다 (데이터 없음(INFO-200)은 빈 결과).
+    
+    Args:
+        chunks (iterable): 응답 본문 bytes 조각들
+        info (dict): 주면 받은 결과 코드("code")와 전체 개수("total_count", 정수)를 채움
+    
+    Yields:
+        dict: 제품 정보 (parse_api_response의 JSON row와 같은 형식)
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    parents = []
+    for chunk in chunks:
+        parser.feed(chunk)
+        for event, elem in parser.read_events():
+            if event == "start":
+                parents.append(elem)
+                continue
+            parents.pop()
+            if elem.tag == "row":
+                yield {child.tag: child.text or "" for child in elem}
+                elem.clear()
+                # 이미 처리한 row를 부모에서 떼어내 트리가 커지지 않게 함
+                if parents:
+                    parents[-1].remove(elem)
+            elif elem.tag == "total_count" and info is not None:
+                total = (elem.text or "").strip()
+                info["total_count"] = int(total) if total.isdigit() else None
+            elif elem.tag == "RESULT":
+                code = elem.findtext("CODE")
+                if info is not None:
+                    info["code"] = code
+                if code not in ("INFO-000", API_NO_DATA_CODE):
+                    raise RuntimeError(f"API 오류: {code} {elem.findtext('MSG')}")
+    parser.close()
 
 def get_omega3_products_from_api(api_key, service_id, product_name="오메가3", start_idx=1, end_idx=10, data_type="json"):
     """
@@ -17,7 +103,7 @@ def get_omega3_products_from_api(api_key, service_id, product_name="오메가3",
         data_type (str): 응답 데이터 타입 ("json" 또는 "xml", 기본값: "json")
     
     Returns:
-        dict: API 응답 데이터
+        dict | list: API 응답 데이터 (json) 또는 받는 대로 파싱한 row 리스트 (xml), 실패하면 None
     """
     
     # 파라미터로 받은 service_id 사용
@@ -36,24 +122,25 @@ def get_omega3_products_from_api(api_key, service_id, product_name="오메가3",
     
     print(f"API 요청 URL: {api_url}")
     
+    if data_type.lower() == "xml":
+        return _get_rows_xml(api_url)
+    
     try:
-        # API 요청
-        response = requests.get(api_url, timeout=30)
+        # API 요청 (본문까지 받은 시간 측정)
+        with measure("openapi_range") as timing:
+            timing.response = response = requests.get(api_url, timeout=30)
         
         print(f"응답 상태 코드: {response.status_code}")
         
         print(f"응답 내용 (처음 500자): {response.text[:500]}")
         
         if response.status_code == 200:
-            if data_type.lower() == "json":
-                try:
-                    return response.json()
-                except json.JSONDecodeError as e:
-                    print(f"JSON 파싱 오류: {e}")
-                    print(f"응답 전체 내용: {response.text}")
-                    return None
-            else:
-                return response.text
+            try:
+                return response.json()
+            except json.JSONDecodeError as e:
+                print(f"JSON 파싱 오류: {e}")
+                print(f"응답 전체 내용: {response.text}")
+                return None
         else:
             print(f"API 요청 실패: HTTP {response.status_code}")
             print(f"응답 내용: {response.text}")
@@ -63,12 +150,38 @@ def get_omega3_products_from_api(api_key, service_id, product_name="오메가3",
         print(f"API 요청 중 오류 발생: {e}")
         return None
 
+def _get_rows_xml(api_url):
+    """
+    XML 응답을 본문 전체를 받지 않고 XML_CHUNK_SIZE 단위로 받으면서 row 리스트로 파싱
+    
+    Returns:
+        list: 제품 정보 리스트 (요청 실패/오류 결과 코드면 None)
+    """
+    try:
+        # 본문을 모두 읽을 때까지 측정
+        with measure("openapi_range_xml") as timing:
+            timing.response = response = requests.get(api_url, timeout=30, stream=True)
+            try:
+                print(f"응답 상태 코드: {response.status_code}")
+                if response.status_code != 200:
+                    print(f"API 요청 실패: HTTP {response.status_code}")
+                    return None
+                return list(iter_api_rows_xml(response.iter_content(XML_CHUNK_SIZE)))
+            finally:
+                response.close()
+    except (RuntimeError, ET.ParseError) as e:
+        print(f"API 응답 파싱 중 오류 발생: {e}")
+        return None
+    except requests.exceptions.RequestException as e:
+        print(f"API 요청 중 오류 발생: {e}")
+        return None
+
 def parse_api_response(api_response):
     """
     API 응답 데이터를 파싱하여 제품 정보 리스트로 변환
     
     Args:
-        api_response (dict): API 응답 데이터
+        api_response (dict | list): API 응답 데이터 (xml이면 이미 파싱된 row 리스트)
     
     Returns:
         list: 제품 정보 딕셔너리 리스트
@@ -78,6 +191,10 @@ def parse_api_response(api_response):
         print("API 응답이 없습니다.")
         return []
     
+    if isinstance(api_response, list):
+        print(f"총 {len(api_response)}개의 제품 정보를 찾았습니다. (XML)")
+        return api_response
+    
     try:
         # 응답 구조 확인
         print(f"API 응답 키: {list(api_response.keys())}")
@@ -159,6 +276,84 @@ def save_to_csv(products_data, filename="omega3_products.csv"):
     except Exception as e:
         print(f"CSV 저장 중 오류 발생: {e}")
 
+def _excel_sheet_title(sheet_name, part):
+    """Excel 시트 이름 규칙(31자, 금지 문자)에 맞춘 시트 이름 (분할 시 _2, _3 ... 접미사)"""
+    title = "".join("_" if ch in '[]:*?/\\' else ch for ch in str(sheet_name))
+    suffix = f"_{part}" if part > 1 else ""
+    return title[:31 - len(suffix)] + suffix
+
+def _excel_cell_value(value):
+    """Excel에 쓸 수 있는 값으로 변환 (NaN -> 빈 셀, 제어문자 제거, 길이 제한)"""
+    if value is None:
+        return None
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, str):
+        return ILLEGAL_CHARACTERS_RE.sub("", value)[:EXCEL_MAX_CELL_CHARS]
+    return value
+
+def save_to_excel_with_sheets(data_dict, filename="건강기능식품_통합데이터.xlsx"):
+    """
+    검색어별 제품 정보를 시트별로 나누어 Excel 파일로 저장
+    
+    write-only 워크북에 행을 하나씩 흘려 쓰므로 행 수와 관계없이 메모리 사용량이 일정하다.
+    한 시트가 Excel 최대 행 수를 넘으면 "시트명_2", "시트명_3" ... 시트로 이어서 저장한다.
+    
+    Args:
+        data_dict (dict): 시트 이름(검색어) -> 제품 정보 리스트 또는 제품 정보를 하나씩 내보내는 iterable
+        filename (str): 저장할 Excel 파일명
+    """
+    
+    if not data_dict:
+        print("저장할 데이터가 없습니다.")
+        return
+    
+    try:
+        workbook = Workbook(write_only=True)
+        sheet_count = 0
+        
+        for sheet_name, products in data_dict.items():
+            rows = iter(products)
+            first_product = next(rows, None)
+            if first_product is None:
+                print(f"- '{sheet_name}': 데이터 없음 (시트 생략)")
+                continue
+            
+            # 첫 행의 컬럼 순서를 기준으로 한글 컬럼명 적용
+            columns = list(first_product.keys())
+            header = [COLUMN_MAPPING.get(column, column) for column in columns]
+            
+            part = 1
+            worksheet = workbook.create_sheet(_excel_sheet_title(sheet_name, part))
+            worksheet.append(header)
+            sheet_count += 1
+            sheet_rows = 1
+            total_rows = 0
+            
+            for product in chain([first_product], rows):
+                if sheet_rows >= EXCEL_MAX_ROWS:
+                    part += 1
+                    worksheet = workbook.create_sheet(_excel_sheet_title(sheet_name, part))
+                    worksheet.append(header)
+                    sheet_count += 1
+                    sheet_rows = 1
+                
+                worksheet.append([_excel_cell_value(product.get(column)) for column in columns])
+                sheet_rows += 1
+                total_rows += 1
+            
+            print(f"- '{sheet_name}': {total_rows}행 ({part}개 시트)")
+        
+        if sheet_count == 0:
+            print("저장할 데이터가 없습니다.")
+            return
+        
+        workbook.save(filename)
+        print(f"✅ 데이터가 '{filename}' 파일로 저장되었습니다. (시트 {sheet_count}개)")
+        
+    except Exception as e:
+        print(f"Excel 저장 중 오류 발생: {e}")
+
 def get_multiple_pages(api_key, product_name="오메가3", page_size=100, max_pages=10):
     """
     여러 페이지의 데이터를 순차적으로 가져오기
@@ -264,8 +459,10 @@ def main():
     else:
         print("❌ 수집된 제품 정보가 없습니다.")
     
+    print_latency_report()
     print("\n" + "=" * 70)
     print("✅ 작업 완료!")
 
 if __name__ == "__main__":
+    install_latency_probes()
     main()
@@ -3,9 +3,31 @@ import json
 import pandas as pd
 import time
 import re
+import xml.etree.ElementTree as ET
 from urllib.parse import quote
+from omega3_api import API_NO_DATA_CODE, COLUMN_MAPPING, XML_CHUNK_SIZE, iter_api_rows_xml
+from filter_rules import load_rules, compile_rules
+from request_latency import install as install_latency_probes, measure, print_latency_report
+from adaptive_requests import adaptive_timeout, hedged_call, iter_with_deadline, print_hedge_stats, request_with_deadline
+from page_archive import attach_from_env
 
-def get_omega3_products_from_api(api_key, service_id, product_name="오메가3", start_idx=1, end_idx=10, data_type="json"):
+# OpenAPI 요청 세션 (연결 재사용, 아카이브 기록/재생 어댑터 연결용)
+api_session = requests.Session()
+
+# I0030 서비스가 URL 경로로 받는 검색 조건
+# (PRDLST_NM/BSSH_NM: 부분 일치, PRDLST_REPORT_NO: 일치, CHNG_DT: YYYYMMDD 이후 변경분)
+I0030_FILTER_PARAMS = ("PRDLST_NM", "BSSH_NM", "PRDLST_REPORT_NO", "CHNG_DT")
+
+def build_filter_path(filters):
+    """검색 조건 dict를 URL 경로 조각("/PRDLST_NM=...&BSSH_NM=...")으로 변환 (빈 값 제외)"""
+    unknown = [name for name in filters if name not in I0030_FILTER_PARAMS]
+    if unknown:
+        raise ValueError(f"지원하지 않는 OpenAPI 검색 조건: {unknown} (가능: {I0030_FILTER_PARAMS})")
+    parts = [f"{name}={quote(str(filters[name]))}" for name in I0030_FILTER_PARAMS if filters.get(name)]
+    return "/" + "&".join(parts) if parts else ""
+
+def get_omega3_products_from_api(api_key, service_id, product_name="오메가3", start_idx=1, end_idx=10, data_type="json",
+                                 filters=None):
     """
     식품의약품안전처 OpenAPI를 사용하여 건강기능식품 정보 조회
     
@@ -16,11 +38,23 @@ def get_omega3_products_from_api(api_key, service_id, product_name="오메가3",
         start_idx (int): 요청 시작 위치 (기본값: 1)
         end_idx (int): 요청 종료 위치 (기본값: 10)
         data_type (str): 응답 데이터 타입 ("json" 또는 "xml", 기본값: "json")
+        filters (dict): 서버에서 적용할 추가 검색 조건 (I0030_FILTER_PARAMS, 예: {"BSSH_NM": "...", "CHNG_DT": "20240101"})
     
     Returns:
-        dict: API 응답 데이터
+        dict | list: API 응답 데이터 (json) 또는 iter_omega3_products_xml로 받는 대로 파싱한 row 리스트 (xml),
+        실패하면 None
     """
     
+    if data_type.lower() == "xml":
+        try:
+            return list(iter_omega3_products_xml(api_key, service_id, product_name, start_idx, end_idx, filters))
+        except (RuntimeError, ET.ParseError) as e:
+            print(f"API 응답 파싱 중 오류 발생: {e}")
+            return None
+        except requests.exceptions.RequestException as e:
+            print(f"API 요청 중 오류 발생: {e}")
+            return None
+    
     # 파라미터로 받은 service_id 사용
     
     # API 기본 URL
@@ -29,32 +63,32 @@ def get_omega3_products_from_api(api_key, service_id, product_name="오메가3",
     # URL 구성
     api_url = f"{base_url}/{api_key}/{service_id}/{data_type}/{start_idx}/{end_idx}"
     
-    # 추가 검색 조건이 있을 경우 (제품명으로 검색)
-    if product_name:
-        # URL 인코딩
-        encoded_product_name = quote(product_name)
-        api_url += f"/PRDLST_NM={encoded_product_name}"
+    # 추가 검색 조건이 있을 경우 (제품명, 업소명, 신고번호, 변경일자) - 서버에서 걸러서 받음
+    api_url += build_filter_path({"PRDLST_NM": product_name, **(filters or {})})
     
     print(f"API 요청 URL: {api_url}")
     
     try:
         # API 요청
-        response = requests.get(api_url, timeout=30)
+        def send():
+            with measure("openapi_range") as timing:
+                timing.response = request_with_deadline(api_session, "GET", api_url, "openapi_range", 30)
+            return timing.response
+        
+        # 구간 조회는 멱등 GET이므로 p95 안에 응답이 없으면 헤지 요청
+        response = hedged_call("openapi_range", send)
         
         print(f"응답 상태 코드: {response.status_code}")
         
         print(f"응답 내용 (처음 500자): {response.text[:500]}")
         
         if response.status_code == 200:
-            if data_type.lower() == "json":
-                try:
-                    return response.json()
-                except json.JSONDecodeError as e:
-                    print(f"JSON 파싱 오류: {e}")
-                    print(f"응답 전체 내용: {response.text}")
-                    return None
-            else:
-                return response.text
+            try:
+                return response.json()
+            except json.JSONDecodeError as e:
+                print(f"JSON 파싱 오류: {e}")
+                print(f"응답 전체 내용: {response.text}")
+                return None
         else:
             print(f"API 요청 실패: HTTP {response.status_code}")
             print(f"응답 내용: {response.text}")
@@ -69,7 +103,7 @@ def parse_api_response(api_response):
     API 응답 데이터를 파싱하여 제품 정보 리스트로 변환
     
     Args:
-        api_response (dict): API 응답 데이터
+        api_response (dict | list | str): API 응답 데이터 (JSON dict, 파싱된 XML row 리스트 또는 XML 텍스트)
     
     Returns:
         list: 제품 정보 딕셔너리 리스트
@@ -79,6 +113,22 @@ def parse_api_response(api_response):
         print("API 응답이 없습니다.")
         return []
     
+    # data_type="xml"로 받으면서 이미 파싱한 row 리스트
+    if isinstance(api_response, list):
+        print(f"총 {len(api_response)}개의 제품 정보를 찾았습니다. (XML)")
+        return api_response
+    
+    # 아카이브 등에 남은 XML 응답 텍스트
+    if isinstance(api_response, (str, bytes)):
+        try:
+            data = api_response.encode("utf-8") if isinstance(api_response, str) else api_response
+            products = list(iter_api_rows_xml([data]))
+            print(f"총 {len(products)}개의 제품 정보를 찾았습니다. (XML)")
+            return products
+        except (RuntimeError, ET.ParseError) as e:
+            print(f"API 응답 파싱 중 오류 발생: {e}")
+            return []
+    
     try:
         # 응답 구조 확인
         print(f"API 응답 키: {list(api_response.keys())}")
@@ -194,9 +244,54 @@ def extract_rancidity_from_standards(standards_text):
     
     return rancidity_info
 
+def iter_omega3_products_xml(api_key, service_id, product_name="오메가3", start_idx=1, end_idx=10, filters=None,
+                             info=None):
+    """
+    OpenAPI를 XML로 요청하여 row 레코드를 받는 대로 하나씩 반환 (제너레이터)
+    
+    응답 전체를 메모리에 올리지 않고 XML_CHUNK_SIZE 단위로 받아 iter_api_rows_xml로 파싱한다.
+    인자는 get_omega3_products_from_api와 같고, info를 주면 결과 코드와 전체 개수를 채운다.
+    
+    Yields:
+        dict: 제품 정보
+    """
+    api_url = f"http://openapi.foodsafetykorea.go.kr/api/{api_key}/{service_id}/xml/{start_idx}/{end_idx}"
+    api_url += build_filter_path({"PRDLST_NM": product_name, **(filters or {})})
+    print(f"API 요청 URL (XML 스트리밍): {api_url}")
+    
+    # 연결/첫 바이트까지만 측정 (본문은 호출한 쪽이 읽는 속도에 따라 수신)
+    timeout = adaptive_timeout("openapi_range_xml", 30)
+    started = time.monotonic()
+    with measure("openapi_range_xml") as timing:
+        response = api_session.get(api_url, timeout=timeout, stream=True)
+        timing.response = response
+        timing.bytes = 0
+    try:
+        if response.status_code != 200:
+            raise RuntimeError(f"API 요청 실패: HTTP {response.status_code}")
+        # 전체 시간 제한은 청크를 기다린 시간에만 적용 (row를 처리하는 시간은 제외)
+        yield from iter_api_rows_xml(iter_with_deadline(response, timeout, started, XML_CHUNK_SIZE), info)
+    finally:
+        response.close()
+
+# 필터 규칙 평가 계획 (filter_rules.json, 최초 사용 시 컴파일)
+_filter_plan = None
+
+def get_filter_plan():
+    """filter_rules.json 규칙을 컴파일한 평가 계획 반환"""
+    global _filter_plan
+    if _filter_plan is None:
+        _filter_plan = compile_rules(load_rules(), {
+            "rancidity": lambda product: extract_rancidity_from_standards(product.get("STDR_STND", ""))
+        })
+    return _filter_plan
+
 def check_filtering_criteria(product):
     """
-    3가지 기준으로 제품 필터링
+    filter_rules.json의 기준으로 제품 필터링
+    
+    기본 규칙: 기타원재료 없음, 주된기능성에 비타민 E 없음, 산패도 기준 이하.
+    싸고 탈락률이 높은 규칙부터 평가하며, 산패도 추출은 필요한 행에서만 한 번 실행한다.
     
     Args:
         product (dict): 제품 정보
@@ -204,40 +299,91 @@ def check_filtering_criteria(product):
     Returns:
         tuple: (통과여부, 필터링사유)
     """
-    # 1. 기타원재료 체크 (빈값 또는 공백이어야 함)
-    etc_materials = product.get("ETC_RAWMTRL_NM", "")
-    if etc_materials and etc_materials.strip():
-        return False, "기타원재료가 존재함"
-    
-    # 2. 주된기능성에서 비타민 E 체크 (없어야 함)
-    primary_function = product.get("PRIMARY_FNCLTY", "")
-    if "비타민" in primary_function and "E" in primary_function:
-        return False, "비타민 E 포함"
-    
-    # 3. 산패도 기준 체크
-    standards_text = product.get("STDR_STND", "")
-    rancidity_info = extract_rancidity_from_standards(standards_text)
-    
-    if not rancidity_info:
-        return False, "산패도 정보 없음"
-    
-    # 산패도 기준 체크
-    criteria = {
-        "산가": 3.0,
-        "과산화물가": 5.0,
-        "아니시딘가": 20.0,
-        "총산화가": 26.0
-    }
+    return get_filter_plan().evaluate(product)
+
+# 구간 요청이 실패(응답 없음/오류 코드)했을 때 시도 횟수
+API_BATCH_ATTEMPTS = 3
+
+def _api_result(api_response):
+    """
+    JSON 응답의 결과 코드와 total_count
+    
+    Returns:
+        tuple: (결과 코드, 전체 개수) - 응답이 없거나 형식이 다르면 (None, None)
+    """
+    if not isinstance(api_response, dict):
+        return None, None
+    service_key = next((key for key in api_response if key.startswith(("I", "C"))), None)
+    data = api_response.get(service_key) if service_key else api_response
+    if not isinstance(data, dict):
+        return None, None
+    total = str(data.get("total_count", "")).strip()
+    return (data.get("RESULT") or {}).get("CODE"), int(total) if total.isdigit() else None
+
+def _fetch_api_batch_xml(api_key, service_id, start_idx, end_idx, product_name, filters):
+    """
+    XML 스트리밍으로 구간 하나 요청
+    
+    Returns:
+        tuple: (결과 코드, 전체 개수, 제품 리스트) - 요청/파싱 실패는 결과 코드 None (오류 코드는 그대로)
+    """
+    info = {}
+    try:
+        products = list(iter_omega3_products_xml(api_key, service_id, product_name, start_idx, end_idx,
+                                                 filters, info=info))
+    except (RuntimeError, ET.ParseError, requests.exceptions.RequestException) as e:
+        print(f"XML 구간 요청 실패: {e}")
+        # 오류 결과 코드를 받았으면 그 코드, 요청/파싱 자체가 실패했으면 None
+        code = info.get("code")
+        return (None if code in ("INFO-000", API_NO_DATA_CODE) else code), None, []
+    return info.get("code"), info.get("total_count"), products
+
+def fetch_api_batch(api_key, service_id, start_idx, end_idx, product_name="오메가3", filters=None,
+                    attempts=API_BATCH_ATTEMPTS, data_type="json"):
+    """
+    OpenAPI 구간 하나 요청 (실패하면 다시 시도)
     
-    for key, max_value in criteria.items():
-        if rancidity_info.get(key) is not None:
-            if rancidity_info[key] > max_value:
-                return False, f"{key} 기준 초과 ({rancidity_info[key]} > {max_value})"
+    빈 목록은 서버가 데이터 없음(INFO-200)이라고 답한 경우에만 반환한다. 요청 실패나 오류 코드를
+    빈 결과로 보면 서버 조건으로 좁힌 수집이 중간에서 끊기므로 attempts번 실패하면 예외를 낸다.
+    data_type="xml"이면 본문 전체를 받지 않고 iter_omega3_products_xml로 받는 대로 파싱한다.
     
-    # 모든 기준 통과
-    return True, "모든 기준 통과"
+    Returns:
+        tuple: (제품 리스트, 서버가 알려준 전체 개수 또는 None)
+    
+    Raises:
+        RuntimeError: attempts번 모두 실패
+    """
+    error = None
+    for attempt in range(1, attempts + 1):
+        if data_type.lower() == "xml":
+            code, total, products = _fetch_api_batch_xml(api_key, service_id, start_idx, end_idx, product_name, filters)
+        else:
+            api_response = get_omega3_products_from_api(
+                api_key=api_key,
+                service_id=service_id,
+                product_name=product_name,
+                start_idx=start_idx,
+                end_idx=end_idx,
+                data_type="json",
+                filters=filters
+            )
+            code, total = _api_result(api_response)
+            products = parse_api_response(api_response) if code == "INFO-000" else []
+        if code == "INFO-000":
+            return products, total
+        if code == API_NO_DATA_CODE:
+            return [], total or 0
+        error = f"결과 코드 {code}" if code else "응답 없음"
+        if attempt < attempts:
+            print(f"⚠️ 구간 {start_idx}~{end_idx} 요청 실패 ({error}), {attempt * 2}초 후 다시 시도 ({attempt}/{attempts})")
+            time.sleep(attempt * 2)
+    raise RuntimeError(f"구간 {start_idx}~{end_idx} 요청 {attempts}회 실패: {error}")
 
-def collect_filtered_omega3_products(api_key, service_id, total_count=1400, batch_size=100):
+def _pass_rate(passed, processed):
+    return passed / processed * 100 if processed else 0.0
+
+def collect_filtered_omega3_products(api_key, service_id, total_count=1400, batch_size=100, filters=None,
+                                     data_type="json"):
     """
     분할 요청으로 오메가3 제품을 수집하고 기준에 맞는 제품만 필터링
     
@@ -246,6 +392,8 @@ def collect_filtered_omega3_products(api_key, service_id, total_count=1400, batc
         service_id (str): 서비스 ID
         total_count (int): 총 수집할 제품 수
         batch_size (int): 배치당 요청 제품 수
+        filters (dict): 서버에서 적용할 추가 검색 조건 (예: 증분 수집 시 {"CHNG_DT": "20240101"})
+        data_type (str): "json" 또는 "xml" (XML은 구간 응답을 받는 대로 스트리밍 파싱)
     
     Returns:
         list: 필터링된 제품 리스트
@@ -256,6 +404,7 @@ def collect_filtered_omega3_products(api_key, service_id, total_count=1400, batc
     all_filtered_products = []
     total_processed = 0
     total_passed = 0
+    failed_batches = []
     
     # 배치 개수 계산
     total_batches = (total_count + batch_size - 1) // batch_size
@@ -267,21 +416,15 @@ def collect_filtered_omega3_products(api_key, service_id, total_count=1400, batc
         print(f"\n📦 배치 {batch_num + 1}/{total_batches}: {start_idx}~{end_idx} ({end_idx - start_idx + 1}개)")
         
         try:
-            # API 요청
-            api_response = get_omega3_products_from_api(
-                api_key=api_key,
-                service_id=service_id,
-                product_name="오메가3",
-                start_idx=start_idx,
-                end_idx=end_idx,
-                data_type="json"
-            )
-            
-            # 응답 파싱
-            products = parse_api_response(api_response)
+            # API 요청 및 응답 파싱 (실패하면 다시 시도, 계속 실패하면 예외)
+            products, server_total = fetch_api_batch(api_key, service_id, start_idx, end_idx, filters=filters,
+                                                     data_type=data_type)
             
             if not products:
                 print(f"❌ 배치 {batch_num + 1}: 데이터 없음")
+                if filters:
+                    # 서버가 데이터 없음으로 답했으므로 서버 조건으로 좁힌 결과는 이후 구간도 비어 있음
+                    break
                 continue
             
             print(f"✅ 배치 {batch_num + 1}: {len(products)}개 제품 수집")
@@ -304,7 +447,11 @@ def collect_filtered_omega3_products(api_key, service_id, total_count=1400, batc
             all_filtered_products.extend(batch_filtered)
             
             print(f"📊 배치 {batch_num + 1} 결과: {len(batch_filtered)}/{len(products)}개 통과")
-            print(f"📊 전체 누적: {total_passed}/{total_processed}개 통과 ({total_passed/total_processed*100:.1f}%)")
+            print(f"📊 전체 누적: {total_passed}/{total_processed}개 통과 ({_pass_rate(total_passed, total_processed):.1f}%)")
+            
+            if filters and server_total is not None and end_idx >= server_total:
+                print(f"📭 서버 조건에 맞는 {server_total}개를 모두 받았습니다.")
+                break
             
             # 배치 간 대기 (서버 부하 방지)
             if batch_num < total_batches - 1:
@@ -313,11 +460,19 @@ def collect_filtered_omega3_products(api_key, service_id, total_count=1400, batc
                 
         except Exception as e:
             print(f"❌ 배치 {batch_num + 1} 처리 중 오류: {e}")
+            failed_batches.append(f"{start_idx}~{end_idx}")
             continue
     
     print("\n" + "=" * 80)
     print(f"🎉 수집 완료!")
-    print(f"📊 최종 결과: {total_passed}/{total_processed}개 제품이 기준을 통과했습니다 ({total_passed/total_processed*100:.1f}%)")
+    print(f"📊 최종 결과: {total_passed}/{total_processed}개 제품이 기준을 통과했습니다 ({_pass_rate(total_passed, total_processed):.1f}%)")
+    if failed_batches:
+        print(f"⚠️ 실패한 구간 {len(failed_batches)}개는 결과에 빠져 있습니다: {', '.join(failed_batches)}")
+    
+    # 규칙별 소요 시간/탈락 통계 (다음 실행의 평가 순서에 반영)
+    filter_plan = get_filter_plan()
+    filter_plan.print_report()
+    filter_plan.save_stats()
     
     return all_filtered_products
 
@@ -372,41 +527,12 @@ def save_filtered_products_to_csv(products, filename="omega3_filtered_products.c
         print("저장할 제품이 없습니다.")
         return
     
-    # 컬럼명 매핑 (영문 -> 한글)
-    column_mapping = {
-        "LCNS_NO": "인허가번호",
-        "BSSH_NM": "업소명", 
-        "PRDLST_REPORT_NO": "품목제조번호",
-        "PRDLST_NM": "품목명",
-        "PRMS_DT": "허가일자",
-        "POG_DAYCNT": "소비기한일수",
-        "DISPOS": "제품형태",
-        "NTK_MTHD": "섭취방법",
-        "PRIMARY_FNCLTY": "주된기능성",
-        "IFTKN_ATNT_MATR_CN": "섭취시주의사항",
-        "CSTDY_MTHD": "보관방법",
-        "PRDLST_CDNM": "유형",
-        "STDR_STND": "기준규격",
-        "HIENG_LNTRT_DVS_NM": "고열량저영양여부",
-        "PRODUCTION": "생산종료여부",
-        "CHILD_CRTFC_YN": "어린이기호식품품질인증여부",
-        "PRDT_SHAP_CD_NM": "제품형태코드명",
-        "FRMLC_MTRQLT": "포장재질",
-        "RAWMTRL_NM": "품목유형",
-        "INDUTY_CD_NM": "업종",
-        "LAST_UPDT_DTM": "최종수정일자",
-        "INDIV_RAWMTRL_NM": "기능성원재료",
-        "ETC_RAWMTRL_NM": "기타원재료",
-        "CAP_RAWMTRL_NM": "캡슐원재료",
-        "FRMLC_MTHD": "포장방법"
-    }
-    
     try:
         # DataFrame 생성
         df = pd.DataFrame(products)
         
         # 컬럼명을 한글로 변경
-        df = df.rename(columns=column_mapping)
+        df = df.rename(columns=COLUMN_MAPPING)
         
         # CSV 저장 (UTF-8 BOM 포함)
         df.to_csv(filename, index=False, encoding='utf-8-sig')
@@ -521,7 +647,11 @@ def main():
     else:
         print("❌ 기준을 통과한 제품이 없습니다.")
     
+    print_latency_report()
+    print_hedge_stats()
     print("\n🎉 모든 작업이 완료되었습니다!")
 
 if __name__ == "__main__":
+    attach_from_env(api_session)
+    install_latency_probes()
     main()
\ No newline at end of file
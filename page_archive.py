@@ -0,0 +1,482 @@
+import hashlib
+import io
+import json
+import mmap
+import os
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# 아카이브 폴더/모드 환경 변수 (모드: record 또는 replay, 기본 record)
+ARCHIVE_DIR_ENV = "CRAWL_ARCHIVE_DIR"
+ARCHIVE_MODE_ENV = "CRAWL_ARCHIVE_MODE"
+
+RECORD_MAGIC = b"ARC/1.0\r\n"
+RECORD_TRAILER = b"\r\n\r\n"
+INDEX_FILE = "index.tsv"
+SEGMENT_PATTERN = re.compile(r"^segment-(\d{5})\.arc$")
+DEFAULT_SEGMENT_SIZE = 256 * 1024 * 1024
+
+# 저장하는 본문은 압축 해제 후 값이므로 재생 시 의미가 없는 헤더
+_DROPPED_HEADERS = {"content-encoding", "transfer-encoding", "content-length", "connection"}
+
+_OPENAPI_PATH = re.compile(
+    r"/api/[^/]+/(?P<service>[^/]+)/(?P<type>json|xml)/(?P<start>\d+)/(?P<end>\d+)(?P<filters>/.*)?$"
+)
+
+
+class ArchiveRecord:
+    """아카이브 레코드 하나 (본문은 bytes)"""
+
+    def __init__(self, key, url, method, params, status, timestamp, headers, body):
+        self.key = key
+        self.url = url
+        self.method = method
+        self.params = params
+        self.status = status
+        self.timestamp = timestamp
+        self.headers = headers
+        self.body = body
+
+
+class ArchiveMiss(requests.exceptions.ConnectionError):
+    """재생 모드에서 아카이브에 없는 요청 (기존 요청 실패 처리 경로로 처리됨)"""
+
+
+class SegmentReader:
+    """
+    세그먼트 파일을 mmap으로 열어 (세그먼트, 오프셋, 길이) 위치의 레코드를 읽는 읽기 전용 리더
+
+    색인을 읽지 않으므로 위치를 미리 받은 워커 프로세스가 가볍게 열 수 있다.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._maps = {}
+
+    def segment_path(self, segment):
+        return os.path.join(self.directory, f"segment-{segment:05d}.arc")
+
+    def _view(self, segment, end):
+        view = self._maps.get(segment)
+        if view is None or len(view) < end:
+            if view is not None:
+                view.close()
+            with open(self.segment_path(segment), "rb") as f:
+                view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[segment] = view
+        return view
+
+    def read(self, key, location):
+        """위치의 레코드 읽기 (헤더가 깨졌으면 ValueError)"""
+        segment, offset, length = location
+        view = self._view(segment, offset + length)
+        header_end = view.find(b"\r\n\r\n", offset, offset + length)
+        if view[offset:offset + len(RECORD_MAGIC)] != RECORD_MAGIC or header_end < 0:
+            raise ValueError(f"손상된 아카이브 레코드: {key} (세그먼트 {segment}, 오프셋 {offset})")
+        fields = {}
+        for line in view[offset + len(RECORD_MAGIC):header_end].decode("utf-8").split("\r\n"):
+            name, _, value = line.partition(": ")
+            fields[name] = value
+        body_start = header_end + 4
+        body = view[body_start:body_start + int(fields["Content-Length"])]
+        return ArchiveRecord(
+            key=fields["Key"],
+            url=fields["URL"],
+            method=fields["Method"],
+            params=json.loads(fields["Params"]),
+            status=int(fields["Status"]),
+            timestamp=fields["Date"],
+            headers=json.loads(fields["Http-Headers"]),
+            body=body,
+        )
+
+    def close(self):
+        for view in self._maps.values():
+            view.close()
+        self._maps.clear()
+
+
+class PageArchive:
+    """
+    원본 응답을 보관하는 추가 전용(append-only) 아카이브
+
+    WARC와 비슷하게 세그먼트 파일(segment-00001.arc ...)에 레코드를 이어 붙인다.
+    레코드는 "ARC/1.0" 줄, "이름: 값" 헤더(Key, Method, URL, Params, Status, Date,
+    Http-Headers, Content-Length), 빈 줄, 본문, 빈 줄 두 개로 구성된다.
+    index.tsv에는 "키<TAB>세그먼트<TAB>오프셋<TAB>길이" 한 줄씩 기록하며 같은 키는
+    마지막 레코드가 유효하다. 읽기는 세그먼트를 mmap으로 열어 오프셋 위치만 읽는다.
+
+    키 형식:
+      - 상세 페이지: "detail:<품목제조신고번호>"
+      - OpenAPI 구간: "range:<서비스ID>:<json|xml>:<시작>-<끝>[/조건]" (인증키 제외)
+      - 그 외: "<METHOD>:<URL>[#본문해시]"
+
+    프로세스마다 자기 세그먼트 파일을 새로 만들어 쓰고 색인은 O_APPEND로 한 줄씩 쓰므로
+    여러 프로세스가 같은 폴더에 기록할 수 있다. read_only=True이면 아무 파일도 만들거나
+    쓰지 않으므로 읽기 전용 볼륨이나 복사해 온 아카이브도 열 수 있다.
+
+    Args:
+        directory (str): 아카이브 폴더
+        segment_size (int): 세그먼트 파일 최대 크기(바이트), 넘으면 새 세그먼트 시작
+        read_only (bool): 읽기 전용으로 열기 (append 불가)
+    """
+
+    def __init__(self, directory, segment_size=DEFAULT_SEGMENT_SIZE, read_only=False):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.read_only = read_only
+        self._lock = threading.Lock()
+        self._index = {}
+        self._index_position = 0
+        self._reader = SegmentReader(directory)
+        self._writer = None
+        self._writer_segment = None
+        self._index_fd = None
+        if read_only:
+            if not os.path.exists(os.path.join(directory, INDEX_FILE)):
+                raise FileNotFoundError(f"아카이브 색인이 없음: {os.path.join(directory, INDEX_FILE)}")
+        else:
+            os.makedirs(directory, exist_ok=True)
+            self._index_fd = os.open(os.path.join(directory, INDEX_FILE),
+                                     os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, "O_BINARY", 0))
+        self._refresh_index()
+
+    # -----------------------------------------------------------------
+    # 색인
+    # -----------------------------------------------------------------
+
+    def _refresh_index(self):
+        """다른 프로세스가 추가한 색인 줄까지 읽기 (완성된 줄만)"""
+        with open(os.path.join(self.directory, INDEX_FILE), "rb") as f:
+            f.seek(self._index_position)
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            key, segment, offset, length = line.decode("utf-8").split("\t")
+            self._index[key] = (int(segment), int(offset), int(length))
+        self._index_position += end
+
+    def keys(self, prefix=""):
+        """prefix로 시작하는 키 목록 (정렬)"""
+        with self._lock:
+            self._refresh_index()
+            return sorted(key for key in self._index if key.startswith(prefix))
+
+    def locations(self, prefix=""):
+        """
+        prefix로 시작하는 키와 레코드 위치 목록 (키 순서)
+
+        Returns:
+            list: (키, (세그먼트, 오프셋, 길이)) 튜플 리스트 - SegmentReader.read()에 그대로 넘길 수 있음
+        """
+        with self._lock:
+            self._refresh_index()
+            return sorted((key, location) for key, location in self._index.items() if key.startswith(prefix))
+
+    def __contains__(self, key):
+        with self._lock:
+            if key not in self._index:
+                self._refresh_index()
+            return key in self._index
+
+    def __len__(self):
+        with self._lock:
+            self._refresh_index()
+            return len(self._index)
+
+    # -----------------------------------------------------------------
+    # 쓰기
+    # -----------------------------------------------------------------
+
+    def _open_new_segment(self):
+        if self._writer is not None:
+            self._writer.close()
+        existing = [int(m.group(1)) for m in map(SEGMENT_PATTERN.match, os.listdir(self.directory)) if m]
+        segment = max(existing, default=0) + 1
+        while True:
+            try:
+                self._writer = open(self._reader.segment_path(segment), "xb")
+                break
+            except FileExistsError:
+                segment += 1
+        self._writer_segment = segment
+
+    def append(self, key, url, body, status=200, method="GET", params=None, headers=None, timestamp=None):
+        """
+        레코드 추가
+
+        Args:
+            key (str): 색인 키 (탭/줄바꿈 불가)
+            url (str): 요청 URL
+            body (bytes): 응답 본문
+            status (int): HTTP 상태 코드
+            method (str): HTTP 메서드
+            params (dict): 요청 파라미터 (쿼리 또는 폼)
+            headers (dict): 응답 헤더
+            timestamp (str): ISO 8601 시각 (기본값: 현재 UTC)
+
+        Returns:
+            tuple: (세그먼트 번호, 오프셋, 길이)
+        """
+        if self.read_only:
+            raise PermissionError(f"읽기 전용 아카이브에는 기록할 수 없음: {self.directory}")
+        if any(ch in key for ch in "\t\r\n"):
+            raise ValueError(f"아카이브 키에 탭/줄바꿈을 쓸 수 없음: {key!r}")
+        timestamp = timestamp or datetime.now(timezone.utc).isoformat(timespec="seconds")
+        fields = [
+            ("Key", key),
+            ("Method", method),
+            ("URL", url),
+            ("Params", json.dumps(params or {}, ensure_ascii=False)),
+            ("Status", str(status)),
+            ("Date", timestamp),
+            ("Http-Headers", json.dumps(dict(headers or {}), ensure_ascii=False)),
+            ("Content-Length", str(len(body))),
+        ]
+        header = "".join(f"{name}: {value}\r\n" for name, value in fields).encode("utf-8")
+        record = b"".join([RECORD_MAGIC, header, b"\r\n", body, RECORD_TRAILER])
+
+        with self._lock:
+            if self._writer is None or (self._writer.tell() and self._writer.tell() + len(record) > self.segment_size):
+                self._open_new_segment()
+            offset = self._writer.tell()
+            self._writer.write(record)
+            self._writer.flush()
+            location = (self._writer_segment, offset, len(record))
+            os.write(self._index_fd, f"{key}\t{location[0]}\t{location[1]}\t{location[2]}\n".encode("utf-8"))
+            self._index[key] = location
+        return location
+
+    # -----------------------------------------------------------------
+    # 읽기
+    # -----------------------------------------------------------------
+
+    def get(self, key):
+        """키의 마지막 레코드 (없으면 None)"""
+        with self._lock:
+            location = self._index.get(key)
+            if location is None:
+                self._refresh_index()
+                location = self._index.get(key)
+            if location is None:
+                return None
+            return self._reader.read(key, location)
+
+    def iter_records(self, prefix=""):
+        """prefix로 시작하는 키의 마지막 레코드들 (키 순서)"""
+        for key in self.keys(prefix):
+            yield self.get(key)
+
+    def close(self):
+        with self._lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+            self._reader.close()
+            if self._index_fd is not None:
+                os.close(self._index_fd)
+                self._index_fd = None
+
+
+# ---------------------------------------------------------------------------
+# 기록/재생 어댑터
+# ---------------------------------------------------------------------------
+
+def _request_params(request):
+    parts = urlsplit(request.url)
+    params = dict(parse_qsl(parts.query, keep_blank_values=True))
+    body = request.body
+    if body and (request.headers.get("Content-Type") or "").startswith("application/x-www-form-urlencoded"):
+        if isinstance(body, bytes):
+            body = body.decode("utf-8", errors="replace")
+        params.update(parse_qsl(body, keep_blank_values=True))
+    return params
+
+
+def request_key(request):
+    """요청의 아카이브 키 (PageArchive 키 형식 참고)"""
+    parts = urlsplit(request.url)
+    params = dict(parse_qsl(parts.query, keep_blank_values=True))
+    report_no = params.get("prdlst_report_no")
+    if report_no:
+        return "detail:" + re.sub(r"[\s-]", "", report_no)
+    match = _OPENAPI_PATH.search(parts.path)
+    if match:
+        filters = unquote(match.group("filters") or "")
+        return f"range:{match.group('service')}:{match.group('type')}:{match.group('start')}-{match.group('end')}{filters}"
+    key = f"{request.method}:{parts.scheme}://{parts.netloc}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+    body = request.body
+    if body:
+        digest = hashlib.sha1(body if isinstance(body, bytes) else body.encode("utf-8")).hexdigest()[:16]
+        key += f"#{digest}"
+    return re.sub(r"[\t\r\n]", " ", key)
+
+
+class _RecordingRaw:
+    """
+    urllib3 응답을 감싸 호출한 쪽이 읽은 (압축 해제된) 본문을 모으고, 끝까지 읽거나 닫힐 때
+    한 번만 on_finish(body) 호출
+
+    읽기 중 오류가 났거나 discard()로 버린 응답, 압축된 원본 그대로 읽은 응답은 기록하지 않는다.
+    그 밖의 속성은 원래 응답의 것을 그대로 쓴다.
+    """
+
+    def __init__(self, raw, on_finish):
+        self._raw = raw
+        self._on_finish = on_finish
+        self._chunks = []
+        self._recordable = True
+        self._finished = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def _capture(self, data, decode_content):
+        if decode_content is None:
+            decode_content = self._raw.decode_content
+        if not decode_content and self._raw.headers.get("Content-Encoding"):
+            self._recordable = False
+        self._chunks.append(data)
+
+    def _finish(self):
+        if self._finished:
+            return
+        self._finished = True
+        if self._recordable:
+            self._on_finish(b"".join(self._chunks))
+        self._chunks = []
+
+    def _reading(self, read, amt, decode_content, read_all, **kwargs):
+        try:
+            data = read(amt, decode_content=decode_content, **kwargs)
+        except Exception:
+            self.discard()
+            raise
+        self._capture(data, decode_content)
+        if read_all or not data:
+            self._finish()
+        return data
+
+    def _streaming(self, chunks, decode_content):
+        try:
+            for data in chunks:
+                self._capture(data, decode_content)
+                yield data
+        except Exception:
+            self.discard()
+            raise
+        self._finish()
+
+    def read(self, amt=None, decode_content=None, **kwargs):
+        return self._reading(self._raw.read, amt, decode_content, amt is None, **kwargs)
+
+    def read1(self, amt=None, decode_content=None):
+        return self._reading(self._raw.read1, amt, decode_content, False)
+
+    def stream(self, amt=2 ** 16, decode_content=None):
+        return self._streaming(self._raw.stream(amt, decode_content=decode_content), decode_content)
+
+    def read_chunked(self, amt=None, decode_content=None):
+        return self._streaming(self._raw.read_chunked(amt, decode_content=decode_content), decode_content)
+
+    def discard(self):
+        """모은 본문을 기록하지 않고 버림 (시간 초과 등으로 쓸 수 없는 응답)"""
+        self._recordable = False
+        self._finish()
+
+    def release_conn(self):
+        self._finish()
+        self._raw.release_conn()
+
+    def close(self):
+        self._finish()
+        self._raw.close()
+
+
+class ArchiveAdapter(HTTPAdapter):
+    """
+    세션에 마운트하는 기록/재생 전송 계층
+
+    - record: 실제로 요청하고 호출한 쪽이 읽은 본문을 아카이브에 추가. 본문을 따로 받지 않고
+      응답 스트림을 그대로 넘기면서 읽은 바이트만 모으므로 조기 종료/시간 제한이 그대로 적용되고,
+      끝까지 읽기 전에 닫은 응답은 읽은 앞부분만 기록된다.
+    - replay: 네트워크 없이 아카이브의 마지막 레코드로 응답 (없으면 ArchiveMiss)
+    """
+
+    def __init__(self, archive, mode="record", **kwargs):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"지원하지 않는 아카이브 모드: {mode}")
+        super().__init__(**kwargs)
+        self.archive = archive
+        self.mode = mode
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        key = request_key(request)
+        if self.mode == "replay":
+            record = self.archive.get(key)
+            if record is None:
+                raise ArchiveMiss(f"아카이브에 없는 요청: {key}", request=request)
+            return self._replay_response(request, record)
+
+        # 본문은 여기서 읽지 않고 (stream=False여도 Session이 나중에 읽음) 읽히는 만큼 기록
+        response = super().send(request, stream=stream, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+        headers = {name: value for name, value in response.headers.items() if name.lower() not in _DROPPED_HEADERS}
+
+        def record(body):
+            self.archive.append(key, request.url, body, status=response.status_code, method=request.method,
+                                params=_request_params(request), headers=headers)
+
+        response.raw = _RecordingRaw(response.raw, record)
+        return response
+
+    def _replay_response(self, request, record):
+        response = requests.Response()
+        response.status_code = record.status
+        response.reason = "Replayed"
+        response.headers = CaseInsensitiveDict(record.headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = record.body
+        response._content_consumed = True
+        # raw.tell()이 본문 길이를 돌려주도록 끝으로 이동
+        response.raw = io.BytesIO(record.body)
+        response.raw.seek(0, io.SEEK_END)
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta(0)
+        response.connection = self
+        return response
+
+
+def attach(session, archive, mode="record"):
+    """세션의 http/https 요청을 아카이브로 기록하거나 재생"""
+    adapter = ArchiveAdapter(archive, mode=mode)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return adapter
+
+
+def attach_from_env(*sessions):
+    """
+    CRAWL_ARCHIVE_DIR이 지정되어 있으면 세션들에 아카이브 어댑터 연결
+
+    CRAWL_ARCHIVE_MODE=replay이면 네트워크 없이 아카이브만으로 재생한다.
+
+    Returns:
+        PageArchive: 연결된 아카이브 (지정되지 않았으면 None)
+    """
+    directory = os.environ.get(ARCHIVE_DIR_ENV)
+    if not directory:
+        return None
+    mode = os.environ.get(ARCHIVE_MODE_ENV, "record")
+    archive = PageArchive(directory, read_only=mode == "replay")
+    for session in sessions:
+        attach(session, archive, mode=mode)
+    print(f"🗄️ 원본 응답 아카이브 {'재생' if mode == 'replay' else '기록'}: {directory}")
+    return archive
@@ -0,0 +1,395 @@
+import time
+
+import main as portal
+import omega3_complate as openapi
+from filter_rules import Rule, load_rules
+from near_duplicates import cluster_rows
+from rate_limiter import RateLimiter
+
+# OpenAPI 구간 요청 최소 간격(초) (collect_filtered_omega3_products의 배치 간 대기와 같음)
+OPENAPI_INTERVAL = 2.0
+# 상세 페이지 요청 최소 간격(초)
+DETAIL_INTERVAL = 2.0
+
+# 상세 페이지를 받아야 알 수 있는 컬럼 (산패도 값과 check_rancidity_standards 결과)
+RANCIDITY_FIELDS = {
+    f"{metric}{suffix}" for metric in portal.RANCIDITY_STANDARDS for suffix in ("", "_통과", "_값", "_기준")
+}
+
+# 소스별 신고번호 컬럼
+REPORT_NO_FIELDS = {"portal": "prdlstReportNo", "openapi": "PRDLST_REPORT_NO"}
+
+# 포털 목록 행(build_product_info)에 있는 필드 - 규칙이 이 밖의 필드를 보면 포털 소스에서는 평가할 수 없음
+PORTAL_LIST_FIELDS = frozenset(portal.build_product_info({}))
+
+# OpenAPI(I0030) 서버로 넘길 수 있는 조건: (필드, 연산자) -> (검색 조건, 서버 결과가 조건과 정확히 같은지)
+# 정확히 같지 않은 조건(일치 조건을 부분 일치로 받는 경우 등)은 받은 뒤 클라이언트에서 한 번 더 평가한다.
+SERVER_PUSHDOWN = {
+    ("PRDLST_NM", "contains"): ("PRDLST_NM", True),
+    ("PRDLST_NM", "eq"): ("PRDLST_NM", False),
+    ("BSSH_NM", "contains"): ("BSSH_NM", True),
+    ("BSSH_NM", "eq"): ("BSSH_NM", False),
+    ("PRDLST_REPORT_NO", "eq"): ("PRDLST_REPORT_NO", True),
+    # I0030 행에는 CHNG_DT 필드가 없으므로 서버에서만 평가
+    ("CHNG_DT", "ge"): ("CHNG_DT", True),
+}
+
+# 행에 없어 서버 검색 조건으로만 평가할 수 있는 필드 (넘기지 못하면 모든 행이 탈락하므로 오류)
+SERVER_ONLY_FIELDS = {"CHNG_DT"}
+
+
+def _text(value):
+    return value if isinstance(value, str) else ""
+
+
+# where(필드__연산자=값) 연산자
+OPERATORS = {
+    "eq": lambda value, arg: value == arg,
+    "ne": lambda value, arg: value != arg,
+    "in": lambda value, arg: value in arg,
+    "not_in": lambda value, arg: value not in arg,
+    "contains": lambda value, arg: arg in _text(value),
+    "not_contains": lambda value, arg: arg not in _text(value),
+    "not_contains_all": lambda value, arg: not all(part in _text(value) for part in arg),
+    "empty": lambda value, arg: (not _text(value).strip()) == arg,
+    "le": lambda value, arg: value is not None and value <= arg,
+    "lt": lambda value, arg: value is not None and value < arg,
+    "ge": lambda value, arg: value is not None and value >= arg,
+    "gt": lambda value, arg: value is not None and value > arg,
+}
+
+
+class Predicate:
+    """
+    조건 하나
+
+    needs_detail이 False인 조건은 목록 데이터만으로 평가할 수 있어 상세 페이지 요청 전에 적용된다.
+    """
+
+    def __init__(self, name, test, needs_detail=False, lookup=None):
+        self.name = name
+        self.test = test
+        self.needs_detail = needs_detail
+        # where(필드__연산자=값)로 만든 조건이면 (필드, 연산자, 값) - 서버 조건 변환용
+        self.lookup = lookup
+        self.evaluated = 0
+        self.rejected = 0
+
+    def __call__(self, row):
+        self.evaluated += 1
+        if self.test(row):
+            return True
+        self.rejected += 1
+        return False
+
+
+def _field_predicate(lookup, arg):
+    field, _, op = lookup.partition("__")
+    op = op or "eq"
+    if op not in OPERATORS:
+        raise ValueError(f"지원하지 않는 연산자: {op} ({lookup})")
+    compare = OPERATORS[op]
+    return Predicate(f"{field} {op} {arg!r}", lambda row: compare(row.get(field), arg),
+                     needs_detail=field in RANCIDITY_FIELDS, lookup=(field, op, arg))
+
+
+def plan_server_filters(predicates, term=None):
+    """
+    OpenAPI 조회 계획: 서버 URL 경로로 넘길 조건과 클라이언트에 남길 조건 분리
+
+    검색 조건 하나에는 값 하나만 넘길 수 있으므로 같은 조건의 두 번째 조건부터는
+    클라이언트에 남긴다. 검색어(term)는 PRDLST_NM 조건으로 먼저 쓴다.
+
+    Returns:
+        tuple: (서버 검색 조건 dict, 클라이언트에서 평가할 조건 리스트)
+
+    Raises:
+        ValueError: 서버에서만 평가할 수 있는 조건(SERVER_ONLY_FIELDS)을 넘길 수 없을 때
+    """
+    filters = {"PRDLST_NM": term} if term else {}
+    residual = []
+    for predicate in predicates:
+        field, op, arg = predicate.lookup or (None, None, None)
+        target = SERVER_PUSHDOWN.get((field, op))
+        if target is None or target[0] in filters or not arg:
+            if field in SERVER_ONLY_FIELDS:
+                raise ValueError(f"서버 검색 조건으로만 평가할 수 있는 조건을 넘길 수 없음: {predicate.name}"
+                                 + (f" (이미 {target[0]}={filters[target[0]]!r})" if target and target[0] in filters else ""))
+            residual.append(predicate)
+            continue
+        param, exact = target
+        filters[param] = arg
+        if not exact:
+            residual.append(predicate)
+    return filters, residual
+
+
+def _standards_extractor():
+    """
+    OpenAPI 행의 기준규격(STDR_STND)에서 산패도 추출 (check_filtering_criteria와 같은 추출기)
+
+    같은 행에 여러 산패도 규칙을 연달아 평가하므로 마지막 행의 추출 결과를 재사용한다.
+    """
+    last = [None, None]
+
+    def extract(row):
+        if last[0] is not row:
+            last[0], last[1] = row, openapi.extract_rancidity_from_standards(row.get("STDR_STND", ""))
+        return last[1]
+    return extract
+
+
+def _rule_predicate(rule, source="portal", extract=None):
+    if rule.needs and source == "openapi":
+        # OpenAPI 목록 행에는 기준규격이 있으므로 상세 페이지 없이 목록 단계에서 평가
+        def test(row):
+            return rule._test(row, extract(row)) is None
+        return Predicate(f"규칙:{rule.name}", test)
+    if rule.needs:
+        # 포털 목록에는 기준규격이 없으므로 상세 페이지에서 추출한 값으로 평가
+        def test(row):
+            rancidity = {metric: row.get(metric) for metric in portal.RANCIDITY_STANDARDS}
+            return rule._test(row, rancidity if any(v is not None for v in rancidity.values()) else None) is None
+    else:
+        def test(row):
+            return rule._test(row, None) is None
+    return Predicate(f"규칙:{rule.name}", test, needs_detail=bool(rule.needs))
+
+
+class ProductQuery:
+    """
+    지연 실행 제품 조회
+
+    products(term).where(...).with_rancidity()처럼 조건을 쌓아 두고, 반복할 때 목록을
+    페이지(구간) 단위로 받아 처리한다. 목록 데이터만 보는 조건은 상세 페이지 요청 전에 먼저
+    적용하고(조건 푸시다운), 살아남은 행만 상세 페이지를 받아 산패도 조건을 적용한다.
+    where()를 부를 때마다 새 쿼리를 돌려주므로 중간 쿼리를 재사용할 수 있다.
+
+    Args:
+        term (str): 검색어 (포털 검색어 또는 OpenAPI 제품명)
+        source (str): "portal" (식품안전나라 검색) 또는 "openapi" (I0030)
+        options (dict): 소스 옵션 (show_cnt / api_key, service_id, batch_size, total_count)
+    """
+
+    def __init__(self, term, source="portal", predicates=(), fetch_detail=False, near_duplicates=None,
+                 skipped_rules=(), **options):
+        if source not in REPORT_NO_FIELDS:
+            raise ValueError(f"지원하지 않는 소스: {source}")
+        self.term = term
+        self.source = source
+        self.predicates = list(predicates)
+        self.fetch_detail = fetch_detail
+        self.near_duplicates = near_duplicates
+        self.options = options
+        self.server_filters = None
+        # where_rules(skip_unavailable=True)로 뺀 규칙 이름
+        self.skipped_rules = list(skipped_rules)
+        self.stats = {"목록": 0, "사전탈락": 0, "상세요청": 0, "상세재사용": 0, "요청절약": 0, "묶음": 0, "결과": 0}
+
+    def _copy(self, predicates=None, fetch_detail=None, near_duplicates=None, skipped_rules=None):
+        return ProductQuery(self.term, self.source,
+                            predicates=self.predicates if predicates is None else predicates,
+                            fetch_detail=self.fetch_detail if fetch_detail is None else fetch_detail,
+                            near_duplicates=self.near_duplicates if near_duplicates is None else near_duplicates,
+                            skipped_rules=self.skipped_rules if skipped_rules is None else skipped_rules,
+                            **self.options)
+
+    def where(self, *predicates, **lookups):
+        """
+        조건 추가 (모두 AND)
+
+        Args:
+            predicates: 행(dict) -> bool 함수 (목록 데이터 조건으로 취급) 또는 Predicate
+            lookups: 필드__연산자=값 (예: ETC_RAWMTRL_NM__empty=True, 산가__le=3.0).
+                     산패도 필드 조건은 상세 페이지를 받은 뒤 평가한다.
+        """
+        added = [p if isinstance(p, Predicate) else Predicate(getattr(p, "__name__", "조건"), p) for p in predicates]
+        added += [_field_predicate(lookup, arg) for lookup, arg in lookups.items()]
+        if self.source == "portal":
+            for predicate in added:
+                if predicate.lookup and predicate.lookup[0] in SERVER_ONLY_FIELDS:
+                    raise ValueError(f"포털 소스에서는 평가할 수 없는 조건: {predicate.name} (source=\"openapi\" 전용)")
+        return self._copy(predicates=self.predicates + added)
+
+    def where_rules(self, config=None, skip_unavailable=False):
+        """
+        filter_rules.json 규칙 적용
+
+        OpenAPI 소스는 목록의 기준규격으로 산패도 규칙까지 평가하므로 통과 여부가
+        omega3_complate.check_filtering_criteria와 같다. 포털 소스의 산패도 규칙은 상세 페이지를 받은 뒤 평가한다.
+
+        포털 목록 행에 없는 필드(ETC_RAWMTRL_NM 등)를 보는 규칙은 모든 행을 통과시키게 되므로
+        ValueError를 낸다. skip_unavailable=True이면 그 규칙을 빼고 skipped_rules에 이름을 남긴다 (보고서에 출력).
+        """
+        config = config if config is not None else load_rules()
+        extract = _standards_extractor()
+        rules, skipped = [], []
+        for spec in config["rules"]:
+            field = spec.get("field")
+            if self.source == "portal" and field and field not in PORTAL_LIST_FIELDS:
+                if not skip_unavailable:
+                    raise ValueError(f"포털 목록에 없는 필드를 쓰는 규칙: {spec['name']} ({field}) - "
+                                     f"source=\"openapi\"를 쓰거나 skip_unavailable=True로 건너뛰세요")
+                skipped.append(spec["name"])
+                continue
+            rules.append(_rule_predicate(Rule(spec), self.source, extract))
+        return self._copy(predicates=self.predicates + rules, skipped_rules=self.skipped_rules + skipped)
+
+    def with_rancidity(self):
+        """살아남은 행의 상세 페이지를 받아 산패도 정보와 기준 판정 추가"""
+        return self._copy(fetch_detail=True)
+
+    def group_near_duplicates(self, threshold=0.8):
+        """
+        거의 같은 제품(제품명/원재료/기준규격 MinHash 유사도 >= threshold)끼리 묶어 "클러스터" 컬럼 추가
+
+        묶음 번호는 보고서에서 중복을 줄이기 위한 표시일 뿐이며 상세 페이지(산패도 값)는 신고번호별로
+        따로 받는다. 뒤에 나온 제품이 앞의 묶음들을 합칠 수 있으므로 결과는 목록을 모두 처리한 뒤에
+        최종 묶음 번호와 함께 반환된다. 포털 목록에는 기준규격이 없어 제품명만 비교되므로 OpenAPI 소스에서
+        쓰는 것을 권장한다.
+        """
+        return self._copy(near_duplicates=threshold)
+
+    # -----------------------------------------------------------------
+    # 실행
+    # -----------------------------------------------------------------
+
+    def _pages(self, filters):
+        if self.source == "portal":
+            yield from self._portal_pages()
+        else:
+            yield from self._openapi_pages(filters)
+
+    def _portal_pages(self):
+        show_cnt = self.options.get("show_cnt", 10)
+        limiter = RateLimiter(portal.SEARCH_INTERVAL)
+        page, total_pages = 1, 1
+        while page <= total_pages:
+            limiter.wait()
+            data = portal.search_omega3_products(page, self.term, show_cnt)
+            if not data:
+                return
+            if page == 1:
+                total_pages = (int(data[0].get("total_count", 0)) + show_cnt - 1) // show_cnt
+            yield [portal.build_product_info(item) for item in data]
+            page += 1
+
+    def _openapi_pages(self, filters):
+        batch_size = self.options.get("batch_size", 100)
+        total_count = self.options.get("total_count", 1400)
+        limiter = RateLimiter(OPENAPI_INTERVAL)
+        for start_idx in range(1, total_count + 1, batch_size):
+            limiter.wait()
+            end_idx = min(start_idx + batch_size - 1, total_count)
+            # 요청 실패는 빈 결과가 아니라 예외 (조용히 결과가 잘리지 않도록)
+            rows, server_total = openapi.fetch_api_batch(
+                self.options["api_key"], self.options.get("service_id", "I0030"), start_idx, end_idx,
+                product_name=None, filters=filters)
+            if not rows:
+                return
+            yield rows
+            if len(rows) < batch_size or (server_total is not None and end_idx >= server_total):
+                return
+
+    def __iter__(self):
+        if not self.near_duplicates:
+            yield from self._scan()
+            return
+        # 묶음 번호는 모든 행을 넣은 뒤의 최종 대표 기준으로 매김
+        rows = list(self._scan())
+        clusters = cluster_rows(rows, threshold=self.near_duplicates)
+        self.stats["묶음"] = len(set(clusters))
+        for row, cluster in zip(rows, clusters):
+            row["클러스터"] = cluster
+            yield row
+
+    def _scan(self):
+        pushed = [p for p in self.predicates if not p.needs_detail]
+        post = [p for p in self.predicates if p.needs_detail]
+        filters = None
+        if self.source == "openapi":
+            # 목록 조건 중 서버가 처리할 수 있는 것은 URL 경로로 넘겨 받는 행 자체를 줄임
+            filters, pushed = plan_server_filters(pushed, self.term)
+            self.server_filters = filters
+        fetch_detail = self.fetch_detail or bool(post)
+        report_no_field = REPORT_NO_FIELDS[self.source]
+        detail_limiter = RateLimiter(DETAIL_INTERVAL)
+
+        for rows in self._pages(filters):
+            survivors = []
+            for row in rows:
+                self.stats["목록"] += 1
+                if all(predicate(row) for predicate in pushed):
+                    survivors.append(dict(row))
+                else:
+                    self.stats["사전탈락"] += 1
+                    if fetch_detail and row.get(report_no_field):
+                        self.stats["요청절약"] += 1
+
+            if fetch_detail:
+                # 페이지의 살아남은 행은 상세 요청을 먼저 모두 넘기고 (파싱은 프로세스 풀) 순서대로 결과 병합
+                pending = []
+                for row in survivors:
+                    report_no = row.get(report_no_field)
+                    fetched = []
+                    future = None
+                    if report_no:
+                        # 같은 신고번호만 요청을 공유 (submit_product_detail의 중복 요청 합치기)
+                        future = portal.submit_product_detail(
+                            report_no, self.term, before_fetch=lambda: (detail_limiter.wait(), fetched.append(True)))
+                        self.stats["상세요청" if fetched else "상세재사용"] += 1
+                    pending.append((row, future))
+                survivors = []
+                for row, future in pending:
+                    rancidity_info = None
+                    if future is not None:
+                        try:
+                            _, rancidity_info = future.result()
+                        except Exception as e:
+                            print(f"  상세 페이지 파싱 오류 ({row.get(report_no_field)}): {e}")
+                    if rancidity_info:
+                        row.update(rancidity_info)
+                        row.update(portal.check_rancidity_standards(rancidity_info))
+                    survivors.append(row)
+
+            for row in survivors:
+                if all(predicate(row) for predicate in post):
+                    self.stats["결과"] += 1
+                    yield row
+
+    def all(self):
+        """쿼리를 실행해 결과 리스트 반환"""
+        started = time.perf_counter()
+        results = list(self)
+        self.print_report(time.perf_counter() - started)
+        return results
+
+    def print_report(self, elapsed=None):
+        """조건별 평가/탈락 수와 피한 상세 요청 수 출력"""
+        stats = self.stats
+        print(f"\n🔎 조회 결과: 목록 {stats['목록']}개 → 결과 {stats['결과']}개"
+              + (f" ({elapsed:.1f}초)" if elapsed is not None else ""))
+        if self.server_filters:
+            print(f"- 서버 검색 조건: {self.server_filters}")
+        print(f"- 상세 페이지 요청 {stats['상세요청']}건 (재사용 {stats['상세재사용']}건), "
+              f"목록 조건으로 피한 요청 {stats['요청절약']}건")
+        if self.skipped_rules:
+            print(f"- ⚠️ {self.source} 목록에 필드가 없어 적용하지 않은 규칙: {', '.join(self.skipped_rules)}")
+        if self.near_duplicates:
+            print(f"- 거의 같은 제품 묶음: 결과 {stats['결과']}개 → {stats['묶음']}개 묶음 (유사도 {self.near_duplicates} 이상)")
+        for predicate in self.predicates:
+            stage = "상세 후" if predicate.needs_detail else "상세 전"
+            print(f"  [{stage}] {predicate.name}: 평가 {predicate.evaluated}, 탈락 {predicate.rejected}")
+
+
+def products(term="셀로닉스", source="portal", **options):
+    """
+    제품 조회 쿼리 시작
+
+    사용 예:
+        products("셀로닉스").where(제품명__not_contains="샘플").with_rancidity().where(산가__le=3.0).all()
+        products("오메가3", source="openapi", api_key=KEY).where_rules().all()
+        products("오메가3", source="openapi", api_key=KEY).where(BSSH_NM__contains="...", CHNG_DT__ge="20240101").all()
+        products("오메가3", source="openapi", api_key=KEY).group_near_duplicates().with_rancidity().all()
+    """
+    return ProductQuery(term, source, **options)
@@ -0,0 +1,178 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from filter_rules import rancidity_thresholds
+
+METRICS = ["산가", "과산화물가", "아니시딘가", "총산화가"]
+
+# 수집 결과마다 다른 컬럼 이름 (main.save_results / save_filtered_products_to_csv / OpenAPI 원본)
+NAME_COLUMNS = ("제품명", "품목명", "PRDLST_NM")
+COMPANY_COLUMNS = ("업소명", "BSSH_NM")
+REPORT_NO_COLUMNS = ("신고번호", "품목제조번호", "PRDLST_REPORT_NO")
+DATE_COLUMNS = ("등록일", "허가일자", "PRMS_DT")
+STANDARD_COLUMNS = ("기준규격", "STDR_STND")
+
+# 기준규격 텍스트에서 항목 값 추출 (omega3_complate.extract_rancidity_from_standards 패턴을 하나로 합친 것)
+METRIC_PATTERNS = {
+    "산가": r"산가\s*[:：]?\s*([0-9.]+)\s*이하",
+    "과산화물가": r"과산화물가\s*[:：]?\s*([0-9.]+)\s*이하",
+    "아니시딘가": r"(?:아니시딘가|애니시딘가)\s*[:：]?\s*([0-9.]+)\s*이하",
+    "총산화가": r"(?i:총산화가|총\s*옥시가|totox)\s*[:：]?\s*([0-9.]+)\s*이하",
+}
+
+DEFAULT_PERCENTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+def _first_column(df, candidates):
+    for column in candidates:
+        if column in df.columns:
+            return column
+    return None
+
+
+def load_dataset(source):
+    """
+    수집 결과(CSV 경로 또는 DataFrame)를 분석용 타입 컬럼으로 정리
+
+    산패도 컬럼이 없고 기준규격 텍스트만 있으면(OpenAPI 결과) 정규식으로 한 번에 추출한다.
+
+    Returns:
+        DataFrame: 제품명, 업소명(category), 신고번호, 허가연도(Int16), 산패도 4개(float64), TOTOX(float64)
+    """
+    df = pd.read_csv(source, dtype=str, encoding="utf-8-sig") if isinstance(source, str) else source
+    data = pd.DataFrame(index=df.index)
+    for target, candidates in (("제품명", NAME_COLUMNS), ("업소명", COMPANY_COLUMNS), ("신고번호", REPORT_NO_COLUMNS)):
+        column = _first_column(df, candidates)
+        data[target] = df[column].astype("string") if column else pd.Series(pd.NA, index=df.index, dtype="string")
+    data["업소명"] = data["업소명"].str.strip().astype("category")
+
+    date_column = _first_column(df, DATE_COLUMNS)
+    if date_column:
+        year = pd.to_numeric(df[date_column].astype("string").str.extract(r"((?:19|20)\d{2})", expand=False),
+                             errors="coerce")
+        data["허가연도"] = year.astype("Int16")
+    else:
+        data["허가연도"] = pd.Series(pd.NA, index=df.index, dtype="Int16")
+
+    standard_column = _first_column(df, STANDARD_COLUMNS)
+    for metric in METRICS:
+        if metric in df.columns:
+            values = pd.to_numeric(df[metric], errors="coerce")
+        elif standard_column:
+            values = pd.to_numeric(df[standard_column].astype("string").str.extract(METRIC_PATTERNS[metric], expand=False),
+                                   errors="coerce")
+        else:
+            values = pd.Series(np.nan, index=df.index)
+        data[metric] = values.astype("float64")
+
+    # TOTOX: 총산화가가 없으면 2 × 과산화물가 + 아니시딘가
+    computed = 2 * data["과산화물가"].to_numpy() + data["아니시딘가"].to_numpy()
+    data["TOTOX"] = np.where(np.isnan(data["총산화가"].to_numpy()), computed, data["총산화가"].to_numpy())
+    return data
+
+
+def distribution(data, by="업소명", percentiles=DEFAULT_PERCENTILES):
+    """
+    그룹(업소명/허가연도)별 산패도 항목 분포
+
+    Returns:
+        DataFrame: 행=그룹, 열=(항목, 통계) - count, mean, std, min, 백분위수, max
+    """
+    grouped = data.groupby(by, observed=True)[METRICS + ["TOTOX"]]
+    return grouped.describe(percentiles=list(percentiles))
+
+
+def pass_rates(data, thresholds=None, by=None):
+    """
+    기준 항목별 통과율 (값이 있는 제품 기준)
+
+    Args:
+        data (DataFrame): load_dataset() 결과
+        thresholds (dict): 항목 -> 기준값 (기본값: filter_rules.json)
+        by (str): 그룹 컬럼 (없으면 전체)
+
+    Returns:
+        DataFrame: 항목별 측정 수, 통과 수, 통과율(%) + 전체 기준 통과(값이 있는 항목 모두 통과)
+    """
+    thresholds = thresholds or rancidity_thresholds()
+    metrics = [metric for metric in METRICS if metric in thresholds]
+    values = data[metrics].to_numpy()
+    limits = np.array([thresholds[metric] for metric in metrics])
+    measured = ~np.isnan(values)
+    passed = measured & (values <= limits)
+
+    frame = pd.DataFrame(index=data.index)
+    for i, metric in enumerate(metrics):
+        frame[f"{metric}_측정"] = measured[:, i]
+        frame[f"{metric}_통과"] = passed[:, i]
+    any_measured = measured.any(axis=1)
+    frame["전체_측정"] = any_measured
+    frame["전체_통과"] = any_measured & (passed | ~measured).all(axis=1)
+
+    keys = [data[by]] if by else [np.zeros(len(data), dtype=np.int8)]
+    sums = frame.groupby(keys, observed=True).sum()
+    rows = {}
+    for name in metrics + ["전체"]:
+        count = sums[f"{name}_측정"]
+        ok = sums[f"{name}_통과"]
+        rate = np.where(count > 0, ok / count.where(count > 0, 1) * 100, np.nan)
+        rows[(name, "측정")] = count
+        rows[(name, "통과")] = ok
+        rows[(name, "통과율%")] = pd.Series(rate, index=sums.index).round(1)
+    result = pd.DataFrame(rows)
+    if not by:
+        result = result.iloc[0].unstack().reindex(metrics + ["전체"])
+        result = result.astype({"측정": int, "통과": int})
+    return result
+
+
+def lowest_totox(data, k=10):
+    """TOTOX가 가장 낮은 제품 k개 (argpartition으로 전체 정렬 없이 선택)"""
+    totox = data["TOTOX"].to_numpy()
+    candidates = np.flatnonzero(~np.isnan(totox))
+    if len(candidates) > k:
+        candidates = candidates[np.argpartition(totox[candidates], k)[:k]]
+    candidates = candidates[np.argsort(totox[candidates], kind="stable")]
+    return data.iloc[candidates][["제품명", "업소명", "신고번호", "허가연도"] + METRICS + ["TOTOX"]]
+
+
+def print_summary(data, by=("업소명", "허가연도"), top=10):
+    """분석 결과 요약 출력"""
+    with_values = int(data[METRICS].notna().any(axis=1).sum())
+    print(f"📊 제품 {len(data)}개 중 산패도 값이 있는 제품 {with_values}개")
+
+    print("\n✅ 기준 항목별 통과율")
+    print(pass_rates(data).to_string())
+
+    with pd.option_context("display.max_rows", 50, "display.width", 200):
+        for column in by:
+            if data[column].notna().any():
+                print(f"\n📈 {column}별 산패도 분포 (중앙값 / 95백분위)")
+                table = distribution(data, by=column)
+                summary = table.loc[:, (slice(None), ["count", "50%", "95%"])]
+                print(summary.sort_values(("산가", "count"), ascending=False).head(30).round(2).to_string())
+
+        print(f"\n🏆 TOTOX가 가장 낮은 제품 {top}개")
+        print(lowest_totox(data, top).to_string(index=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="수집한 산패도 데이터 분석 (분포, 통과율, TOTOX 상위)")
+    parser.add_argument("csv", nargs="?", default="omega3_rancidity_complete.csv", help="수집 결과 CSV")
+    parser.add_argument("--top", type=int, default=10, help="TOTOX 낮은 제품 수")
+    parser.add_argument("--by", action="append", choices=["업소명", "허가연도"], help="분포 그룹 (기본값: 둘 다)")
+    parser.add_argument("--output", help="분포 표를 저장할 CSV (그룹별 항목 통계)")
+    args = parser.parse_args()
+
+    data = load_dataset(args.csv)
+    by = tuple(args.by or ("업소명", "허가연도"))
+    print_summary(data, by=by, top=args.top)
+    if args.output:
+        distribution(data, by=by[0]).to_csv(args.output, encoding="utf-8-sig")
+        print(f"\n📄 {by[0]}별 분포가 {args.output} 파일로 저장되었습니다.")
+
+
+if __name__ == "__main__":
+    main()
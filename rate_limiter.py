@@ -0,0 +1,27 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    여러 스레드가 공유하는 최소 요청 간격 제한기
+
+    wait()를 호출한 순서대로 min_interval 초 간격의 슬롯을 배정한다.
+    """
+
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_time = 0.0
+        self.wait_time = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_time)
+            self._next_time = slot + self.min_interval
+            delay = slot - now
+            if delay > 0:
+                self.wait_time += delay
+        if delay > 0:
+            time.sleep(delay)
@@ -0,0 +1,207 @@
+import argparse
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from main import (
+    AJAX_SEARCH_URL,
+    build_product_info,
+    check_rancidity_standards,
+    normalize_report_no,
+    parse_product_detail_page,
+    save_results,
+)
+from omega3_complate import check_filtering_criteria, parse_api_response, save_filtered_products_to_csv
+from page_archive import PageArchive, SegmentReader
+
+# 워커 하나에 한 번에 넘기는 아카이브 키 수
+DEFAULT_CHUNK_SIZE = 64
+# 재처리 결과 파일 이름 앞에 붙는 기본 접두어 (실제 수집 결과 파일을 덮어쓰지 않도록)
+DEFAULT_OUTPUT_PREFIX = "reprocessed_"
+
+
+def _chunks(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _detail_chunk_job(job):
+    """
+    워커 작업: 아카이브 상세 페이지 (키, 위치) 묶음 -> {신고번호: 산패도 정보}
+
+    본문은 부모 프로세스에서 넘기지 않고 워커가 세그먼트를 직접 mmap해서 읽는다.
+    색인은 부모가 한 번만 읽고 위치를 넘기므로 워커는 색인을 다시 읽지 않는다.
+    """
+    directory, locations = job
+    reader = SegmentReader(directory)
+    results = {}
+    try:
+        for key, location in locations:
+            record = reader.read(key, location)
+            if record.status != 200:
+                continue
+            _, rancidity_info = parse_product_detail_page(record.body)
+            results[key.split(":", 1)[1]] = rancidity_info
+    finally:
+        reader.close()
+    return results
+
+
+def _range_chunk_job(job):
+    """워커 작업: 아카이브 OpenAPI 구간 (키, 위치) 묶음 -> (통과 제품, 처리 수, 탈락 사유 Counter)"""
+    directory, locations = job
+    reader = SegmentReader(directory)
+    passed_products = []
+    processed = 0
+    reasons = Counter()
+    try:
+        for key, location in locations:
+            record = reader.read(key, location)
+            if record.status != 200:
+                continue
+            body = json.loads(record.body) if ":json:" in key else record.body
+            for product in parse_api_response(body):
+                processed += 1
+                passed, reason = check_filtering_criteria(product)
+                if passed:
+                    passed_products.append(product)
+                else:
+                    reasons[reason] += 1
+    finally:
+        reader.close()
+    return passed_products, processed, reasons
+
+
+def _unique_ranges(locations):
+    """
+    같은 구간을 JSON과 XML로 모두 받아 둔 경우 JSON 하나만 남김
+
+    Returns:
+        tuple: (남긴 (키, 위치) 리스트, XML 레코드 수, 중복이라 건너뛴 수)
+    """
+    chosen = {}
+    for key, location in locations:
+        _, service, data_type, rest = key.split(":", 3)
+        range_id = (service, rest)
+        if range_id not in chosen or data_type == "json":
+            chosen[range_id] = (key, location)
+    selected = sorted(chosen.values())
+    xml_count = sum(":xml:" in key for key, _ in selected)
+    return selected, xml_count, len(locations) - len(selected)
+
+
+def _search_products(archive):
+    """아카이브의 포털 검색 응답에서 제품 기본 정보 복원 (검색 순서, 신고번호 중복 제거)"""
+    records = [record for record in archive.iter_records(f"POST:{AJAX_SEARCH_URL}") if record.status == 200]
+    records.sort(key=lambda record: int(record.params.get("start_idx") or 0))
+    products = []
+    seen = set()
+    for record in records:
+        try:
+            items = json.loads(record.body)
+        except ValueError:
+            continue
+        if not isinstance(items, list):
+            continue
+        for item in items:
+            product_info = build_product_info(item)
+            report_no = normalize_report_no(product_info["prdlstReportNo"])
+            if report_no in seen:
+                continue
+            seen.add(report_no)
+            products.append(product_info)
+    return products
+
+
+def reprocess_portal(directory, executor, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    아카이브된 포털 검색/상세 페이지로 산패도 추출과 기준 판정을 다시 실행
+
+    Returns:
+        list: main.extract_product_info(include_rancidity=True)와 같은 형식의 제품 리스트
+    """
+    archive = PageArchive(directory, read_only=True)
+    try:
+        products = _search_products(archive)
+        detail_locations = archive.locations("detail:")
+    finally:
+        archive.close()
+    print(f"🔁 포털: 검색 결과 {len(products)}개 제품, 상세 페이지 {len(detail_locations)}개 재처리")
+
+    rancidity_by_no = {}
+    jobs = [(directory, chunk) for chunk in _chunks(detail_locations, chunk_size)]
+    for results in executor.map(_detail_chunk_job, jobs):
+        rancidity_by_no.update(results)
+
+    found = 0
+    for product_info in products:
+        rancidity_info = rancidity_by_no.get(normalize_report_no(product_info["prdlstReportNo"]))
+        if rancidity_info:
+            product_info.update(rancidity_info)
+            product_info.update(check_rancidity_standards(rancidity_info))
+            found += 1
+    print(f"📊 포털: {found}/{len(products)}개 제품에서 산패도 정보 발견")
+    return products
+
+
+def reprocess_openapi(directory, executor):
+    """
+    아카이브된 OpenAPI 구간 응답에 필터 기준을 다시 적용
+
+    Returns:
+        list: 기준을 통과한 제품 리스트
+    """
+    archive = PageArchive(directory, read_only=True)
+    try:
+        range_locations, xml_count, duplicates = _unique_ranges(archive.locations("range:"))
+    finally:
+        archive.close()
+    print(f"🔁 OpenAPI: 구간 응답 {len(range_locations)}개 재처리 (XML {xml_count}개"
+          + (f", JSON과 중복된 XML {duplicates}개 제외" if duplicates else "") + ")")
+
+    passed_products = []
+    processed = 0
+    reasons = Counter()
+    # 구간 하나에 제품이 batch_size(100)개 안팎이므로 구간 하나씩 나눔
+    jobs = [(directory, [item]) for item in range_locations]
+    for passed, count, chunk_reasons in executor.map(_range_chunk_job, jobs):
+        passed_products.extend(passed)
+        processed += count
+        reasons.update(chunk_reasons)
+
+    print(f"📊 OpenAPI: {len(passed_products)}/{processed}개 제품이 기준을 통과했습니다.")
+    for reason, count in reasons.most_common():
+        print(f"  - {reason}: {count}개")
+    return passed_products
+
+
+def main():
+    parser = argparse.ArgumentParser(description="아카이브된 원본 응답으로 추출/필터링을 네트워크 없이 다시 실행")
+    parser.add_argument("archive", nargs="?", default=os.environ.get("CRAWL_ARCHIVE_DIR"),
+                        help="page_archive 폴더 (기본값: CRAWL_ARCHIVE_DIR)")
+    parser.add_argument("--workers", type=int, default=None, help="워커 프로세스 수 (기본값: CPU 코어 수)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="워커당 상세 페이지 묶음 크기")
+    parser.add_argument("--only", choices=["portal", "openapi"], help="한쪽만 재처리")
+    parser.add_argument("--output-prefix", default=DEFAULT_OUTPUT_PREFIX,
+                        help=f"결과 파일 이름 접두어 (기본값: {DEFAULT_OUTPUT_PREFIX}, 실제 수집 결과와 구분)")
+    parser.add_argument("--record-changes", action="store_true",
+                        help="포털 결과를 이전 스냅샷과 비교해 변경 피드에 기록 (기본값: 기록하지 않음)")
+    args = parser.parse_args()
+    if not args.archive:
+        parser.error("아카이브 폴더를 지정하세요 (인자 또는 CRAWL_ARCHIVE_DIR)")
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        if args.only != "openapi":
+            products = reprocess_portal(args.archive, executor, args.chunk_size)
+            if products:
+                save_results(products, output_prefix=args.output_prefix, record_changes=args.record_changes)
+        if args.only != "portal":
+            passed_products = reprocess_openapi(args.archive, executor)
+            save_filtered_products_to_csv(passed_products, filename=args.output_prefix + "omega3_filtered_products.csv")
+    print(f"\n🎉 재처리 완료 ({time.perf_counter() - started:.1f}초, 네트워크 요청 0건)")
+
+
+if __name__ == "__main__":
+    main()
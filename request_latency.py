@@ -0,0 +1,218 @@
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+import urllib3.connection
+
+# 측정 단계 (total은 요청 시작부터 본문 수신 완료까지)
+PHASES = ("dns", "connect", "tls", "ttfb", "body", "total")
+
+_local = threading.local()
+
+
+class HdrHistogram:
+    """
+    HDR(High Dynamic Range) 히스토그램
+
+    값(마이크로초)을 유효숫자 significant_digits 자리 정밀도의 로그-선형 버킷에 세어
+    1µs부터 수십 분까지의 지연 시간을 일정한 상대 오차로 기록한다. 메모리는 관측된
+    버킷 수에만 비례한다.
+    """
+
+    def __init__(self, significant_digits=3):
+        # 2 * 10^digits 이상을 담는 2의 거듭제곱 크기의 하위 버킷
+        self.sub_bucket_bits = (2 * 10 ** significant_digits - 1).bit_length()
+        self.counts = {}
+        self.total_count = 0
+        self.min_value = None
+        self.max_value = 0
+        self.sum = 0
+
+    def _index(self, value):
+        shift = max(0, value.bit_length() - self.sub_bucket_bits)
+        return shift, value >> shift
+
+    def record(self, value, count=1):
+        value = max(0, int(value))
+        key = self._index(value)
+        self.counts[key] = self.counts.get(key, 0) + count
+        self.total_count += count
+        self.sum += value * count
+        self.max_value = max(self.max_value, value)
+        self.min_value = value if self.min_value is None else min(self.min_value, value)
+
+    def value_at_percentile(self, percentile):
+        """percentile(0~100) 위치 값 (해당 버킷의 최대 동등값, 최대 관측값 이하)"""
+        if not self.total_count:
+            return 0
+        target = max(1, int(percentile / 100 * self.total_count + 0.5))
+        seen = 0
+        for shift, sub in sorted(self.counts, key=lambda key: key[1] << key[0]):
+            seen += self.counts[(shift, sub)]
+            if seen >= target:
+                return min(((sub + 1) << shift) - 1, self.max_value)
+        return self.max_value
+
+    def mean(self):
+        return self.sum / self.total_count if self.total_count else 0.0
+
+
+class EndpointStats:
+    """엔드포인트 하나의 단계별 히스토그램과 처리량 정보"""
+
+    def __init__(self):
+        self.histograms = {phase: HdrHistogram() for phase in PHASES}
+        self.errors = 0
+        self.bytes = 0
+        self.first_start = None
+        self.last_end = None
+
+    def throughput(self):
+        """(요청/초, 바이트/초) - 첫 요청 시작부터 마지막 요청 종료까지 기준"""
+        if self.first_start is None or self.last_end is None or self.last_end <= self.first_start:
+            return 0.0, 0.0
+        window = self.last_end - self.first_start
+        return self.histograms["total"].total_count / window, self.bytes / window
+
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+class RequestTiming:
+    """요청 하나의 단계별 시간 (초). measure() 블록 안에서 response를 지정"""
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.response = None
+        self.bytes = None
+        self.dns = 0.0
+        self.new_conn = 0.0
+        self.connect_total = 0.0
+        self.started = time.perf_counter()
+
+    def phases(self, ended):
+        total = ended - self.started
+        connect = max(0.0, self.new_conn - self.dns)
+        tls = max(0.0, self.connect_total - self.new_conn)
+        elapsed = self.response.elapsed.total_seconds() if self.response is not None else total
+        ttfb = max(0.0, elapsed - self.dns - connect - tls)
+        body = max(0.0, total - elapsed)
+        return {"dns": self.dns, "connect": connect, "tls": tls, "ttfb": ttfb, "body": body, "total": total}
+
+
+@contextmanager
+def measure(endpoint):
+    """
+    블록 안의 HTTP 요청을 DNS/연결/TLS/첫 바이트/본문 단계로 측정해 엔드포인트 통계에 기록
+
+    사용법:
+        with measure("detail_page") as timing:
+            response = session.get(...)
+            timing.response = response
+            ...  # 스트리밍이면 본문을 다 읽을 때까지 블록 안에서
+    """
+    timing = RequestTiming(endpoint)
+    previous = getattr(_local, "timing", None)
+    _local.timing = timing
+    failed = False
+    try:
+        yield timing
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        _local.timing = previous
+        ended = time.perf_counter()
+        _record(timing, ended, failed)
+
+
+def _record(timing, ended, failed):
+    size = timing.bytes
+    if size is None and timing.response is not None:
+        raw = getattr(timing.response, "raw", None)
+        try:
+            size = raw.tell() if raw is not None else len(timing.response.content)
+        except Exception:
+            size = 0
+    with _stats_lock:
+        stats = _stats.setdefault(timing.endpoint, EndpointStats())
+        stats.first_start = timing.started if stats.first_start is None else min(stats.first_start, timing.started)
+        stats.last_end = ended if stats.last_end is None else max(stats.last_end, ended)
+        if failed or timing.response is None:
+            stats.errors += 1
+            return
+        for phase, seconds in timing.phases(ended).items():
+            stats.histograms[phase].record(seconds * 1_000_000)
+        stats.bytes += size or 0
+
+
+def get_endpoint_stats(endpoint):
+    """엔드포인트 통계 (없으면 None)"""
+    with _stats_lock:
+        return _stats.get(endpoint)
+
+
+def reset():
+    with _stats_lock:
+        _stats.clear()
+
+
+def print_latency_report():
+    """엔드포인트별 p50/p90/p99/max, 단계별 중앙값, 처리량 출력"""
+    with _stats_lock:
+        items = sorted(_stats.items())
+    if not items:
+        return
+    print("\n📡 엔드포인트별 요청 지연 시간 (ms)")
+    print(f"{'엔드포인트':<16}{'요청':>6}{'오류':>5}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}{'req/s':>8}{'KB/s':>9}")
+    for endpoint, stats in items:
+        total = stats.histograms["total"]
+        req_rate, byte_rate = stats.throughput()
+        print(f"{endpoint:<16}{total.total_count:>6}{stats.errors:>5}"
+              + "".join(f"{total.value_at_percentile(p) / 1000:>9.1f}" for p in (50, 90, 99))
+              + f"{total.max_value / 1000:>9.1f}{req_rate:>8.2f}{byte_rate / 1024:>9.1f}")
+    print(f"\n{'엔드포인트':<16}" + "".join(f"{phase + ' p50/p99':>19}" for phase in PHASES[:-1]))
+    for endpoint, stats in items:
+        print(f"{endpoint:<16}" + "".join(
+            f"{stats.histograms[phase].value_at_percentile(50) / 1000:>11.1f}/"
+            f"{stats.histograms[phase].value_at_percentile(99) / 1000:<7.1f}"
+            for phase in PHASES[:-1]))
+
+
+# ---------------------------------------------------------------------------
+# urllib3/socket 계측 (measure() 블록 안의 요청에서만 기록)
+# ---------------------------------------------------------------------------
+
+def _timed(attribute):
+    def decorate(func):
+        def wrapper(*args, **kwargs):
+            timing = getattr(_local, "timing", None)
+            if timing is None:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                setattr(timing, attribute, getattr(timing, attribute) + time.perf_counter() - started)
+        wrapper.__wrapped__ = func
+        wrapper._request_latency = True
+        return wrapper
+    return decorate
+
+
+def install():
+    """
+    DNS 조회, TCP 연결, TLS 연결 시간 측정을 위해 socket/urllib3 함수 계측 (한 번만)
+
+    프로세스 전역 함수를 바꾸므로 import 시에는 하지 않고 실행 진입점에서 호출한다.
+    호출하지 않으면 measure()는 dns/connect/tls를 0으로 기록한다.
+    """
+    if getattr(socket.getaddrinfo, "_request_latency", False):
+        return
+    socket.getaddrinfo = _timed("dns")(socket.getaddrinfo)
+    urllib3.connection.HTTPConnection._new_conn = _timed("new_conn")(urllib3.connection.HTTPConnection._new_conn)
+    urllib3.connection.HTTPConnection.connect = _timed("connect_total")(urllib3.connection.HTTPConnection.connect)
+    if "connect" in urllib3.connection.HTTPSConnection.__dict__:
+        urllib3.connection.HTTPSConnection.connect = _timed("connect_total")(urllib3.connection.HTTPSConnection.connect)
@@ -0,0 +1,94 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class _Call:
+    """진행 중인 호출 하나 (먼저 요청한 스레드가 실행, 나머지는 결과를 기다림)"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    같은 키에 대한 중복 호출을 하나로 합치는 single-flight 계층
+
+    같은 키로 동시에 do()가 호출되면 처음 호출한 스레드만 fn을 실행하고, 나머지는 그
+    결과를 함께 받는다. remember=True이면 성공한 결과(None 제외)를 최근 max_results개까지
+    보관해 이후의 같은 키 요청도 실행 없이 돌려준다. 결과가 Future이면 예외로 끝나거나
+    취소될 때 보관에서 빼므로 다음 요청은 다시 실행된다.
+    """
+
+    def __init__(self, remember=True, max_results=4096):
+        self.remember = remember
+        self.max_results = max_results
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._results = OrderedDict()
+        self.requested = 0
+        self.executed = 0
+        self.saved = 0
+
+    def do(self, key, fn):
+        """key에 대한 fn() 결과 반환 (이미 진행 중이거나 끝난 호출이 있으면 그 결과 공유)"""
+        with self._lock:
+            self.requested += 1
+            if key in self._results:
+                self.saved += 1
+                self._results.move_to_end(key)
+                return self._results[key]
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+            else:
+                self.saved += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if self.remember and call.error is None and call.value is not None:
+                    self._remember(key, call.value)
+            call.done.set()
+        if isinstance(call.value, Future):
+            call.value.add_done_callback(lambda future: self._forget_failed(key, future))
+        return call.value
+
+    def _remember(self, key, value):
+        """결과 보관 (max_results를 넘으면 가장 오래 쓰지 않은 것부터 삭제, _lock 안에서 호출)"""
+        self._results[key] = value
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_results:
+            self._results.popitem(last=False)
+
+    def _forget_failed(self, key, future):
+        """보관된 Future가 예외/취소로 끝났으면 삭제"""
+        if future.cancelled() or future.exception() is not None:
+            with self._lock:
+                if self._results.get(key) is future:
+                    del self._results[key]
+
+    def forget(self, key):
+        """보관된 결과 삭제 (다음 요청은 다시 실행)"""
+        with self._lock:
+            self._results.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {"요청": self.requested, "실행": self.executed, "절약": self.saved}
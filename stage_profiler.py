@@ -0,0 +1,293 @@
+import cProfile
+import functools
+import html
+import os
+import pstats
+import sys
+import threading
+import time
+import zlib
+from collections import Counter, defaultdict
+
+
+class StageProfiler:
+    """
+    크롤링 단계별 프로파일러
+
+    instrument()로 감싼 함수들을 단계(search, detail_fetch, parse ...)로 보고 단계별
+    wall/CPU 시간을 기록한다. 함께 쓰는 프로파일러는 두 가지:
+      - "sample": 백그라운드 스레드가 모든 스레드의 스택을 주기적으로 수집 (오버헤드 작음)
+      - "cprofile": cProfile 결정적 프로파일링 (profile()을 호출한 스레드만)
+    결과는 단계별 표, collapsed stack(.folded), 플레임그래프(.svg)로 저장한다.
+    단계 시간은 중첩된 하위 단계를 포함한 시간이다.
+
+    Args:
+        mode (str): "sample" 또는 "cprofile"
+        output_dir (str): 결과 파일 폴더
+        interval (float): 샘플링 간격(초)
+    """
+
+    def __init__(self, mode="sample", output_dir="profile_output", interval=0.005):
+        if mode not in ("sample", "cprofile"):
+            raise ValueError(f"지원하지 않는 프로파일 모드: {mode}")
+        self.mode = mode
+        self.output_dir = output_dir
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._thread_stages = {}
+        self.stage_stats = defaultdict(lambda: {"calls": 0, "wall": 0.0, "cpu": 0.0})
+        self.samples = Counter()
+        self._restore = []
+        self._profile = None
+        self._sampler = None
+        self._stop = threading.Event()
+        self.wall_time = 0.0
+
+    # -----------------------------------------------------------------
+    # 단계 계측
+    # -----------------------------------------------------------------
+
+    def instrument(self, module, stages):
+        """
+        module의 함수들을 단계 측정 래퍼로 교체
+
+        Args:
+            module: 대상 모듈 (모듈 전역 이름으로 호출되는 함수만 측정됨)
+            stages (dict): 단계 이름 -> 함수 이름
+        """
+        for stage, func_name in stages.items():
+            original = getattr(module, func_name)
+            setattr(module, func_name, self._wrap(stage, original))
+            self._restore.append((module, func_name, original))
+
+    def _wrap(self, stage, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            stack = self._stage_stack()
+            stack.append(stage)
+            started_wall = time.perf_counter()
+            started_cpu = time.thread_time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                wall = time.perf_counter() - started_wall
+                cpu = time.thread_time() - started_cpu
+                stack.pop()
+                with self._lock:
+                    stats = self.stage_stats[stage]
+                    stats["calls"] += 1
+                    stats["wall"] += wall
+                    stats["cpu"] += cpu
+        return wrapper
+
+    def _stage_stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+            with self._lock:
+                self._thread_stages[threading.get_ident()] = stack
+        return stack
+
+    # -----------------------------------------------------------------
+    # 실행
+    # -----------------------------------------------------------------
+
+    def profile(self, func, *args, **kwargs):
+        """func를 프로파일링하며 실행하고 결과 파일 저장"""
+        started = time.perf_counter()
+        try:
+            if self.mode == "cprofile":
+                self._profile = cProfile.Profile()
+                return self._profile.runcall(func, *args, **kwargs)
+            self._sampler = threading.Thread(target=self._sample_loop, name="stage-profiler", daemon=True)
+            self._sampler.start()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._stop.set()
+                self._sampler.join()
+        finally:
+            self.wall_time = time.perf_counter() - started
+            for module, func_name, original in reversed(self._restore):
+                setattr(module, func_name, original)
+            self._restore.clear()
+            self.write_results()
+
+    def _sample_loop(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                thread_stages = {ident: list(stack) for ident, stack in self._thread_stages.items()}
+            for ident, frame in frames.items():
+                if ident == own_id:
+                    continue
+                names = []
+                while frame is not None:
+                    code = frame.f_code
+                    names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                names.reverse()
+                stages = thread_stages.get(ident) or ["(단계 밖)"]
+                self.samples["[" + "/".join(stages) + "];" + ";".join(names)] += 1
+
+    # -----------------------------------------------------------------
+    # 결과
+    # -----------------------------------------------------------------
+
+    def stage_rows(self):
+        rows = []
+        with self._lock:
+            items = sorted(self.stage_stats.items(), key=lambda item: -item[1]["wall"])
+        for stage, stats in items:
+            rows.append({
+                "stage": stage,
+                "calls": stats["calls"],
+                "wall_s": stats["wall"],
+                "cpu_s": stats["cpu"],
+                "wall_avg_ms": stats["wall"] / stats["calls"] * 1000 if stats["calls"] else 0.0,
+                "cpu_pct": stats["cpu"] / stats["wall"] * 100 if stats["wall"] else 0.0,
+                "share_pct": stats["wall"] / self.wall_time * 100 if self.wall_time else 0.0,
+            })
+        return rows
+
+    def format_stage_table(self):
+        lines = [
+            f"전체 실행 시간: {self.wall_time:.2f}초 (모드: {self.mode}, 단계 시간은 하위 단계 포함)",
+            f"{'단계':<14}{'호출':>7}{'wall(s)':>10}{'CPU(s)':>10}{'평균(ms)':>10}{'CPU%':>7}{'비중%':>7}",
+        ]
+        for row in self.stage_rows():
+            lines.append(
+                f"{row['stage']:<14}{row['calls']:>7}{row['wall_s']:>10.2f}{row['cpu_s']:>10.2f}"
+                f"{row['wall_avg_ms']:>10.1f}{row['cpu_pct']:>7.1f}{row['share_pct']:>7.1f}"
+            )
+        return "\n".join(lines)
+
+    def collapsed_stacks(self):
+        """collapsed stack 형식 {"a;b;c": 값} (sample: 샘플 수, cprofile: 마이크로초)"""
+        if self.mode == "sample":
+            return dict(self.samples)
+        return _pstats_to_collapsed(pstats.Stats(self._profile))
+
+    def write_results(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        table = self.format_stage_table()
+        print("\n⏱️ 단계별 프로파일")
+        print(table)
+
+        with open(os.path.join(self.output_dir, "stages.txt"), "w", encoding="utf-8") as f:
+            f.write(table + "\n")
+        with open(os.path.join(self.output_dir, "stages.csv"), "w", encoding="utf-8-sig") as f:
+            f.write("stage,calls,wall_s,cpu_s,wall_avg_ms,cpu_pct,share_pct\n")
+            for row in self.stage_rows():
+                f.write(f"{row['stage']},{row['calls']},{row['wall_s']:.6f},{row['cpu_s']:.6f},"
+                        f"{row['wall_avg_ms']:.3f},{row['cpu_pct']:.1f},{row['share_pct']:.1f}\n")
+
+        if self.mode == "cprofile":
+            self._profile.dump_stats(os.path.join(self.output_dir, "profile.prof"))
+            with open(os.path.join(self.output_dir, "profile_stats.txt"), "w", encoding="utf-8") as f:
+                pstats.Stats(self._profile, stream=f).sort_stats("cumulative").print_stats(80)
+
+        stacks = self.collapsed_stacks()
+        with open(os.path.join(self.output_dir, "stacks.folded"), "w", encoding="utf-8") as f:
+            for stack, value in sorted(stacks.items()):
+                if value > 0:
+                    f.write(f"{stack} {value}\n")
+        unit = "samples" if self.mode == "sample" else "us"
+        with open(os.path.join(self.output_dir, "flamegraph.svg"), "w", encoding="utf-8") as f:
+            f.write(render_flamegraph(stacks, title=f"crawl profile ({self.mode})", unit=unit))
+        print(f"📄 프로파일 결과가 {self.output_dir}/ 폴더에 저장되었습니다. (stages.txt, stacks.folded, flamegraph.svg)")
+
+
+def _pstats_to_collapsed(stats, max_depth=64):
+    """
+    cProfile 호출 그래프를 collapsed stack으로 근사 변환 (값: 자체 시간 마이크로초)
+
+    각 함수의 자체 시간을 호출자별 누적 시간 비율로 나눠 루트부터 경로를 따라 배분한다.
+    """
+    entries = stats.stats
+    callees = defaultdict(list)
+    for func, (_, _, _, cumulative, callers) in entries.items():
+        for caller, edge in callers.items():
+            callees[caller].append((func, edge[3]))
+
+    def label(func):
+        filename, line, name = func
+        return f"{name} ({os.path.basename(filename)}:{line})"
+
+    collapsed = Counter()
+
+    def visit(func, path, fraction, seen):
+        _, _, self_time, cumulative, _ = entries[func]
+        path = path + [label(func)]
+        collapsed[";".join(path)] += int(self_time * fraction * 1_000_000)
+        if len(path) >= max_depth or cumulative <= 0:
+            return
+        for child, edge_cumulative in callees.get(func, []):
+            if child in seen or child not in entries:
+                continue
+            child_cumulative = entries[child][3]
+            if child_cumulative <= 0:
+                continue
+            share = fraction * min(edge_cumulative / child_cumulative, 1.0)
+            if share * child_cumulative >= 1e-6:
+                visit(child, path, share, seen | {child})
+
+    roots = [func for func, (_, _, _, _, callers) in entries.items() if not callers]
+    for root in roots:
+        visit(root, [], 1.0, {root})
+    return dict(collapsed)
+
+
+def render_flamegraph(stacks, title="flamegraph", unit="samples", width=1200, row_height=16):
+    """collapsed stack을 간단한 독립 실행형 SVG 플레임그래프로 변환"""
+    root = {"name": "all", "value": 0, "children": {}}
+    for stack, value in stacks.items():
+        if value <= 0:
+            continue
+        node = root
+        node["value"] += value
+        for name in stack.split(";"):
+            node = node["children"].setdefault(name, {"name": name, "value": 0, "children": {}})
+            node["value"] += value
+
+    rects = []
+    max_depth = [0]
+    total = root["value"] or 1
+
+    def layout(node, x, depth):
+        max_depth[0] = max(max_depth[0], depth)
+        rects.append((node, x, depth))
+        child_x = x
+        for child in sorted(node["children"].values(), key=lambda n: n["name"]):
+            layout(child, child_x, depth + 1)
+            child_x += child["value"]
+
+    layout(root, 0, 0)
+    height = (max_depth[0] + 1) * row_height + 40
+    scale = (width - 20) / total
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" font-family="monospace" font-size="11">',
+        f'<text x="10" y="18" font-size="14">{html.escape(title)} (total {root["value"]} {unit})</text>',
+    ]
+    for node, x, depth in rects:
+        w = node["value"] * scale
+        if w < 0.3:
+            continue
+        y = height - (depth + 1) * row_height - 4
+        hue = 20 + zlib.crc32(node["name"].encode("utf-8")) % 40
+        name = html.escape(node["name"])
+        pct = node["value"] / total * 100
+        parts.append(
+            f'<g><title>{name} ({node["value"]} {unit}, {pct:.2f}%)</title>'
+            f'<rect x="{10 + x * scale:.2f}" y="{y}" width="{w:.2f}" height="{row_height - 1}" '
+            f'fill="hsl({hue},85%,60%)"/>'
+        )
+        max_chars = int(w / 7)
+        if max_chars >= 3:
+            text = node["name"] if len(node["name"]) <= max_chars else node["name"][:max_chars - 2] + ".."
+            parts.append(f'<text x="{12 + x * scale:.2f}" y="{y + row_height - 4}">{html.escape(text)}</text>')
+        parts.append("</g>")
+    parts.append("</svg>")
+    return "\n".join(parts) + "\n"
@@ -0,0 +1,100 @@
+import io
+import json
+import os
+import sys
+from urllib.parse import unquote, urlsplit
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class ChunkedBody(io.RawIOBase):
+    """한 번에 최대 chunk_size 바이트씩만 돌려주는 본문 (읽기 횟수는 reads)"""
+
+    def __init__(self, body, chunk_size):
+        self.body = body
+        self.position = 0
+        self.chunk_size = chunk_size
+        self.reads = 0
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        self.reads += 1
+        size = self.chunk_size if size is None or size < 0 else min(size, self.chunk_size)
+        chunk = self.body[self.position:self.position + size]
+        self.position += len(chunk)
+        return chunk
+
+
+class StubAdapter(BaseAdapter):
+    """
+    요청 URL을 받아 (상태 코드, 본문)을 돌려주는 함수로 응답하는 전송 계층
+
+    보낸 요청 URL은 urls에 순서대로 남는다 (경로는 unquote한 값). chunk_size를 주면 본문을
+    그 크기씩 나눠 돌려주고, 응답 본문 객체는 bodies에 남는다.
+    """
+
+    def __init__(self, respond, chunk_size=None):
+        super().__init__()
+        self.respond = respond
+        self.chunk_size = chunk_size
+        self.urls = []
+        self.bodies = []
+
+    def send(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        url = f"{parts.scheme}://{parts.netloc}{unquote(parts.path)}" + (f"?{parts.query}" if parts.query else "")
+        self.urls.append(url)
+        status, body = self.respond(url)
+        if not isinstance(body, bytes):
+            body = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        response = requests.Response()
+        response.status_code = status
+        response.headers["Content-Type"] = "application/json; charset=utf-8"
+        response.encoding = "utf-8"
+        response.raw = ChunkedBody(body, self.chunk_size) if self.chunk_size else io.BytesIO(body)
+        self.bodies.append(response.raw)
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def stub_session():
+    """respond 함수로 응답하는 requests.Session을 만드는 팩토리"""
+    def make(respond, chunk_size=None):
+        session = requests.Session()
+        adapter = StubAdapter(respond, chunk_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session, adapter
+    return make
+
+
+def openapi_body(rows, total_count=None, code="INFO-000", service_id="I0030"):
+    """I0030 JSON 응답 본문"""
+    return {service_id: {
+        "total_count": str(len(rows) if total_count is None else total_count),
+        "row": rows,
+        "RESULT": {"CODE": code, "MSG": "테스트"},
+    }}
+
+
+def openapi_xml_body(rows, total_count=None, code="INFO-000", service_id="I0030"):
+    """I0030 XML 응답 본문"""
+    row_xml = "".join(
+        f'<row id="{i}">' + "".join(f"<{tag}>{value}</{tag}>" for tag, value in row.items()) + "</row>"
+        for i, row in enumerate(rows))
+    return (
+        f'<?xml version="1.0" encoding="UTF-8"?><{service_id}>'
+        f"<total_count>{len(rows) if total_count is None else total_count}</total_count>"
+        f"{row_xml}<RESULT><MSG>테스트</MSG><CODE>{code}</CODE></RESULT></{service_id}>"
+    ).encode("utf-8")
@@ -0,0 +1,72 @@
+import time
+
+import pytest
+import requests
+
+import adaptive_requests
+
+
+def test_hedge_wins_when_primary_is_slow(monkeypatch):
+    monkeypatch.setattr(adaptive_requests, "_percentile_seconds", lambda endpoint, percentile: 0.05)
+    monkeypatch.setattr(adaptive_requests, "hedge_stats", {})
+    attempts = []
+
+    def send():
+        attempts.append(1)
+        time.sleep(1.0 if len(attempts) == 1 else 0)
+        return len(attempts)
+
+    started = time.monotonic()
+    assert adaptive_requests.hedged_call("test", send) == 2
+    assert time.monotonic() - started < 0.5
+    assert adaptive_requests.hedge_stats["test"] == {"요청": 1, "헤지": 1, "헤지승리": 1}
+
+
+def test_hedges_are_capped(monkeypatch):
+    monkeypatch.setattr(adaptive_requests, "_percentile_seconds", lambda endpoint, percentile: 0.0)
+    monkeypatch.setattr(adaptive_requests, "hedge_stats", {})
+    for _ in range(10):
+        adaptive_requests.hedged_call("test", lambda: time.sleep(0.01))
+    stats = adaptive_requests.hedge_stats["test"]
+    assert stats["요청"] == 10
+    assert stats["헤지"] <= 10 * adaptive_requests.HEDGE_MAX_RATIO + adaptive_requests.HEDGE_BURST
+
+
+class TrickleRaw:
+    """호출될 때마다 delay초 뒤 한 조각씩 돌려주는 raw 스트림"""
+
+    def __init__(self, pieces, delay):
+        self.pieces = list(pieces)
+        self.delay = delay
+
+    def read(self, amt=None, **kwargs):
+        if not self.pieces:
+            return b""
+        time.sleep(self.delay)
+        return self.pieces.pop(0)
+
+
+def trickle_response(pieces, delay):
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = TrickleRaw(pieces, delay)
+    return response
+
+
+def test_deadline_covers_whole_body_not_each_read():
+    response = trickle_response([b"x"] * 20, 0.05)
+
+    with pytest.raises(adaptive_requests.DeadlineExceeded):
+        for _ in adaptive_requests.iter_with_deadline(response, 0.3, time.monotonic(), chunk_size=1):
+            pass
+
+
+def test_consumer_time_is_not_counted():
+    response = trickle_response([b"a", b"b", b"c"], 0.01)
+
+    chunks = []
+    for chunk in adaptive_requests.iter_with_deadline(response, 0.2, time.monotonic(), chunk_size=1):
+        chunks.append(chunk)
+        time.sleep(0.1)
+
+    assert b"".join(chunks) == b"abc"
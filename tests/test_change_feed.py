@@ -0,0 +1,38 @@
+import json
+
+import pandas as pd
+
+from change_feed import record_run, write_csv_if_changed
+
+
+def _run(rows, tmp_path, passed):
+    return record_run(pd.DataFrame(rows), str(tmp_path / "snapshot.json"), str(tmp_path / "changes.jsonl"),
+                      key_func=lambda row: row["신고번호"], ignore_columns=("번호",), passed=passed,
+                      label_column="제품명")
+
+
+def test_feed_records_added_removed_and_flipped_rows(tmp_path):
+    first = [{"번호": 1, "신고번호": "1", "제품명": "A", "산가": 2.0}, {"번호": 2, "신고번호": "2", "제품명": "B", "산가": 1.0}]
+    assert _run(first, tmp_path, [True, True]) is None
+
+    # 순번만 바뀐 행은 변경이 아님
+    reordered = [dict(first[1], 번호=1), dict(first[0], 번호=2)]
+    assert _run(reordered, tmp_path, [True, True]) == []
+
+    second = [{"번호": 1, "신고번호": "1", "제품명": "A", "산가": 4.0}, {"번호": 2, "신고번호": "3", "제품명": "C", "산가": 1.0}]
+    changes = _run(second, tmp_path, [False, True])
+    assert [(change["change"], change["key"]) for change in changes] == [("added", "3"), ("removed", "2"), ("modified", "1")]
+    assert changes[2]["fields"] == {"산가": [2.0, 4.0]}
+    assert changes[2]["pass"] == [True, False]
+
+    with open(tmp_path / "changes.jsonl", encoding="utf-8") as f:
+        feed = [json.loads(line) for line in f]
+    assert [entry["label"] for entry in feed] == ["C", "B", "A"]
+
+
+def test_unchanged_csv_is_not_rewritten(tmp_path):
+    path = str(tmp_path / "out.csv")
+    df = pd.DataFrame([{"제품명": "A", "산가": 2.0}])
+    assert write_csv_if_changed(df, path)
+    assert not write_csv_if_changed(df, path)
+    assert write_csv_if_changed(df.assign(산가=3.0), path)
@@ -0,0 +1,164 @@
+import time
+
+import pytest
+import requests
+from bs4 import BeautifulSoup
+
+import main
+
+STANDARDS = "ㆍ산가 : 3.0 이하<br>ㆍ과산화물가 : 5.0 이하<br>ㆍ아니시딘가 : 20 이하<br>ㆍ총산화가 : 26 이하"
+TAIL = "<div class='footer'>" + "관련 정보 " * 3000 + "</div></body></html>"
+
+
+def page(rows, tail=TAIL):
+    """상세 페이지 본문: 탭 이름에도 마커가 있고 표 뒤에 긴 꼬리가 붙는다"""
+    return (
+        "<html><body><ul class='tab'><li>기준 및 규격</li></ul><table>"
+        + rows + "</table>" + tail
+    ).encode("utf-8")
+
+
+PAGES = {
+    "기본": page(
+        "<tr><th>제품명</th><td>테스트 오메가3</td></tr>"
+        f"<tr><th>기준 및 규격</th><td>{STANDARDS}</td></tr>"
+        "<tr><th>섭취방법</th><td>1일 1회</td></tr>"),
+    "중첩 테이블": page(
+        "<tr><th>제품명</th><td>테스트 오메가3</td></tr>"
+        "<tr><th>기준 및 규격</th><td><table><tr><td>성상</td><td>고유의 색택</td></tr></table>"
+        f"{STANDARDS}</td></tr>"
+        "<tr><th>섭취방법</th><td>1일 1회</td></tr>"),
+    "대문자 태그": page(
+        "<TR><TH>제품명</TH><TD>테스트 오메가3</TD></TR>"
+        f"<TR><TH>기준 및 규격</TH><TD>{STANDARDS}</TD></TR>"
+        "<TR><TH>섭취방법</TH><TD>1일 1회</TD></TR>"),
+    "th 없음": page(
+        "<tr><td class='label'>제품명</td><td>테스트 오메가3</td></tr>"
+        f"<tr><td class='label'>기준 및 규격</td><td>{STANDARDS}</td></tr>"
+        "<tr><td class='label'>섭취방법</td><td>1일 1회</td></tr>"),
+}
+
+
+def full_page_parse(body):
+    """행 단위 빠른 경로 없이 전체 페이지를 파싱한 기준 결과"""
+    soup = BeautifulSoup(body.decode("utf-8"), "html.parser")
+    cell = main._find_standard_cell(soup)
+    if cell is None:
+        cell = next(td for td in soup.find_all("td") if "산가" in td.get_text() and "과산화물가" in td.get_text())
+    text = cell.get_text()
+    return text, main.extract_rancidity_info(text)
+
+
+@pytest.mark.parametrize("name", list(PAGES))
+def test_row_fast_path_matches_full_page_parse(name):
+    body = PAGES[name]
+
+    result = main.parse_product_detail_page(body)
+
+    assert result == full_page_parse(body)
+    assert result[1] == {"산가": 3.0, "과산화물가": 5.0, "아니시딘가": 20.0, "총산화가": 26.0}
+
+
+@pytest.mark.parametrize("name", ["기본", "대문자 태그"])
+def test_standard_row_is_parsed_without_full_page(name, monkeypatch):
+    body = PAGES[name]
+    parsed = []
+    real = main.BeautifulSoup
+
+    def counting_soup(markup, *args):
+        parsed.append(len(markup))
+        return real(markup, *args)
+
+    monkeypatch.setattr(main, "BeautifulSoup", counting_soup)
+
+    main.parse_product_detail_page(body)
+
+    assert len(parsed) == 1 and parsed[0] < len(body.decode("utf-8")) // 10
+
+
+class ChunkedRaw:
+    """정해진 청크 단위로만 본문을 돌려주는 raw 스트림"""
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+
+    def read(self, amt=None, **kwargs):
+        if not self.chunks:
+            return b""
+        return self.chunks.pop(0)
+
+
+def response_of(chunks):
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = ChunkedRaw(chunks)
+    return response
+
+
+def split(body, size):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+def read_truncated(chunks):
+    return main._read_until_standard_row(response_of(chunks), timeout=30, started=time.monotonic())
+
+
+@pytest.mark.parametrize("name", list(PAGES))
+def test_truncated_read_parses_like_full_page(name):
+    body = PAGES[name]
+
+    truncated, _ = read_truncated(split(body, main.DETAIL_CHUNK_SIZE))
+
+    assert body.startswith(truncated)
+    expected = main.parse_product_detail_page(body)
+    assert expected[1] == {"산가": 3.0, "과산화물가": 5.0, "아니시딘가": 20.0, "총산화가": 26.0}
+    assert main.parse_product_detail_page(truncated) == expected
+
+
+@pytest.mark.parametrize("name", ["기본", "대문자 태그"])
+def test_standard_row_stops_read_early(name):
+    body = PAGES[name]
+
+    truncated, stopped_early = read_truncated(split(body, main.DETAIL_CHUNK_SIZE))
+
+    assert stopped_early
+    assert len(truncated) < len(body)
+    assert main._standard_row_end(truncated.lower()) >= 0
+
+
+def test_nested_table_row_is_not_cut_at_inner_row():
+    body = PAGES["중첩 테이블"]
+
+    assert main._standard_row_end(body.lower()) == -1
+    truncated, stopped_early = read_truncated(split(body, main.DETAIL_CHUNK_SIZE))
+    assert not stopped_early
+    assert truncated == body
+
+
+def test_page_without_th_is_read_to_the_end():
+    body = PAGES["th 없음"]
+
+    assert main._standard_row_end(body.lower()) == -1
+    truncated, stopped_early = read_truncated(split(body, main.DETAIL_CHUNK_SIZE))
+    assert not stopped_early
+    assert truncated == body
+
+
+@pytest.mark.parametrize("cut", ["마커", "닫는 태그"])
+def test_standard_row_split_across_chunks(cut):
+    body = PAGES["기본"]
+    row_start = body.find(b"<tr><th>" + main.STANDARD_MARKER)
+    if cut == "마커":
+        # 마커 UTF-8 바이트 중간에서 자름
+        split_at = row_start + len(b"<tr><th>") + 4
+    else:
+        split_at = body.find(b"</tr>", row_start) + 2
+    row_end = body.find(b"</tr>", row_start) + len(b"</tr>")
+    chunks = [body[:split_at], body[split_at:row_end + 50], body[row_end + 50:]]
+
+    assert main._standard_row_end(body[:split_at].lower()) == -1
+    truncated, stopped_early = read_truncated(chunks)
+
+    assert stopped_early
+    assert truncated == body[:row_end + 50]
+    assert main.parse_product_detail_page(truncated) == main.parse_product_detail_page(body)
@@ -0,0 +1,91 @@
+import itertools
+import json
+
+import pytest
+
+import omega3_complate
+from filter_rules import compile_rules, load_rules, rancidity_thresholds
+from omega3_complate import extract_rancidity_from_standards
+
+
+def baseline_check(product):
+    """규칙 파일 도입 전 omega3_complate.check_filtering_criteria"""
+    etc_materials = product.get("ETC_RAWMTRL_NM", "")
+    if etc_materials and etc_materials.strip():
+        return False, "기타원재료가 존재함"
+    primary_function = product.get("PRIMARY_FNCLTY", "")
+    if "비타민" in primary_function and "E" in primary_function:
+        return False, "비타민 E 포함"
+    rancidity_info = extract_rancidity_from_standards(product.get("STDR_STND", ""))
+    if not rancidity_info:
+        return False, "산패도 정보 없음"
+    criteria = {"산가": 3.0, "과산화물가": 5.0, "아니시딘가": 20.0, "총산화가": 26.0}
+    for key, max_value in criteria.items():
+        if rancidity_info.get(key) is not None:
+            if rancidity_info[key] > max_value:
+                return False, f"{key} 기준 초과 ({rancidity_info[key]} > {max_value})"
+    return True, "모든 기준 통과"
+
+
+PRODUCTS = [
+    {"ETC_RAWMTRL_NM": etc, "PRIMARY_FNCLTY": function, "STDR_STND": standards}
+    for etc, function, standards in itertools.product(
+        ["", "  ", "젤라틴, 글리세린"],
+        ["혈중 중성지질 개선", "항산화 (비타민 E)", ""],
+        ["", "성상: 고유의 색택", "산가: 2.0 이하", "산가: 4.0 이하, 과산화물가: 6.0 이하",
+         "과산화물가: 3.0 이하, 아니시딘가: 25.0 이하", "총산화가: 30 이하", "산가 1.5 이하 총산화가 20 이하"],
+    )
+]
+
+
+def _plan(stats_path=None):
+    return compile_rules(load_rules(), {
+        "rancidity": lambda product: extract_rancidity_from_standards(product.get("STDR_STND", ""))
+    }, stats_path=stats_path)
+
+
+@pytest.mark.parametrize("order", ["planned", "reversed"])
+def test_plan_matches_baseline_in_any_order(order, tmp_path):
+    plan = _plan(str(tmp_path / "stats.json"))
+    if order == "reversed":
+        plan.order = list(reversed(plan.rules))
+    for product in PRODUCTS:
+        assert plan.evaluate(product) == baseline_check(product), product
+
+
+def test_learned_order_does_not_change_reasons(tmp_path):
+    stats_path = str(tmp_path / "stats.json")
+    first = _plan(stats_path)
+    reasons = [first.evaluate(product) for product in PRODUCTS]
+    first.save_stats()
+
+    # 산가 규칙이 거의 모든 행을 탈락시키고 추출도 싸다고 학습된 통계
+    with open(stats_path, encoding="utf-8") as f:
+        stats = json.load(f)
+    stats["rules"]["산가"].update(evaluated=1000, rejected=999)
+    stats["extractors"]["rancidity"].update(count=1000, elapsed=0.0)
+    with open(stats_path, "w", encoding="utf-8") as f:
+        json.dump(stats, f)
+
+    second = _plan(stats_path)
+    assert second.order[0].name == "산가"
+    assert [second.evaluate(product) for product in PRODUCTS] == reasons
+
+
+def test_check_filtering_criteria_uses_plan(monkeypatch, tmp_path):
+    monkeypatch.setattr(omega3_complate, "_filter_plan", _plan(str(tmp_path / "stats.json")))
+    for product in PRODUCTS:
+        assert omega3_complate.check_filtering_criteria(product) == baseline_check(product)
+
+
+def test_stats_default_to_working_directory(monkeypatch, tmp_path):
+    monkeypatch.delenv("FILTER_RULE_STATS_DIR", raising=False)
+    monkeypatch.chdir(tmp_path)
+    plan = _plan()
+    plan.evaluate(PRODUCTS[0])
+    plan.save_stats()
+    assert (tmp_path / "filter_rule_stats.json").exists()
+
+
+def test_thresholds_come_from_config():
+    assert rancidity_thresholds() == {"산가": 3.0, "과산화물가": 5.0, "아니시딘가": 20.0, "총산화가": 26.0}
@@ -0,0 +1,60 @@
+from concurrent.futures import Future
+
+import pytest
+
+import product_query
+from near_duplicates import NearDuplicateIndex, cluster_rows
+from product_query import products
+
+STANDARDS = "성상: 고유의 색택과 향미가 있고 이미 이취가 없을 것, EPA와 DHA의 합: 표시량의 80~120%, 산가: 3.0 이하"
+
+
+def _row(name, report_no, raw="EPA 및 DHA 함유 유지", standards=STANDARDS):
+    return {"PRDLST_NM": name, "INDIV_RAWMTRL_NM": raw, "STDR_STND": standards, "PRDLST_REPORT_NO": report_no}
+
+
+def test_same_formula_with_renamed_products_shares_a_cluster():
+    rows = [
+        _row("알티지 오메가3 골드", "1"),
+        _row("비타민D 아연", "2", raw="아연", standards="납: 1.0 mg/kg 이하, 대장균군: 음성"),
+        _row("알티지 오메가3 골드 플러스", "3"),
+        _row("알티지오메가3-골드", "4"),
+    ]
+    clusters = cluster_rows(rows)
+    assert clusters[0] == clusters[2] == clusters[3]
+    assert clusters[1] != clusters[0]
+    assert clusters == [0, 1, 0, 0]
+
+
+def test_cluster_ids_follow_later_merges():
+    index = NearDuplicateIndex(threshold=0.5)
+    index.add(["a"])
+    index.add(["b"])
+    index._union(1, 0)
+    assert index.cluster_ids() == [0, 0]
+
+
+def test_query_clusters_without_sharing_details_across_report_numbers(monkeypatch):
+    rows = [_row("알티지 오메가3 골드", "1"), _row("알티지 오메가3 골드 플러스", "2"), _row("알티지 오메가3 골드", "1")]
+    monkeypatch.setattr(product_query.ProductQuery, "_pages", lambda self, filters: iter([rows]))
+    monkeypatch.setattr(product_query, "DETAIL_INTERVAL", 0)
+    requested = []
+
+    def submit(report_no, term, before_fetch=None):
+        requested.append(report_no)
+        future = Future()
+        future.set_result((None, {"산가": float(report_no)}))
+        return future
+    monkeypatch.setattr(product_query.portal, "submit_product_detail", submit)
+
+    result = list(products("오메가3", source="openapi", api_key="KEY").group_near_duplicates().with_rancidity())
+
+    assert requested == ["1", "2", "1"]
+    assert [row["산가"] for row in result] == [1.0, 2.0, 1.0]
+    assert [row["클러스터"] for row in result] == [0, 0, 0]
+
+
+@pytest.mark.parametrize("num_perm, bands", [(128, 16), (64, 8)])
+def test_unrelated_products_stay_apart(num_perm, bands):
+    rows = [_row(f"제품{i}", str(i), raw=f"원료{i}", standards=f"기준{i} 항목{i * 7} 이하") for i in range(50)]
+    assert len(set(cluster_rows(rows, num_perm=num_perm, bands=bands))) == 50
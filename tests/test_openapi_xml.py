@@ -0,0 +1,104 @@
+import pytest
+import requests
+
+import omega3_api
+import omega3_complate as openapi
+from conftest import ChunkedBody, openapi_xml_body
+
+ROWS = [
+    {"PRDLST_NM": "오메가3 골드", "PRDLST_REPORT_NO": "1", "STDR_STND": "산가 2.0 이하"},
+    {"PRDLST_NM": "알티지 오메가3", "PRDLST_REPORT_NO": "2", "STDR_STND": "과산화물가 4.0 이하"},
+]
+
+
+@pytest.fixture(autouse=True)
+def no_waits(monkeypatch):
+    monkeypatch.setattr(openapi.time, "sleep", lambda seconds: None)
+
+
+def test_rows_parse_across_tiny_chunks():
+    body = openapi_xml_body(ROWS, total_count=40)
+    # 한글 UTF-8 바이트 중간에서도 잘리도록 5바이트씩
+    chunks = [body[i:i + 5] for i in range(0, len(body), 5)]
+    info = {}
+
+    assert list(omega3_api.iter_api_rows_xml(chunks, info)) == ROWS
+    assert info == {"total_count": 40, "code": "INFO-000"}
+
+
+def test_error_result_code_raises_midstream():
+    body = openapi_xml_body([], code="ERROR-300")
+    info = {}
+
+    with pytest.raises(RuntimeError, match="ERROR-300"):
+        list(omega3_api.iter_api_rows_xml([body[i:i + 7] for i in range(0, len(body), 7)], info))
+    assert info["code"] == "ERROR-300"
+
+
+def test_batch_xml_is_streamed(stub_session, monkeypatch):
+    session, adapter = stub_session(lambda url: (200, openapi_xml_body(ROWS, total_count=2)), chunk_size=64)
+    monkeypatch.setattr(openapi, "api_session", session)
+
+    products, total = openapi.fetch_api_batch("KEY", "I0030", 1, 100, data_type="xml")
+
+    assert products == ROWS
+    assert total == 2
+    assert "/I0030/xml/1/100/" in adapter.urls[0]
+    assert adapter.bodies[0].reads > 5
+
+
+def test_batch_xml_error_code_fails_after_attempts(stub_session, monkeypatch):
+    session, adapter = stub_session(lambda url: (200, openapi_xml_body([], code="ERROR-300")), chunk_size=64)
+    monkeypatch.setattr(openapi, "api_session", session)
+
+    with pytest.raises(RuntimeError, match="ERROR-300"):
+        openapi.fetch_api_batch("KEY", "I0030", 1, 100, data_type="xml", attempts=2)
+    assert len(adapter.urls) == 2
+
+
+def test_batch_xml_no_data_is_empty(stub_session, monkeypatch):
+    session, _ = stub_session(lambda url: (200, openapi_xml_body([], code=openapi.API_NO_DATA_CODE)), chunk_size=64)
+    monkeypatch.setattr(openapi, "api_session", session)
+
+    assert openapi.fetch_api_batch("KEY", "I0030", 1, 100, data_type="xml") == ([], 0)
+
+
+def test_collector_xml_path_filters_streamed_rows(stub_session, monkeypatch):
+    rows = [dict(row, ETC_RAWMTRL_NM="", PRIMARY_FNCLTY="혈중 중성지질 개선") for row in ROWS]
+    session, adapter = stub_session(lambda url: (200, openapi_xml_body(rows)), chunk_size=64)
+    monkeypatch.setattr(openapi, "api_session", session)
+    monkeypatch.setattr(openapi.get_filter_plan(), "save_stats", lambda *args, **kwargs: None)
+
+    passed = openapi.collect_filtered_omega3_products("KEY", "I0030", total_count=2, batch_size=2, data_type="xml")
+
+    assert [row["PRDLST_REPORT_NO"] for row in passed] == ["1", "2"]
+    assert "/xml/" in adapter.urls[0]
+
+
+def _xml_response(body, chunk_size=32):
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = ChunkedBody(body, chunk_size)
+    return response
+
+
+def test_omega3_api_xml_client_streams(monkeypatch):
+    calls = []
+
+    def fake_get(url, timeout=None, stream=False):
+        calls.append(stream)
+        return _xml_response(openapi_xml_body(ROWS))
+
+    monkeypatch.setattr(omega3_api.requests, "get", fake_get)
+
+    rows = omega3_api.get_omega3_products_from_api("KEY", "I0030", data_type="xml")
+
+    assert calls == [True]
+    assert omega3_api.parse_api_response(rows) == ROWS
+
+
+def test_omega3_api_xml_client_error_code_returns_none(monkeypatch):
+    monkeypatch.setattr(omega3_api.requests, "get",
+                        lambda url, timeout=None, stream=False: _xml_response(openapi_xml_body([], code="ERROR-300")))
+
+    assert omega3_api.get_omega3_products_from_api("KEY", "I0030", data_type="xml") is None
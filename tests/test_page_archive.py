@@ -0,0 +1,147 @@
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from adaptive_requests import DeadlineExceeded, iter_with_deadline
+from page_archive import ArchiveMiss, PageArchive, attach
+
+PAGES = {
+    "/portal/detail.do?prdlst_report_no=2004-0001": "<td>산가: 3.0 이하</td>",
+    "/api/KEY/I0030/json/1/100/PRDLST_NM=오메가3": '{"I0030": {"total_count": "0"}}',
+}
+
+
+# 조금씩 흘려보내는 긴 상세 페이지 (앞부분에 기준 및 규격 행)
+SLOW_PATH = "/portal/detail.do?prdlst_report_no=2004-0002"
+SLOW_PIECES = ["<tr><th>기준 및 규격</th><td>산가: 3.0 이하</td></tr>"] + ["<p>꼬리</p>" * 100] * 20
+SLOW_DELAY = 0.05
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == SLOW_PATH:
+            return self._send_slowly()
+        body = PAGES.get(requests.utils.unquote(self.path))
+        self.server.hits += 1
+        self.send_response(200 if body is not None else 404)
+        data = (body or "없음").encode("utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_slowly(self):
+        self.server.hits += 1
+        pieces = [piece.encode("utf-8") for piece in SLOW_PIECES]
+        self.send_response(200)
+        self.send_header("Content-Length", str(sum(map(len, pieces))))
+        self.end_headers()
+        try:
+            for piece in pieces:
+                self.wfile.write(piece)
+                self.wfile.flush()
+                time.sleep(SLOW_DELAY)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.hits = 0
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_record_then_replay_without_network(server, tmp_path):
+    base = f"http://127.0.0.1:{server.server_port}"
+    directory = str(tmp_path / "archive")
+
+    recorder = requests.Session()
+    archive = PageArchive(directory)
+    attach(recorder, archive, mode="record")
+    for path in PAGES:
+        assert recorder.get(base + path).status_code == 200
+    archive.close()
+    assert server.hits == len(PAGES)
+
+    archive = PageArchive(directory, read_only=True)
+    assert archive.keys() == ["detail:20040001", "range:I0030:json:1-100/PRDLST_NM=오메가3"]
+    player = requests.Session()
+    attach(player, archive, mode="replay")
+    response = player.get(base + "/portal/detail.do", params={"prdlst_report_no": "2004-0001"})
+    assert response.text == PAGES["/portal/detail.do?prdlst_report_no=2004-0001"]
+    with pytest.raises(ArchiveMiss):
+        player.get(base + "/portal/detail.do", params={"prdlst_report_no": "9999"})
+    archive.close()
+    assert server.hits == len(PAGES)
+
+
+def test_last_record_wins_across_segments(tmp_path):
+    archive = PageArchive(str(tmp_path), segment_size=200)
+    for version in range(3):
+        archive.append("detail:1", "u", f"본문 {version}".encode("utf-8") * 10)
+    assert archive.get("detail:1").body == "본문 2".encode("utf-8") * 10
+    assert len([name for name in os.listdir(tmp_path) if name.endswith(".arc")]) == 3
+    archive.close()
+
+
+def test_read_only_archive_creates_nothing(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        PageArchive(str(tmp_path / "missing"), read_only=True)
+    assert not (tmp_path / "missing").exists()
+
+    PageArchive(str(tmp_path)).close()
+    archive = PageArchive(str(tmp_path), read_only=True)
+    with pytest.raises(PermissionError):
+        archive.append("detail:1", "u", b"x")
+    archive.close()
+
+
+def recording_session(directory):
+    session = requests.Session()
+    archive = PageArchive(directory)
+    attach(session, archive, mode="record")
+    return session, archive
+
+
+def test_record_keeps_early_stop(server, tmp_path):
+    session, archive = recording_session(str(tmp_path))
+    first = SLOW_PIECES[0].encode("utf-8")
+
+    started = time.monotonic()
+    with session.get(f"http://127.0.0.1:{server.server_port}{SLOW_PATH}", stream=True) as response:
+        received = b""
+        for chunk in iter_with_deadline(response, 10, started, chunk_size=1024):
+            received += chunk
+            if len(received) >= len(first):
+                break
+    elapsed = time.monotonic() - started
+
+    # 본문 전체(20회 x SLOW_DELAY)를 기다리지 않고 읽은 만큼만 기록
+    assert elapsed < SLOW_DELAY * 10
+    body = archive.get("detail:20040002").body
+    assert body == received and body.startswith(first)
+    archive.close()
+
+
+def test_record_skips_response_past_deadline(server, tmp_path):
+    session, archive = recording_session(str(tmp_path))
+
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        with session.get(f"http://127.0.0.1:{server.server_port}{SLOW_PATH}", stream=True) as response:
+            for _ in iter_with_deadline(response, SLOW_DELAY * 3, started, chunk_size=1024):
+                pass
+
+    assert "detail:20040002" not in archive
+    archive.close()
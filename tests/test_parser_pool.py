@@ -0,0 +1,79 @@
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+import main
+from single_flight import SingleFlight
+
+DETAIL_PAGE = (
+    "<html><body><table>"
+    "<tr><th>제품명</th><td>테스트 오메가3</td></tr>"
+    "<tr><th>기준 및 규격</th><td>산가 : 3.0 이하<br>과산화물가 : 5.0 이하</td></tr>"
+    "</table></body></html>"
+).encode("utf-8")
+
+
+@pytest.fixture
+def fetched(monkeypatch):
+    """상세 페이지 요청을 고정 본문으로 바꾸고 요청한 신고번호를 기록"""
+    calls = []
+
+    def fake_fetch(prdlst_report_no, search_term="셀로닉스", show_cnt=10, start_idx=1):
+        calls.append(prdlst_report_no)
+        return DETAIL_PAGE
+
+    monkeypatch.setattr(main, "fetch_product_detail_page", fake_fetch)
+    monkeypatch.setattr(main, "detail_flight", SingleFlight())
+    monkeypatch.setattr(main, "USE_PARSER_POOL", True)
+    return calls
+
+
+def test_submit_product_detail_parses_in_process_pool(fetched):
+    future = main.submit_product_detail("2004-0123-456")
+
+    assert isinstance(main.get_parser_pool(), ProcessPoolExecutor)
+    standard_text, rancidity_info = future.result(timeout=60)
+    assert "산가" in standard_text
+    assert rancidity_info["산가"] == 3.0
+    assert rancidity_info["과산화물가"] == 5.0
+    assert rancidity_info["아니시딘가"] is None
+    assert fetched == ["2004-0123-456"]
+
+
+def test_submit_product_detail_matches_inline_parse(fetched):
+    future = main.submit_product_detail("2004-0123-457")
+
+    assert future.result(timeout=60) == main.parse_product_detail_page(DETAIL_PAGE)
+
+
+def test_same_report_number_shares_one_parse(fetched):
+    first = main.submit_product_detail("2004-0123-458")
+    second = main.submit_product_detail("2004 0123 458")
+
+    assert second is first
+    assert fetched == ["2004-0123-458"]
+    assert first.result(timeout=60)[1]["산가"] == 3.0
+
+
+def test_concurrent_first_use_creates_one_pool(monkeypatch):
+    monkeypatch.setattr(main, "USE_PARSER_POOL", True)
+    monkeypatch.setattr(main, "_parser_pool", None)
+    barrier = threading.Barrier(8)
+    pools = []
+
+    def first_use():
+        barrier.wait()
+        pools.append(main.get_parser_pool())
+
+    threads = [threading.Thread(target=first_use) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    try:
+        assert len({id(pool) for pool in pools}) == 1
+        assert pools[0]._mp_context.get_start_method() == main.PARSER_POOL_START_METHOD != "fork"
+    finally:
+        pools[0].shutdown()
@@ -0,0 +1,111 @@
+import pytest
+
+import omega3_complate as openapi
+import product_query
+from conftest import openapi_body
+from product_query import plan_server_filters, products
+
+
+def _row(name, report_no, standards="산가 2.0 이하, 과산화물가 4.0 이하"):
+    return {
+        "PRDLST_NM": name,
+        "BSSH_NM": "테스트제약",
+        "PRDLST_REPORT_NO": report_no,
+        "ETC_RAWMTRL_NM": "",
+        "PRIMARY_FNCLTY": "혈중 중성지질 개선",
+        "STDR_STND": standards,
+        "LAST_UPDT_DTM": "2024-03-01",
+    }
+
+
+@pytest.fixture(autouse=True)
+def no_waits(monkeypatch):
+    monkeypatch.setattr(product_query, "OPENAPI_INTERVAL", 0)
+    monkeypatch.setattr(openapi.time, "sleep", lambda seconds: None)
+
+
+def test_changed_since_is_pushed_to_server_only(stub_session, monkeypatch):
+    session, adapter = stub_session(lambda url: (200, openapi_body([_row("오메가3 골드", "1")])))
+    monkeypatch.setattr(openapi, "api_session", session)
+
+    query = products("오메가3", source="openapi", api_key="KEY").where(CHNG_DT__ge="20240101")
+    rows = list(query)
+
+    assert [row["PRDLST_REPORT_NO"] for row in rows] == ["1"]
+    assert query.server_filters == {"PRDLST_NM": "오메가3", "CHNG_DT": "20240101"}
+    assert adapter.urls[0].endswith("/PRDLST_NM=오메가3&CHNG_DT=20240101")
+
+
+def test_plan_keeps_inexact_conditions_as_residual():
+    query = products("오메가3", source="openapi").where(BSSH_NM__eq="테스트제약", PRDLST_REPORT_NO__eq="1")
+    filters, residual = plan_server_filters(query.predicates, "오메가3")
+    assert filters == {"PRDLST_NM": "오메가3", "BSSH_NM": "테스트제약", "PRDLST_REPORT_NO": "1"}
+    assert [predicate.lookup for predicate in residual] == [("BSSH_NM", "eq", "테스트제약")]
+
+
+def test_failed_range_raises_instead_of_truncating(stub_session, monkeypatch):
+    session, _ = stub_session(lambda url: (500, b"error"))
+    monkeypatch.setattr(openapi, "api_session", session)
+
+    with pytest.raises(RuntimeError):
+        list(products("오메가3", source="openapi", api_key="KEY").where(CHNG_DT__ge="20240101"))
+
+
+def test_filtered_collection_retries_transient_errors(stub_session, monkeypatch):
+    responses = iter([
+        (500, b"error"),
+        (200, openapi_body([_row("오메가3 골드", "1"), _row("오메가3 플러스", "2")], total_count=3)),
+        (200, openapi_body([_row("오메가3 라이트", "3")], total_count=3)),
+    ])
+    session, adapter = stub_session(lambda url: next(responses))
+    monkeypatch.setattr(openapi, "api_session", session)
+    monkeypatch.setattr(openapi.get_filter_plan(), "stats_path", None)
+
+    passed = openapi.collect_filtered_omega3_products("KEY", "I0030", total_count=10, batch_size=2,
+                                                      filters={"CHNG_DT": "20240101"})
+
+    assert [row["PRDLST_REPORT_NO"] for row in passed] == ["1", "2", "3"]
+    # 실패한 첫 요청은 다시 시도하고, 서버 total_count(3)에 도달하면 멈춤
+    assert len(adapter.urls) == 3
+
+
+def test_empty_first_filtered_batch_does_not_divide_by_zero(stub_session, monkeypatch):
+    session, _ = stub_session(lambda url: (200, openapi_body([], total_count=0, code=openapi.API_NO_DATA_CODE)))
+    monkeypatch.setattr(openapi, "api_session", session)
+    monkeypatch.setattr(openapi.get_filter_plan(), "stats_path", None)
+
+    assert openapi.collect_filtered_omega3_products("KEY", "I0030", total_count=10, batch_size=5,
+                                                    filters={"BSSH_NM": "없는회사"}) == []
+
+
+def test_portal_rules_on_missing_fields_raise():
+    with pytest.raises(ValueError, match="기타원재료"):
+        products("셀로닉스").where_rules()
+
+
+def test_portal_rules_can_skip_missing_fields():
+    query = products("셀로닉스").where_rules(skip_unavailable=True).with_rancidity()
+
+    assert query.skipped_rules == ["기타원재료", "비타민E"]
+    assert all(predicate.needs_detail for predicate in query.predicates)
+    assert len(query.predicates) == 5
+
+
+def test_openapi_rules_keep_list_fields():
+    query = products("오메가3", source="openapi").where_rules()
+
+    assert query.skipped_rules == []
+    assert len(query.predicates) == 7
+
+
+def test_unpushable_changed_since_raises():
+    query = products("오메가3", source="openapi").where(CHNG_DT__ge="20240101")
+    with pytest.raises(ValueError):
+        plan_server_filters(query.where(CHNG_DT__ge="20240301").predicates, "오메가3")
+    with pytest.raises(ValueError):
+        plan_server_filters(products("오메가3", source="openapi").where(CHNG_DT__le="20240101").predicates)
+
+
+def test_changed_since_is_rejected_for_portal_source():
+    with pytest.raises(ValueError):
+        products("셀로닉스").where(CHNG_DT__ge="20240101")
@@ -0,0 +1,42 @@
+import io
+import json
+import os
+import subprocess
+import sys
+
+import requests
+
+import omega3_api
+import request_latency
+from conftest import openapi_body
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_import_does_not_patch_socket_or_urllib3():
+    check = (
+        "import socket, urllib3.connection, main, omega3_api, omega3_complate, crawl_pipeline, work_queue\n"
+        "assert not getattr(socket.getaddrinfo, '_request_latency', False)\n"
+        "assert not getattr(urllib3.connection.HTTPConnection.connect, '_request_latency', False)\n"
+        "import request_latency\n"
+        "request_latency.install()\n"
+        "assert socket.getaddrinfo._request_latency\n"
+    )
+    subprocess.run([sys.executable, "-c", check], cwd=ROOT, check=True, capture_output=True)
+
+
+def test_omega3_api_request_is_measured(monkeypatch):
+    def fake_get(url, timeout=None):
+        response = requests.Response()
+        response.status_code = 200
+        response.raw = io.BytesIO(json.dumps(openapi_body([{"PRDLST_NM": "오메가3"}])).encode("utf-8"))
+        return response
+
+    monkeypatch.setattr(omega3_api.requests, "get", fake_get)
+    stats = request_latency.get_endpoint_stats("openapi_range")
+    before = stats.histograms["total"].total_count if stats else 0
+
+    omega3_api.get_omega3_products_from_api("key", "I0030")
+
+    stats = request_latency.get_endpoint_stats("openapi_range")
+    assert stats.histograms["total"].total_count == before + 1
@@ -0,0 +1,72 @@
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.1)
+        return "본문"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("detail:1", fetch))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["본문"] * 5
+    assert len(calls) == 1
+    assert flight.do("detail:1", fetch) == "본문"
+    assert flight.stats() == {"요청": 6, "실행": 1, "절약": 5}
+
+
+def test_errors_are_shared_but_not_remembered():
+    flight = SingleFlight()
+
+    def broken():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        flight.do("detail:1", broken)
+    assert flight.do("detail:1", lambda: "다시 요청") == "다시 요청"
+
+
+def test_failed_future_is_not_remembered():
+    flight = SingleFlight()
+    pending = Future()
+    assert flight.do("detail:1", lambda: pending) is pending
+    assert flight.do("detail:1", Future) is pending
+
+    pending.set_exception(RuntimeError("파서 프로세스 종료"))
+
+    retried = Future()
+    assert flight.do("detail:1", lambda: retried) is retried
+
+
+def test_successful_future_is_remembered():
+    flight = SingleFlight()
+    done = Future()
+    done.set_result(("기준 및 규격", {"산가": 3.0}))
+    flight.do("detail:1", lambda: done)
+
+    assert flight.do("detail:1", Future) is done
+
+
+def test_remembered_results_are_bounded():
+    flight = SingleFlight(max_results=2)
+    for key in ("a", "b"):
+        flight.do(key, lambda: key)
+    flight.do("a", lambda: "다시")
+    flight.do("c", lambda: "c")
+
+    assert flight.do("a", lambda: "다시") == "a"
+    assert flight.do("b", lambda: "다시") == "다시"
@@ -0,0 +1,110 @@
+import threading
+import time
+
+import pytest
+
+import work_queue
+from work_queue import FAILED, LEASED, PENDING, SharedRateLimiter, WorkQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return WorkQueue(str(tmp_path / "queue.sqlite3"), lease_seconds=0.2, max_attempts=2)
+
+
+def test_claim_ack_and_results(queue):
+    assert queue.enqueue("detail", {"prdlst_report_no": "1"}, unit_key="detail:1")
+    assert not queue.enqueue("detail", {"prdlst_report_no": "1"}, unit_key="detail:1")
+
+    [(unit_id, kind, payload)] = queue.claim("w1")
+    assert (kind, payload) == ("detail", {"prdlst_report_no": "1"})
+    assert queue.claim("w2") == []
+    assert queue.counts() == {("detail", LEASED): 1}
+
+    assert queue.ack(unit_id, "w1", {"산가": 1.0})
+    assert queue.results("detail") == [({"prdlst_report_no": "1"}, {"산가": 1.0})]
+    assert not queue.has_open_work()
+
+
+def test_expired_lease_is_reclaimed_and_stale_ack_rejected(queue):
+    queue.enqueue("detail", {"prdlst_report_no": "1"})
+    [(unit_id, _, _)] = queue.claim("w1")
+    time.sleep(0.3)
+
+    [(reclaimed_id, _, _)] = queue.claim("w2")
+    assert reclaimed_id == unit_id
+    assert not queue.heartbeat(unit_id, "w1")
+    assert not queue.ack(unit_id, "w1", {"stale": True})
+    assert queue.ack(unit_id, "w2", {"fresh": True})
+    assert queue.results("detail")[0][1] == {"fresh": True}
+
+
+def test_expired_units_fail_after_max_attempts(queue):
+    queue.enqueue("detail", {"prdlst_report_no": "1"})
+    for owner in ("w1", "w2"):
+        assert queue.claim(owner)
+        time.sleep(0.3)
+    assert queue.claim("w3") == []
+    assert queue.counts() == {("detail", FAILED): 1}
+
+
+def test_fail_requeues_until_max_attempts(queue):
+    queue.enqueue("detail", {"prdlst_report_no": "1"})
+    [(unit_id, _, _)] = queue.claim("w1")
+    assert queue.fail(unit_id, "w1", "boom")
+    assert queue.counts() == {("detail", PENDING): 1}
+    [(unit_id, _, _)] = queue.claim("w1")
+    assert queue.fail(unit_id, "w1", "boom")
+    assert queue.counts() == {("detail", FAILED): 1}
+
+
+def test_run_worker_reports_lost_lease(queue, monkeypatch):
+    queue.enqueue("detail", {"prdlst_report_no": "1"})
+
+    def slow_handler(payload, api_key):
+        # 리스가 만료돼 다른 워커가 가져가서 먼저 끝낸 상황
+        time.sleep(0.3)
+        [(unit_id, _, _)] = queue.claim("other")
+        assert queue.ack(unit_id, "other", {"산가": 2.0})
+        return {"산가": 1.0}
+
+    monkeypatch.setitem(work_queue.HANDLERS, "detail", slow_handler)
+    monkeypatch.setitem(work_queue.REQUEST_INTERVALS, "detail", 0)
+    monkeypatch.setattr(work_queue, "_heartbeat_loop", lambda *args: None)
+    monkeypatch.setattr(work_queue, "print_latency_report", lambda: None)
+
+    summary = work_queue.run_worker(queue, owner="w1", poll_interval=0)
+
+    assert summary == {"완료": 0, "실패": 0, "리스상실": 1}
+    assert queue.results("detail") == [({"prdlst_report_no": "1"}, {"산가": 2.0})]
+
+
+def test_request_interval_is_shared_across_workers(tmp_path):
+    path = str(tmp_path / "queue.sqlite3")
+    WorkQueue(path)
+    sent = []
+    lock = threading.Lock()
+
+    def worker():
+        # 워커 프로세스마다 따로 연 큐 (연결을 공유하지 않음)
+        limiter = SharedRateLimiter(WorkQueue(path), "detail", 0.1)
+        for _ in range(3):
+            limiter.wait()
+            with lock:
+                sent.append(time.time())
+
+    threads = [threading.Thread(target=worker) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    sent.sort()
+    assert len(sent) == 9
+    assert min(later - earlier for earlier, later in zip(sent, sent[1:])) > 0.09
+
+
+def test_rate_slots_are_separate_per_kind(queue):
+    assert queue.reserve_slot("detail", 10) == 0
+    assert queue.reserve_slot("api_range", 10) == 0
+    assert 9 < queue.reserve_slot("detail", 10) <= 10
@@ -0,0 +1,503 @@
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+import main as portal
+import omega3_complate as openapi
+from request_latency import install as install_latency_probes, print_latency_report
+from page_archive import attach_from_env
+
+# 작업 단위 상태
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+DEFAULT_API_KEY = "ffeaa23428844ae99418"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS work_units (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    unit_key TEXT NOT NULL UNIQUE,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_work_units_status ON work_units (status, kind, id);
+CREATE TABLE IF NOT EXISTS rate_slots (
+    name TEXT PRIMARY KEY,
+    next_time REAL NOT NULL
+);
+"""
+
+
+class WorkQueue:
+    """
+    리스(lease) 기반 작업 큐 (공유 볼륨의 SQLite 파일)
+
+    워커는 작업을 claim하면 lease_seconds 동안 소유권을 갖고, 처리 중에는 heartbeat로
+    리스를 연장한다. 워커가 죽어 리스가 만료된 작업은 다음 claim 때 자동으로 다시 대기
+    상태가 된다. 여러 프로세스/노드가 같은 파일을 열어 동시에 사용할 수 있다.
+    """
+
+    def __init__(self, path, lease_seconds=120, max_attempts=3):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self):
+        """스레드별 SQLite 연결 (네트워크 파일시스템에서도 동작하도록 WAL 대신 기본 저널 모드)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            conn.execute("PRAGMA busy_timeout = 60000")
+            self._local.conn = conn
+        return conn
+
+    def _connect(self):
+        return _Transaction(self._connection())
+
+    def enqueue(self, kind, payload, unit_key=None):
+        """작업 등록 (같은 unit_key가 이미 있으면 무시). 새로 등록되면 True"""
+        if unit_key is None:
+            unit_key = f"{kind}:{json.dumps(payload, sort_keys=True, ensure_ascii=False)}"
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO work_units (kind, unit_key, payload, updated_at) VALUES (?, ?, ?, ?)",
+                (kind, unit_key, json.dumps(payload, ensure_ascii=False), time.time()),
+            )
+            return cursor.rowcount == 1
+
+    def requeue_expired(self, conn=None):
+        """
+        리스가 만료된 작업을 대기 상태로 되돌림 (fail()과 같이 max_attempts에 도달했으면 실패 처리)
+
+        Returns:
+            int: 되돌리거나 실패 처리한 개수
+        """
+        now = time.time()
+        if conn is None:
+            with self._connect() as conn:
+                return self.requeue_expired(conn)
+        cursor = conn.execute(
+            "UPDATE work_units SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+            "owner = NULL, lease_expires = NULL, "
+            "error = CASE WHEN attempts >= ? THEN ? ELSE error END, updated_at = ? "
+            "WHERE status = ? AND lease_expires < ?",
+            (self.max_attempts, FAILED, PENDING, self.max_attempts, "리스 만료 (워커 중단)", now, LEASED, now),
+        )
+        return cursor.rowcount
+
+    def claim(self, owner, kinds=None, limit=1):
+        """
+        대기 중인 작업을 limit개까지 리스
+
+        Returns:
+            list: (id, kind, payload dict) 튜플 리스트
+        """
+        now = time.time()
+        with self._connect() as conn:
+            self.requeue_expired(conn)
+            query = "SELECT id, kind, payload FROM work_units WHERE status = ?"
+            params = [PENDING]
+            if kinds:
+                query += f" AND kind IN ({','.join('?' * len(kinds))})"
+                params.extend(kinds)
+            query += " ORDER BY id LIMIT ?"
+            params.append(limit)
+            rows = conn.execute(query, params).fetchall()
+            for unit_id, _, _ in rows:
+                conn.execute(
+                    "UPDATE work_units SET status = ?, owner = ?, lease_expires = ?, "
+                    "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    (LEASED, owner, now + self.lease_seconds, now, unit_id),
+                )
+        return [(unit_id, kind, json.loads(payload)) for unit_id, kind, payload in rows]
+
+    def heartbeat(self, unit_id, owner):
+        """리스 연장. 이미 다른 워커에게 넘어간 작업이면 False"""
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE work_units SET lease_expires = ?, updated_at = ? "
+                "WHERE id = ? AND owner = ? AND status = ?",
+                (now + self.lease_seconds, now, unit_id, owner, LEASED),
+            )
+            return cursor.rowcount == 1
+
+    def ack(self, unit_id, owner, result):
+        """작업 완료 처리 (결과는 JSON으로 저장). 리스를 잃은 작업이면 기록하지 않고 False"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE work_units SET status = ?, result = ?, error = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE id = ? AND owner = ? AND status = ?",
+                (DONE, json.dumps(result, ensure_ascii=False), time.time(), unit_id, owner, LEASED),
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, unit_id, owner, error):
+        """작업 실패 처리 (max_attempts 미만이면 다시 대기 상태로). 리스를 잃은 작업이면 False"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE work_units SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+                "owner = NULL, lease_expires = NULL, error = ?, updated_at = ? "
+                "WHERE id = ? AND owner = ? AND status = ?",
+                (self.max_attempts, FAILED, PENDING, str(error), time.time(), unit_id, owner, LEASED),
+            )
+            return cursor.rowcount == 1
+
+    def reserve_slot(self, name, min_interval):
+        """
+        name 요청 간격 제한에서 다음 요청 슬롯을 예약하고 그때까지 기다릴 시간(초) 반환
+
+        같은 큐 파일을 쓰는 모든 워커가 BEGIN IMMEDIATE 안에서 next_time 한 행을 갱신하므로
+        워커 수와 관계없이 name별로 min_interval 초에 한 번만 요청한다. 시각은 time.time()이므로
+        여러 노드에서 쓸 때는 시계가 동기화돼 있어야 한다.
+        """
+        with self._connect() as conn:
+            now = time.time()
+            row = conn.execute("SELECT next_time FROM rate_slots WHERE name = ?", (name,)).fetchone()
+            slot = max(now, row[0]) if row else now
+            conn.execute(
+                "INSERT INTO rate_slots (name, next_time) VALUES (?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET next_time = excluded.next_time",
+                (name, slot + min_interval),
+            )
+        return slot - now
+
+    def counts(self):
+        """(kind, status)별 작업 개수"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT kind, status, COUNT(*) FROM work_units GROUP BY kind, status ORDER BY kind, status"
+            ).fetchall()
+        return {(kind, status): count for kind, status, count in rows}
+
+    def has_open_work(self, kinds=None):
+        """대기 중이거나 처리 중인 작업이 남아 있는지"""
+        query = "SELECT COUNT(*) FROM work_units WHERE status IN (?, ?)"
+        params = [PENDING, LEASED]
+        if kinds:
+            query += f" AND kind IN ({','.join('?' * len(kinds))})"
+            params.extend(kinds)
+        with self._connect() as conn:
+            return conn.execute(query, params).fetchone()[0] > 0
+
+    def results(self, kind):
+        """완료된 작업의 (payload, result) 목록"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT payload, result FROM work_units WHERE kind = ? AND status = ? ORDER BY id",
+                (kind, DONE),
+            ).fetchall()
+        return [(json.loads(payload), json.loads(result)) for payload, result in rows]
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT/ROLLBACK 컨텍스트 (claim 경쟁 시 쓰기 잠금 선점)"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+class SharedRateLimiter:
+    """
+    작업 큐 파일로 여러 워커 프로세스/노드가 함께 지키는 최소 요청 간격 제한기
+
+    rate_limiter.RateLimiter와 같은 wait() 인터페이스이며, 슬롯은 WorkQueue.reserve_slot()으로
+    큐 파일에 예약한다.
+    """
+
+    def __init__(self, queue, name, min_interval):
+        self.queue = queue
+        self.name = name
+        self.min_interval = min_interval
+        self.wait_time = 0.0
+
+    def wait(self):
+        if self.min_interval <= 0:
+            return
+        delay = self.queue.reserve_slot(self.name, self.min_interval)
+        if delay > 0:
+            self.wait_time += delay
+            time.sleep(delay)
+
+
+# ---------------------------------------------------------------------------
+# 작업 계획 (enqueue)
+# ---------------------------------------------------------------------------
+
+def plan_api_ranges(queue, service_id="I0030", product_name="오메가3", total_count=1400, batch_size=100, filters=None):
+    """OpenAPI start_idx/end_idx 구간 작업 등록 (filters: 서버 검색 조건, 예: {"CHNG_DT": "20240101"})"""
+    added = 0
+    for start_idx in range(1, total_count + 1, batch_size):
+        end_idx = min(start_idx + batch_size - 1, total_count)
+        payload = {
+            "service_id": service_id,
+            "product_name": product_name,
+            "start_idx": start_idx,
+            "end_idx": end_idx,
+        }
+        if filters:
+            payload["filters"] = filters
+        added += queue.enqueue("api_range", payload)
+    return added
+
+
+def plan_portal_pages(queue, search_term="셀로닉스", total_pages=1, show_cnt=10):
+    """포털 검색 페이지 작업 등록"""
+    added = 0
+    for page_no in range(1, total_pages + 1):
+        added += queue.enqueue("portal_page", {
+            "search_term": search_term,
+            "page_no": page_no,
+            "show_cnt": show_cnt,
+        })
+    return added
+
+
+def plan_details(queue, report_nos, search_term="셀로닉스"):
+    """상세 페이지(prdlst_report_no) 작업 등록 - 같은 신고번호는 한 번만"""
+    added = 0
+    for prdlst_report_no in report_nos:
+        prdlst_report_no = str(prdlst_report_no).strip()
+        if prdlst_report_no:
+            added += queue.enqueue(
+                "detail",
+                {"prdlst_report_no": prdlst_report_no, "search_term": search_term},
+                unit_key=f"detail:{prdlst_report_no}",
+            )
+    return added
+
+
+# ---------------------------------------------------------------------------
+# 작업 처리 (worker)
+# ---------------------------------------------------------------------------
+
+_portal_warmed = False
+
+
+def _handle_api_range(payload, api_key):
+    # 오류 응답을 빈 결과로 완료 처리하지 않도록 실패는 예외로 (다시 시도는 큐의 max_attempts가 담당)
+    products, _ = openapi.fetch_api_batch(
+        api_key,
+        payload["service_id"],
+        payload["start_idx"],
+        payload["end_idx"],
+        product_name=payload["product_name"],
+        filters=payload.get("filters"),
+        attempts=1,
+    )
+    return products
+
+
+def _handle_portal_page(payload, api_key):
+    global _portal_warmed
+    # 워커 프로세스마다 한 번만 세션 쿠키 설정
+    if not _portal_warmed and payload["page_no"] != 1:
+        portal.warm_up_session()
+    _portal_warmed = True
+    items = portal.search_omega3_products(payload["page_no"], payload["search_term"], payload["show_cnt"])
+    if items is None:
+        raise RuntimeError("검색 페이지 응답 없음")
+    return items
+
+
+def _handle_detail(payload, api_key):
+    html_bytes = portal.fetch_product_detail_page(payload["prdlst_report_no"], payload["search_term"])
+    if html_bytes is None:
+        raise RuntimeError("상세 페이지 응답 없음")
+    _, rancidity_info = portal.parse_product_detail_page(html_bytes)
+    return rancidity_info
+
+
+HANDLERS = {
+    "api_range": _handle_api_range,
+    "portal_page": _handle_portal_page,
+    "detail": _handle_detail,
+}
+
+# 작업 종류별 최소 요청 간격 (같은 큐를 쓰는 모든 워커 합산)
+REQUEST_INTERVALS = {
+    "api_range": 2.0,
+    "portal_page": 3.0,
+    "detail": 2.0,
+}
+
+
+def _heartbeat_loop(queue, unit_id, owner, stop):
+    while not stop.wait(queue.lease_seconds / 3):
+        if not queue.heartbeat(unit_id, owner):
+            print(f"⚠️ 작업 {unit_id} 리스를 잃었습니다 (다른 워커가 가져감)")
+            return
+
+
+def run_worker(queue, kinds=None, api_key=DEFAULT_API_KEY, poll_interval=5.0, exit_when_idle=True, owner=None):
+    """
+    작업 큐에서 작업을 가져와 처리하고 결과를 기록
+
+    Args:
+        queue (WorkQueue): 작업 큐
+        kinds (list): 처리할 작업 종류 (기본값: 전체)
+        api_key (str): OpenAPI 인증키
+        poll_interval (float): 대기 작업이 없을 때 다시 확인할 간격(초)
+        exit_when_idle (bool): 대기/처리 중인 작업이 하나도 없으면 종료
+        owner (str): 워커 식별자 (기본값: 호스트명:PID)
+
+    Returns:
+        dict: 처리 결과 개수 {"완료": n, "실패": n, "리스상실": n}
+    """
+    owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+    limiters = {kind: SharedRateLimiter(queue, kind, interval) for kind, interval in REQUEST_INTERVALS.items()}
+    summary = {"완료": 0, "실패": 0, "리스상실": 0}
+    print(f"👷 워커 {owner} 시작 (작업 종류: {', '.join(kinds) if kinds else '전체'})")
+
+    while True:
+        claimed = queue.claim(owner, kinds=kinds, limit=1)
+        if not claimed:
+            if exit_when_idle and not queue.has_open_work(kinds):
+                break
+            time.sleep(poll_interval)
+            continue
+
+        for unit_id, kind, payload in claimed:
+            stop = threading.Event()
+            heartbeat = threading.Thread(target=_heartbeat_loop, args=(queue, unit_id, owner, stop), daemon=True)
+            heartbeat.start()
+            try:
+                limiters[kind].wait()
+                result = HANDLERS[kind](payload, api_key)
+                if queue.ack(unit_id, owner, result):
+                    summary["완료"] += 1
+                    print(f"✅ [{kind}] 작업 {unit_id} 완료")
+                else:
+                    # 리스가 만료돼 다른 워커가 가져간 작업 - 결과는 그 워커가 기록
+                    summary["리스상실"] += 1
+                    print(f"⚠️ [{kind}] 작업 {unit_id} 리스를 잃어 결과를 버립니다")
+            except Exception as e:
+                if queue.fail(unit_id, owner, e):
+                    summary["실패"] += 1
+                    print(f"❌ [{kind}] 작업 {unit_id} 실패: {e}")
+                else:
+                    summary["리스상실"] += 1
+                    print(f"⚠️ [{kind}] 작업 {unit_id} 실패했지만 이미 리스를 잃었습니다: {e}")
+            finally:
+                stop.set()
+                heartbeat.join()
+
+    print(f"👷 워커 {owner} 종료: 완료 {summary['완료']}건, 실패 {summary['실패']}건, 리스 상실 {summary['리스상실']}건")
+    print_latency_report()
+    return summary
+
+
+def print_status(queue):
+    """작업 종류/상태별 개수 출력"""
+    counts = queue.counts()
+    if not counts:
+        print("등록된 작업이 없습니다.")
+        return
+    print(f"{'종류':<14}{PENDING:>9}{LEASED:>9}{DONE:>9}{FAILED:>9}")
+    for kind in sorted({kind for kind, _ in counts}):
+        print(f"{kind:<14}" + "".join(f"{counts.get((kind, status), 0):>9}" for status in (PENDING, LEASED, DONE, FAILED)))
+
+
+def export_results(queue, kind, filename):
+    """완료된 작업 결과를 CSV로 저장"""
+    rows = []
+    for payload, result in queue.results(kind):
+        if kind == "detail":
+            rows.append({"신고번호": payload["prdlst_report_no"], **(result or {})})
+        else:
+            rows.extend(result or [])
+    if not rows:
+        print("저장할 결과가 없습니다.")
+        return
+    pd.DataFrame(rows).to_csv(filename, index=False, encoding="utf-8-sig")
+    print(f"📄 {kind} 결과 {len(rows)}행이 {filename} 파일로 저장되었습니다.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="리스 기반 작업 큐로 여러 프로세스/노드에서 분산 수집")
+    parser.add_argument("--queue", default="crawl_queue.sqlite3", help="작업 큐 SQLite 파일 (공유 볼륨 경로)")
+    parser.add_argument("--lease", type=float, default=120, help="리스 시간(초)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    api = sub.add_parser("enqueue-api", help="OpenAPI 구간 작업 등록")
+    api.add_argument("--service-id", default="I0030")
+    api.add_argument("--product-name", default="오메가3")
+    api.add_argument("--total-count", type=int, default=1400)
+    api.add_argument("--batch-size", type=int, default=100)
+    api.add_argument("--company", help="업소명 (서버 검색 조건 BSSH_NM)")
+    api.add_argument("--report-no", help="품목제조번호 (서버 검색 조건 PRDLST_REPORT_NO)")
+    api.add_argument("--changed-since", help="YYYYMMDD 이후 변경분만 (서버 검색 조건 CHNG_DT, 증분 수집)")
+
+    pages = sub.add_parser("enqueue-portal", help="포털 검색 페이지 작업 등록")
+    pages.add_argument("--search-term", default="셀로닉스")
+    pages.add_argument("--total-pages", type=int, required=True)
+    pages.add_argument("--show-cnt", type=int, default=10)
+
+    details = sub.add_parser("enqueue-details", help="상세 페이지 작업 등록 (CSV의 신고번호 컬럼)")
+    details.add_argument("csv")
+    details.add_argument("--column", default="신고번호")
+    details.add_argument("--search-term", default="셀로닉스")
+
+    work = sub.add_parser("work", help="워커 실행")
+    work.add_argument("--kind", action="append", choices=sorted(HANDLERS), help="처리할 작업 종류 (여러 번 지정 가능)")
+    work.add_argument("--api-key", default=DEFAULT_API_KEY)
+    work.add_argument("--forever", action="store_true", help="작업이 없어도 종료하지 않고 대기")
+
+    sub.add_parser("status", help="작업 현황 출력")
+
+    export = sub.add_parser("export", help="완료된 결과를 CSV로 저장")
+    export.add_argument("kind", choices=sorted(HANDLERS))
+    export.add_argument("output")
+
+    args = parser.parse_args()
+    queue = WorkQueue(args.queue, lease_seconds=args.lease)
+
+    if args.command == "enqueue-api":
+        filters = {"BSSH_NM": args.company, "PRDLST_REPORT_NO": args.report_no, "CHNG_DT": args.changed_since}
+        filters = {name: value for name, value in filters.items() if value}
+        added = plan_api_ranges(queue, args.service_id, args.product_name, args.total_count, args.batch_size, filters)
+        print(f"✅ OpenAPI 구간 작업 {added}개 등록")
+    elif args.command == "enqueue-portal":
+        added = plan_portal_pages(queue, args.search_term, args.total_pages, args.show_cnt)
+        print(f"✅ 검색 페이지 작업 {added}개 등록")
+    elif args.command == "enqueue-details":
+        report_nos = pd.read_csv(args.csv, dtype=str, encoding="utf-8-sig")[args.column].dropna()
+        added = plan_details(queue, report_nos, args.search_term)
+        print(f"✅ 상세 페이지 작업 {added}개 등록")
+    elif args.command == "work":
+        attach_from_env(portal.session, openapi.api_session)
+        install_latency_probes()
+        run_worker(queue, kinds=args.kind, api_key=args.api_key, exit_when_idle=not args.forever)
+    elif args.command == "status":
+        print_status(queue)
+    elif args.command == "export":
+        export_results(queue, args.kind, args.output)
+
+
+if __name__ == "__main__":
+    main()